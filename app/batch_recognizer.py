@@ -0,0 +1,199 @@
+"""
+跨页批量文字识别模块
+
+检测按页运行，各页检测出的文本行裁剪后汇总，按宽高比分桶组成大批次送入识别模型，
+识别结果再按页和文本框映射回去，输出格式与PaddleOCR整页识别结果一致。
+"""
+import logging
+
+import cv2
+import numpy as np
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Batch_Recognizer")
+
+# 宽高比分桶边界，同一批次内的文本行宽度相近，减少识别时的填充
+RATIO_BUCKETS = (2, 4, 8, 16, 32)
+
+# 低于该置信度的识别结果丢弃，与PaddleOCR整页识别的默认drop_score一致
+DROP_SCORE = 0.5
+
+
+def crop_text_box(image, box, rotate_tall=True):
+    """
+    按四边形文本框裁剪并透视校正文本行图像
+
+    Args:
+        image: 页面图像
+        box: [[x1,y1],[x2,y2],[x3,y3],[x4,y4]]，顺时针，从左上角开始
+        rotate_tall: 是否把竖长的文本行旋转为横向
+
+    Returns:
+        裁剪后的文本行图像
+    """
+    points = np.array(box, dtype=np.float32)
+    crop_width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    crop_height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+    crop_width = max(crop_width, 1)
+    crop_height = max(crop_height, 1)
+
+    target = np.float32([[0, 0], [crop_width, 0], [crop_width, crop_height], [0, crop_height]])
+    matrix = cv2.getPerspectiveTransform(points, target)
+    crop = cv2.warpPerspective(
+        image, matrix, (crop_width, crop_height),
+        borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC
+    )
+    if rotate_tall and crop_height / crop_width >= 1.5:
+        crop = np.ascontiguousarray(np.rot90(crop))
+    return crop
+
+
+def _bgr(crop):
+    """识别模型需要三通道图像，灰度图像转换为BGR（与PaddleOCR.ocr的输入处理一致）"""
+    if crop.ndim == 2:
+        return cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)
+    return crop
+
+
+def classify_crops(ocr_engine, crops):
+    """
+    对文本行图像运行角度分类器
+
+    直接调用引擎的text_classifier，一次处理全部图像；PaddleOCR.ocr(列表, det=False)会把列表当作多页逐张处理，
+    只返回第一张的结果，且rec=False时仍会运行识别
+
+    Args:
+        ocr_engine: PaddleOCR实例，需启用角度分类器
+        crops: 文本行图像列表
+
+    Returns:
+        (分类后的图像列表, [(label, score), ...])，判为上下颠倒('180')且置信度足够的图像已旋转，均与crops一一对应
+    """
+    if not crops:
+        return [], []
+    if getattr(ocr_engine, "text_classifier", None) is None:
+        raise RuntimeError("OCR引擎未启用角度分类器")
+    crops, cls_res, _ = ocr_engine.text_classifier([_bgr(crop) for crop in crops])
+    return crops, [tuple(item) for item in cls_res]
+
+
+def recognize_crops(ocr_engine, crops, cls=False):
+    """
+    批量识别文本行图像
+
+    直接调用引擎的text_recognizer，结果与crops按序号一一对应（见classify_crops）
+
+    Args:
+        ocr_engine: PaddleOCR实例
+        crops: 文本行图像列表
+        cls: 识别前是否先运行角度分类器
+
+    Returns:
+        [(text, confidence), ...]，与crops一一对应
+    """
+    if not crops:
+        return []
+    if cls:
+        crops, _ = classify_crops(ocr_engine, crops)
+    else:
+        crops = [_bgr(crop) for crop in crops]
+    rec_res, _ = ocr_engine.text_recognizer(crops)
+    return [tuple(item) for item in rec_res]
+
+
+def sort_boxes(items, line_tolerance=10, key=None):
+    """
+    将文本框按从上到下、从左到右排序（与PaddleOCR整页识别的排序规则一致）
+
+    Args:
+        items: 文本框列表，或包含文本框的条目列表
+        line_tolerance: 左上角纵坐标相差小于该值时视为同一行
+        key: 从条目中取出文本框的函数，None表示条目本身就是文本框
+    """
+    key = key or (lambda item: item)
+    items = sorted(items, key=lambda item: (key(item)[0][1], key(item)[0][0]))
+    for i in range(len(items) - 1):
+        for j in range(i, -1, -1):
+            a, b = key(items[j]), key(items[j + 1])
+            if abs(b[0][1] - a[0][1]) < line_tolerance and b[0][0] < a[0][0]:
+                items[j], items[j + 1] = items[j + 1], items[j]
+            else:
+                break
+    return items
+
+
+class BatchRecognizer:
+    """跨页批量识别器，收集多页的文本行后统一识别"""
+
+    def __init__(self, ocr_engine, batch_size=64):
+        """
+        初始化批量识别器
+
+        Args:
+            ocr_engine: PaddleOCR实例，需启用角度分类器
+            batch_size: 每次送入识别模型的文本行数
+        """
+        self.ocr_engine = ocr_engine
+        self.batch_size = max(1, int(batch_size))
+        self._pages = {}  # key -> 排序后的文本框列表
+        self._lines = []  # (key, 文本框序号, 宽高比, 裁剪图像)
+
+    def __len__(self):
+        """已收集的文本行数"""
+        return len(self._lines)
+
+    def add_page(self, key, image, boxes):
+        """
+        加入一页的检测结果
+
+        Args:
+            key: 页面标识（如页码），用于取回该页结果
+            image: 检测所用的页面图像
+            boxes: 该页检测出的文本框列表
+        """
+        boxes = sort_boxes(boxes)
+        self._pages[key] = boxes
+        for index, box in enumerate(boxes):
+            crop = crop_text_box(image, box)
+            ratio = crop.shape[1] / max(crop.shape[0], 1)
+            self._lines.append((key, index, ratio, crop))
+
+    def recognize(self):
+        """
+        识别所有已收集的文本行，并清空收集状态
+
+        Returns:
+            dict: key -> OCR结果，格式为[[box, (text, confidence)], ...]
+        """
+        recognized = {key: [None] * len(boxes) for key, boxes in self._pages.items()}
+
+        # 按宽高比分桶，桶内按宽高比排序后切成批次
+        buckets = {}
+        for line in self._lines:
+            bucket = sum(1 for edge in RATIO_BUCKETS if line[2] >= edge)
+            buckets.setdefault(bucket, []).append(line)
+
+        batch_count = 0
+        for bucket in sorted(buckets):
+            lines = sorted(buckets[bucket], key=lambda line: line[2])
+            for start in range(0, len(lines), self.batch_size):
+                batch = lines[start:start + self.batch_size]
+                rec_res = recognize_crops(self.ocr_engine, [line[3] for line in batch], cls=True)
+                for (key, index, _, _), (text, confidence) in zip(batch, rec_res):
+                    recognized[key][index] = (text, confidence)
+                batch_count += 1
+
+        logger.info(f"批量识别完成: {len(self._pages)}页, {len(self._lines)}行, {batch_count}个批次")
+
+        results = {}
+        for key, boxes in self._pages.items():
+            results[key] = [
+                [box, rec]
+                for box, rec in zip(boxes, recognized[key])
+                if rec is not None and rec[1] >= DROP_SCORE
+            ]
+
+        self._pages = {}
+        self._lines = []
+        return results
@@ -1,9 +1,16 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Date, ForeignKey, Float, Table, DateTime
+from sqlalchemy import create_engine, event, select, insert, text, tuple_, func, case, Index, Column, Integer, String, Date, ForeignKey, Float, Table, DateTime
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker, joinedload
+from sqlalchemy.orm import relationship, sessionmaker, scoped_session, joinedload, selectinload, deferred
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.engine import make_url
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import datetime
+import base64
 import os
 from dotenv import load_dotenv
+from db_writer import create_writer
+from text_storage import CompressedText, inflate, inflated, text_span
+from search_index import index_articles, index_available, search_article_ids, snippet_columns, format_snippet
 
 # 加载环境变量
 load_dotenv()
@@ -18,21 +25,29 @@ article_keyword = Table(
     'article_keyword', 
     Base.metadata,
     Column('article_id', Integer, ForeignKey('article.id')),
-    Column('keyword_id', Integer, ForeignKey('keyword.id'))
+    Column('keyword_id', Integer, ForeignKey('keyword.id')),
+    # 同一关联只保存一次；关键词搜索从keyword_id查文章，两列索引可直接覆盖
+    Index('ux_article_keyword', 'article_id', 'keyword_id', unique=True),
+    Index('ix_article_keyword_keyword_id', 'keyword_id', 'article_id')
 )
 
 class Newspaper(Base):
     """报纸模型，表示一份报纸"""
     __tablename__ = 'newspaper'
+    __table_args__ = (
+        # 按内容哈希查找已处理完成的报纸
+        Index('ix_newspaper_content_hash_ocr_status', 'content_hash', 'ocr_status'),
+    )
     
     id = Column(Integer, primary_key=True)
     name = Column(String(100), nullable=False)  # 报纸名称
     issue_date = Column(Date, nullable=True)    # 发行日期
     issue_number = Column(String(50), nullable=True)  # 期号
     file_path = Column(String(255), nullable=False)  # 原始文件路径
-    ocr_status = Column(Integer, default=0)  # OCR状态：0未处理，1已处理，2处理错误
+    ocr_status = Column(Integer, default=0, index=True)  # OCR状态：0未处理，1已处理，2处理错误
     total_pages = Column(Integer, default=1)  # 总页数
-    created_at = Column(DateTime, default=datetime.datetime.now)
+    content_hash = Column(String(64), nullable=True)  # 原始文件内容的SHA-256，用于识别重复上传
+    created_at = Column(DateTime, default=datetime.datetime.now, index=True)
     
     # 关联关系
     pages = relationship("NewspaperPage", back_populates="newspaper", cascade="all, delete-orphan")
@@ -43,12 +58,20 @@ class Newspaper(Base):
 class NewspaperPage(Base):
     """报纸页面模型，表示报纸的一个页面"""
     __tablename__ = 'newspaper_page'
+    __table_args__ = (
+        # 报纸详情页按报纸查询页面并按页码排序；同一报纸的每页只保存一次
+        Index('ux_newspaper_page_newspaper_id_page_number', 'newspaper_id', 'page_number', unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     newspaper_id = Column(Integer, ForeignKey('newspaper.id'))
     page_number = Column(Integer, nullable=False)  # 页码
     page_image_path = Column(String(255), nullable=False)  # 页面图片路径
-    ocr_text = Column(Text, nullable=True)  # 整页OCR文本
+    # 整页OCR文本，压缩存储（见text_storage.py），只在页面详情中按需加载（列表使用preview_column截取的开头）
+    ocr_text = deferred(Column(CompressedText, nullable=True))
+    text_direction = Column(String(20), default='horizontal')  # 文字方向：horizontal横排，vertical竖排
+    text_type = Column(String(20), default='simplified')  # 文字类型：simplified简体，traditional繁体
+    orientation = Column(String(20), nullable=True)  # 识别时采用的页面方向：original/clockwise/counterclockwise/enhanced
     
     # 关联关系
     newspaper = relationship("Newspaper", back_populates="pages")
@@ -62,19 +85,41 @@ class Article(Base):
     __tablename__ = 'article'
     
     id = Column(Integer, primary_key=True)
-    page_id = Column(Integer, ForeignKey('newspaper_page.id'))
+    page_id = Column(Integer, ForeignKey('newspaper_page.id'), index=True)
     title = Column(String(255), nullable=True)  # 文章标题
-    content = Column(Text, nullable=True)  # 文章内容
+    # 单独存储的文章内容（压缩），只在内容不是页面文本的一段时使用，只在文章详情中按需加载
+    content_data = deferred(Column('content', CompressedText, nullable=True))
+    # 文章内容在页面OCR文本中的区间（字符偏移），与页面文本共用存储
+    content_start = Column(Integer, nullable=True)
+    content_end = Column(Integer, nullable=True)
     position_x = Column(Float, nullable=True)  # 文章在页面上的X坐标（相对位置）
     position_y = Column(Float, nullable=True)  # 文章在页面上的Y坐标（相对位置）
     width = Column(Float, nullable=True)  # 文章宽度（相对）
     height = Column(Float, nullable=True)  # 文章高度（相对）
-    extracted_date = Column(Date, nullable=True)  # 从文章内容中提取的日期
+    extracted_date = Column(Date, nullable=True, index=True)  # 从文章内容中提取的日期
     
     # 关联关系
     page = relationship("NewspaperPage", back_populates="articles")
     keywords = relationship("Keyword", secondary=article_keyword, back_populates="articles")
     
+    @hybrid_property
+    def content(self):
+        """文章内容：单独存储的内容，或页面文本中的区间"""
+        if self.content_data is not None or self.content_start is None:
+            return self.content_data
+        return (self.page.ocr_text or "")[self.content_start:self.content_end]
+    
+    @content.expression
+    def content(cls):
+        """文章内容的SQL表达式，用于在SQL中截取摘要和搜索"""
+        page_text = select(inflated(NewspaperPage.ocr_text)).where(
+            NewspaperPage.id == cls.page_id
+        ).scalar_subquery()
+        return case(
+            (cls.content_data.is_not(None), inflated(cls.content_data)),
+            else_=func.substr(page_text, cls.content_start + 1, cls.content_end - cls.content_start)
+        )
+    
     def __repr__(self):
         return f"<Article(title='{self.title[:20]}...', page_id={self.page_id})>"
 
@@ -91,122 +136,482 @@ class Keyword(Base):
     def __repr__(self):
         return f"<Keyword(word='{self.word}')>"
 
+def _engine_options(db_url):
+    """连接池参数，内存SQLite使用单连接池，不支持池大小参数"""
+    url = make_url(db_url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+    return {
+        "pool_size": int(os.getenv('DB_POOL_SIZE', '5')),
+        "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        "pool_pre_ping": url.get_backend_name() != 'sqlite',  # 网络数据库检测失效连接
+        "pool_recycle": 3600
+    }
+
+# SQLite连接参数：WAL模式下读取不被写入阻塞；synchronous=NORMAL在WAL模式下只在检查点时同步磁盘，
+# 断电最多丢失最近的事务，不会损坏数据库
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -int(os.getenv('SQLITE_CACHE_MB', '64')) * 1024,  # 负数表示KiB
+    "mmap_size": int(os.getenv('SQLITE_MMAP_MB', '256')) * 1024 * 1024,
+    "busy_timeout": int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),  # 其他进程（如批量导入）写入时等待而不是报错
+    "temp_store": "MEMORY"
+}
+
+# 进程级共享的数据库引擎和连接池，各函数和请求不再各自创建引擎
+engine = create_engine(DB_PATH, **_engine_options(DB_PATH))
+SessionFactory = sessionmaker(bind=engine)
+
+def register_sqlite_functions(sqlite_engine):
+    """
+    为SQLite引擎的每个新连接注册自定义SQL函数：解压压缩文本的inflate()（见text_storage.py）
+
+    迁移、全文索引重建和预览摘要查询都会用到，执行迁移的引擎（包括脚本和测试自建的引擎）都需要注册
+    """
+    @event.listens_for(sqlite_engine, "connect")
+    def _register_functions(dbapi_connection, connection_record):
+        dbapi_connection.create_function("inflate", 1, inflate, deterministic=True)
+    return sqlite_engine
+
+if engine.dialect.name == 'sqlite':
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """每个新连接设置SQLite参数"""
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    register_sqlite_functions(engine)
+
+# 所有写操作经由单个写线程组提交，见db_writer.py
+db_writer = create_writer(SessionFactory, max_batch=int(os.getenv('DB_WRITE_BATCH', '64')))
+
+# 线程本地的会话，供Web请求使用，请求结束时由main.py注册的teardown回调移除
+db_session = scoped_session(SessionFactory)
+
 # 初始化数据库连接
 def init_db():
-    """初始化数据库，创建所有表"""
-    engine = create_engine(DB_PATH)
+    """初始化数据库，创建所有表，并把已有数据库迁移到最新结构（见migrations.py）"""
+    from migrations import migrate
     Base.metadata.create_all(engine)
+    migrate(engine)
     return engine
 
 # 创建会话
 def get_session():
-    """获取数据库会话"""
-    engine = create_engine(DB_PATH)
-    Session = sessionmaker(bind=engine)
-    return Session()
+    """获取新的数据库会话（共用进程级连接池），调用方负责关闭"""
+    return SessionFactory()
 
 # 添加报纸记录
-def add_newspaper(name, file_path, issue_date=None, issue_number=None, total_pages=1):
+def add_newspaper(name, file_path, issue_date=None, issue_number=None, total_pages=1, content_hash=None):
     """添加一份新的报纸记录"""
-    session = get_session()
-    try:
+    def write(session):
         newspaper = Newspaper(
             name=name,
             file_path=file_path,
             issue_date=issue_date,
             issue_number=issue_number,
-            total_pages=total_pages
+            total_pages=total_pages,
+            content_hash=content_hash
         )
         session.add(newspaper)
-        session.commit()
+        session.flush()
         return newspaper.id
-    except Exception as e:
-        session.rollback()
-        raise e
-    finally:
-        session.close()
+    return db_writer.execute(write)
 
 # 添加报纸页面记录
-def add_newspaper_page(newspaper_id, page_number, page_image_path, ocr_text=None):
+def add_newspaper_page(newspaper_id, page_number, page_image_path, ocr_text=None,
+                       text_direction='horizontal', text_type='simplified', orientation=None):
     """添加报纸页面记录"""
-    session = get_session()
-    try:
+    def write(session):
         page = NewspaperPage(
             newspaper_id=newspaper_id,
             page_number=page_number,
             page_image_path=page_image_path,
-            ocr_text=ocr_text
+            ocr_text=ocr_text,
+            text_direction=text_direction,
+            text_type=text_type,
+            orientation=orientation
         )
         session.add(page)
-        session.commit()
+        session.flush()
         return page.id
-    except Exception as e:
-        session.rollback()
-        raise e
-    finally:
-        session.close()
+    return db_writer.execute(write)
+
+# 关键词到ID的缓存。关键词只增不删，已提交的ID可以一直使用；新插入的关键词在事务提交后才放入缓存
+_keyword_ids = {}
+
+# 单条IN查询最多包含的参数数，低于旧版SQLite的999个变量上限
+_IN_CHUNK = 500
+
+def _chunks(items, size=_IN_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _lookup_keyword_ids(session, words):
+    """查询已存在关键词的ID，返回{word: id}"""
+    found = {}
+    for chunk in _chunks(words):
+        found.update(session.execute(select(Keyword.word, Keyword.id).where(Keyword.word.in_(chunk))).all())
+    return found
+
+def _resolve_keyword_ids(session, words):
+    """
+    获取关键词ID，缓存中没有的先一次查询，仍不存在的批量插入
+    
+    Returns:
+        ({word: id}, 本事务新插入的{word: id})。新插入的ID在事务提交后才能放入缓存
+    """
+    ids = {word: _keyword_ids[word] for word in words if word in _keyword_ids}
+    missing = [word for word in words if word not in ids]
+    if not missing:
+        return ids, {}
+    
+    found = _lookup_keyword_ids(session, missing)
+    _keyword_ids.update(found)
+    ids.update(found)
+    
+    new_words = [word for word in missing if word not in found]
+    if not new_words:
+        return ids, {}
+    if session.bind.dialect.name == 'sqlite':
+        # 批量导入的其他进程可能同时插入同一个词
+        stmt = sqlite_insert(Keyword).on_conflict_do_nothing(index_elements=['word'])
+    else:
+        stmt = insert(Keyword)
+    session.execute(stmt, [{"word": word} for word in new_words])
+    new_ids = _lookup_keyword_ids(session, new_words)
+    ids.update(new_ids)
+    return ids, new_ids
+
+# 批量保存报纸页面
+def save_newspaper_pages(newspaper_id, pages):
+    """
+    在一个事务中保存一份报纸的多个页面及其文章和关键词关联
+    
+    页面和文章批量插入，关键词ID优先从进程内缓存获取，新关键词批量插入，关联表一次executemany写入
+    
+    Args:
+        newspaper_id: 报纸ID
+        pages: 页面字典列表，包含page_number、page_image_path、ocr_text、text_direction、text_type、
+               orientation和article（文章字段及keywords列表）
+    
+    Returns:
+        页面ID列表，与pages顺序一致
+    """
+    if not pages:
+        return []
+    
+    def write(session):
+        page_rows = []
+        for record in pages:
+            article = record["article"]
+            # 文章内容是页面文本的一段时只保存区间
+            span = text_span(record["ocr_text"], article["content"])
+            page_rows.append(NewspaperPage(
+                newspaper_id=newspaper_id,
+                page_number=record["page_number"],
+                page_image_path=record["page_image_path"],
+                ocr_text=record["ocr_text"],
+                text_direction=record["text_direction"],
+                text_type=record["text_type"],
+                orientation=record["orientation"],
+                articles=[Article(
+                    title=article["title"],
+                    content_data=None if span else article["content"],
+                    content_start=span[0] if span else None,
+                    content_end=span[1] if span else None,
+                    extracted_date=article["extracted_date"],
+                    position_x=article.get("position_x"),
+                    position_y=article.get("position_y"),
+                    width=article.get("width"),
+                    height=article.get("height")
+                )]
+            ))
+        session.add_all(page_rows)
+        session.flush()
+        index_articles(session.connection(), [
+            (page.articles[0].id, record["article"]["title"], record["article"]["content"])
+            for page, record in zip(page_rows, pages)
+        ])
+        
+        words = list(dict.fromkeys(word for record in pages for word in record["article"]["keywords"]))
+        keyword_ids, new_ids = _resolve_keyword_ids(session, words)
+        links = [
+            {"article_id": page.articles[0].id, "keyword_id": keyword_ids[word]}
+            for page, record in zip(page_rows, pages)
+            for word in dict.fromkeys(record["article"]["keywords"])
+        ]
+        if links:
+            session.execute(article_keyword.insert(), links)
+        return [page.id for page in page_rows], new_ids
+    
+    page_ids, new_ids = db_writer.execute(write)
+    _keyword_ids.update(new_ids)
+    return page_ids
 
 # 更新报纸的OCR状态
 def update_newspaper_ocr_status(newspaper_id, status):
     """更新报纸的OCR处理状态"""
-    session = get_session()
-    try:
+    def write(session):
         newspaper = session.query(Newspaper).filter_by(id=newspaper_id).first()
         if newspaper:
             newspaper.ocr_status = status
-            session.commit()
             return True
         return False
-    except Exception as e:
-        session.rollback()
-        raise e
+    return db_writer.execute(write)
+
+# 获取报纸记录
+def get_newspaper(newspaper_id):
+    """获取报纸记录，不存在时返回None"""
+    session = get_session()
+    try:
+        return session.query(Newspaper).filter_by(id=newspaper_id).first()
     finally:
         session.close()
 
+# 获取报纸的识别设置
+def get_newspaper_text_settings(newspaper_id):
+    """
+    获取报纸已处理页面所用的文字类型和文字方向，用于断点续处理时选择相同的OCR引擎
+
+    Returns:
+        (text_type, text_direction)，还没有已处理的页面时返回None
+    """
+    session = get_session()
+    try:
+        page = session.query(NewspaperPage).filter_by(newspaper_id=newspaper_id).order_by(
+            NewspaperPage.page_number
+        ).first()
+        return (page.text_type, page.text_direction) if page else None
+    finally:
+        session.close()
+
+# 准备断点续处理
+def prepare_newspaper_resume(newspaper_id):
+    """
+    整理报纸的已完成页面，用于断点续处理
+    
+    页面记录和文章记录在同一事务中写入，已有文章的页面视为已完成；
+    只有页面记录、没有文章的页面（旧版本逐条写入时中断留下的）删除后重新处理
+    
+    Returns:
+        已完成页面的页码集合
+    """
+    def write(session):
+        pages = session.query(NewspaperPage).options(
+            joinedload(NewspaperPage.articles)
+        ).filter_by(newspaper_id=newspaper_id).all()
+        
+        completed = set()
+        for page in pages:
+            if page.articles:
+                completed.add(page.page_number)
+            else:
+                session.delete(page)
+        return completed
+    return db_writer.execute(write)
+
+# 查询未完成处理的报纸
+def get_unfinished_newspapers():
+    """获取处理失败或中断的报纸列表（处理状态为未处理或处理错误）"""
+    session = get_session()
+    try:
+        return session.query(Newspaper).filter(
+            Newspaper.ocr_status.in_([0, 2])
+        ).order_by(Newspaper.id).all()
+    finally:
+        session.close()
+
+# 根据文件内容哈希查找已处理的报纸
+def find_newspaper_by_hash(content_hash):
+    """查找内容哈希相同且已处理完成的报纸，返回报纸ID，不存在时返回None"""
+    if not content_hash:
+        return None
+    session = get_session()
+    try:
+        newspaper = session.query(Newspaper).filter_by(
+            content_hash=content_hash, ocr_status=1
+        ).order_by(Newspaper.id).first()
+        return newspaper.id if newspaper else None
+    finally:
+        session.close()
+
+# 根据文件内容哈希查找未完成的报纸
+def find_unfinished_newspaper_by_hash(content_hash):
+    """查找内容哈希相同、处理失败或中断（处理状态为未处理或处理错误）的报纸，返回最新的报纸ID，不存在时返回None"""
+    if not content_hash:
+        return None
+    session = get_session()
+    try:
+        newspaper = session.query(Newspaper).filter(
+            Newspaper.content_hash == content_hash, Newspaper.ocr_status.in_([0, 2])
+        ).order_by(Newspaper.id.desc()).first()
+        return newspaper.id if newspaper else None
+    finally:
+        session.close()
+
+# 报纸列表分页游标
+def encode_cursor(newspaper):
+    """报纸在列表中的位置(created_at, id)编码为游标字符串"""
+    raw = f"{newspaper.created_at.isoformat()},{newspaper.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """解码游标，格式错误时抛出ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, newspaper_id = raw.rsplit(',', 1)
+        return datetime.datetime.fromisoformat(created_at), int(newspaper_id)
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
 # 查询报纸列表
-def get_newspapers(limit=100, offset=0):
-    """获取报纸列表"""
+def get_newspapers(limit=100, before=None, after=None):
+    """
+    按上传时间倒序获取报纸列表
+    
+    使用(created_at, id)键集分页：从游标位置沿索引继续读取，翻到多深都只读取limit条，不像OFFSET需要跳过前面所有记录
+    
+    Args:
+        limit: 最多返回的报纸数
+        before: 游标，只返回排在它之后（更早上传）的报纸
+        after: 游标，只返回排在它之前（更晚上传）且最接近它的报纸
+    """
+    session = get_session()
+    try:
+        key = tuple_(Newspaper.created_at, Newspaper.id)
+        query = session.query(Newspaper)
+        if after:
+            newspapers = query.filter(key > decode_cursor(after)).order_by(
+                Newspaper.created_at, Newspaper.id
+            ).limit(limit).all()
+            newspapers.reverse()
+            return newspapers
+        if before:
+            query = query.filter(key < decode_cursor(before))
+        return query.order_by(Newspaper.created_at.desc(), Newspaper.id.desc()).limit(limit).all()
+    finally:
+        session.close()
+
+def get_newspaper_page(limit=50, before=None, after=None):
+    """
+    获取报纸列表的一页
+    
+    Returns:
+        (报纸列表, 下一页游标, 上一页游标)，没有下一页或上一页时游标为None
+    """
+    newspapers = get_newspapers(limit + 1, before=before, after=after)
+    if after:
+        # 多取的一条是更晚上传的报纸，说明前面还有一页
+        has_newer = len(newspapers) > limit
+        newspapers = newspapers[-limit:]
+        has_older = True
+    else:
+        has_older = len(newspapers) > limit
+        newspapers = newspapers[:limit]
+        has_newer = before is not None
+    next_cursor = encode_cursor(newspapers[-1]) if newspapers and has_older else None
+    prev_cursor = encode_cursor(newspapers[0]) if newspapers and has_newer else None
+    return newspapers, next_cursor, prev_cursor
+
+# 报纸数量统计
+def get_newspaper_counts():
+    """
+    报纸总数和各处理状态的数量
+    
+    SQLite数据库读取触发器增量维护的统计表（见migrations.py），不需要每次统计整张表
+    
+    Returns:
+        {"total": 总数, "by_status": {状态: 数量}}
+    """
     session = get_session()
     try:
-        newspapers = session.query(Newspaper).order_by(Newspaper.created_at.desc()).limit(limit).offset(offset).all()
-        return newspapers
+        if session.bind.dialect.name == 'sqlite':
+            rows = session.execute(text("SELECT ocr_status, count FROM newspaper_status_count")).all()
+        else:
+            rows = session.query(Newspaper.ocr_status, func.count(Newspaper.id)).group_by(Newspaper.ocr_status).all()
+        by_status = {status: count for status, count in rows if count}
+        return {"total": sum(by_status.values()), "by_status": by_status}
     finally:
         session.close()
 
+# 列表和搜索结果中显示的内容开头长度（字符）
+PREVIEW_LENGTH = 200
+
+def preview_column(column, length=PREVIEW_LENGTH):
+    """在SQL中截取文本列的开头（压缩存储的列先解压），列表页不需要读入全文"""
+    if isinstance(column.type, CompressedText):
+        column = inflated(column)
+    return func.substr(column, 1, length + 1)  # 多取一个字符，用于判断是否被截断
+
+def _search_results(query, search_text):
+    """
+    执行搜索查询，为每篇文章附加preview（内容开头）和snippet（查询词附近的片段HTML）属性
+    
+    文章内容列延迟加载，片段和开头都在SQL中截取。命中文章的内容先在CTE中每行解压一次，
+    开头、查询词位置和片段都从解压结果截取，不对同一行重复解压
+    """
+    session = query.session
+    texts = query.with_entities(Article.id.label("id"), Article.content.label("text")).cte("article_text")
+    if session.bind.dialect.name == 'sqlite' and session.bind.dialect.dbapi.sqlite_version_info >= (3, 35, 0):
+        # CTE被多次引用时SQLite可能把它展开到每处引用，MATERIALIZED保证只计算一次
+        texts = texts.prefix_with("MATERIALIZED")
+    snippet_start, snippet = snippet_columns(texts.c.text, search_text)
+    rows = session.query(
+        Article, preview_column(texts.c.text), snippet_start, snippet
+    ).join(texts, texts.c.id == Article.id).options(
+        # 预加载关键词关系。关联表和关键词表的嵌套外连接会让SQLite扫描整个关联表，改为按文章ID的IN查询
+        selectinload(Article.keywords),
+        joinedload(Article.page).joinedload(NewspaperPage.newspaper)  # 预加载页面和报纸关系
+    ).all()
+    
+    articles = []
+    for article, preview, start, window in rows:
+        article.preview = preview or ""
+        article.snippet = format_snippet(start, window, search_text)
+        articles.append(article)
+    return articles
+
 # 根据关键词搜索文章
 def search_articles_by_keyword(keyword, limit=50):
     """根据关键词搜索文章"""
     session = get_session()
     try:
-        articles = session.query(Article).options(
-            joinedload(Article.keywords),  # 预加载关键词关系
-            joinedload(Article.page).joinedload(NewspaperPage.newspaper)  # 预加载页面和报纸关系
-        ).join(
-            article_keyword
-        ).join(
-            Keyword
-        ).filter(
-            Keyword.word == keyword
-        ).limit(limit).all()
-        
-        return articles
+        return _search_results(
+            session.query(Article).join(
+                article_keyword
+            ).join(
+                Keyword
+            ).filter(
+                Keyword.word == keyword
+            ).limit(limit),
+            keyword
+        )
     finally:
         session.close()
 
 # 全文搜索
 def search_articles_by_content(search_text, limit=50):
-    """在文章内容中搜索文本"""
+    """
+    在文章标题和内容中搜索文本，结果按相关度排序
+    
+    有全文索引时使用FTS5检索并按BM25排序，否则退回LIKE查询。
+    每篇文章附带snippet属性：命中位置附近的内容片段，查询词用<mark>标记
+    """
     session = get_session()
     try:
-        # 简单的LIKE查询，实际应用中可能需要全文索引
-        articles = session.query(Article).options(
-            joinedload(Article.keywords),  # 预加载关键词关系
-            joinedload(Article.page).joinedload(NewspaperPage.newspaper)  # 预加载页面和报纸关系
-        ).filter(
-            Article.content.like(f'%{search_text}%')
-        ).limit(limit).all()
+        query = session.query(Article)
+        if not index_available(session.connection()):
+            return _search_results(query.filter(Article.content.like(f'%{search_text}%')).limit(limit), search_text)
         
-        return articles
+        ranked = [article_id for article_id, _ in search_article_ids(session.connection(), search_text, limit)]
+        if not ranked:
+            return []
+        by_id = {article.id: article for article in _search_results(query.filter(Article.id.in_(ranked)), search_text)}
+        return [by_id[article_id] for article_id in ranked if article_id in by_id]
     finally:
         session.close()
 
@@ -0,0 +1,136 @@
+"""
+数据库单写线程模块
+
+SQLite同一时间只允许一个写事务，多个线程各自提交时会互相等待，甚至出现"database is locked"。
+所有写操作都交给一个写线程顺序执行：写线程每次取出队列中已积压的全部写操作，
+在同一个事务中执行后只提交一次（组提交），并发写入越多，每次提交分摊的开销越小。
+读操作不经过写线程，WAL模式下读取不会被写入阻塞。
+"""
+import queue
+import atexit
+import logging
+import threading
+from concurrent.futures import Future
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("DB_Writer")
+
+# 队列结束标记
+_STOP = object()
+
+
+class DatabaseWriter:
+    """在单独线程中执行并组提交所有数据库写操作"""
+
+    def __init__(self, session_factory, max_batch=64):
+        """
+        初始化写线程，线程在第一次写入时启动
+
+        Args:
+            session_factory: 创建数据库会话的工厂
+            max_batch: 一次提交最多合并的写操作数
+        """
+        self.session_factory = session_factory
+        self.max_batch = max(1, int(max_batch))
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.commits = 0
+        self.writes = 0
+
+    def submit(self, func, *args, **kwargs):
+        """
+        提交写操作，立即返回
+
+        Args:
+            func: 写操作函数，第一个参数为数据库会话，不应自行提交或关闭会话；
+                  需要返回新记录ID时应先flush
+            *args, **kwargs: 传给func的其他参数
+
+        Returns:
+            Future，事务提交后得到func的返回值
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("写操作函数中不能再提交写操作")
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((func, args, kwargs, future))
+        return future
+
+    def execute(self, func, *args, **kwargs):
+        """提交写操作并等待提交完成，返回func的返回值；写入失败时抛出原异常"""
+        return self.submit(func, *args, **kwargs).result()
+
+    def close(self):
+        """执行完已提交的写操作后停止写线程"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(_STOP)
+        thread.join()
+        with self._lock:
+            self._thread = None
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """取出队列中积压的写操作，合并为一个事务提交"""
+        while True:
+            task = self._queue.get()
+            if task is _STOP:
+                return
+            batch = [task]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    task = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if task is _STOP:
+                    stop = True
+                    break
+                batch.append(task)
+
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch):
+        """
+        在一个事务中执行一批写操作
+
+        任一写操作出错时回滚整批，再逐个单独重试，出错的写操作不影响同批的其他写操作
+        """
+        session = self.session_factory()
+        try:
+            results = [func(session, *args, **kwargs) for func, args, kwargs, _ in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            if len(batch) == 1:
+                batch[0][3].set_exception(e)
+            else:
+                logger.warning(f"组提交{len(batch)}个写操作失败，逐个重试: {e}")
+                for task in batch:
+                    self._commit([task])
+            return
+        finally:
+            session.close()
+
+        self.commits += 1
+        self.writes += len(batch)
+        for (_, _, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+def create_writer(session_factory, max_batch=64):
+    """创建写线程，进程退出前执行完已提交的写操作"""
+    writer = DatabaseWriter(session_factory, max_batch=max_batch)
+    atexit.register(writer.close)
+    return writer
@@ -0,0 +1,126 @@
+"""
+OCR引擎注册表模块
+
+每种识别模型（简体、繁体等）的PaddleOCR实例在首次使用时加载，之后由所有OCR处理器共用。
+已加载模型的估算内存超出预算时，卸载最久未使用的模型。
+同一PaddleOCR实例不能被多个线程同时用于推理，调用方在推理期间持有该引擎的inference_lock。
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+from paddleocr import PaddleOCR
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Engine_Registry")
+
+
+def load_engine(use_gpu, rec_batch_num, ocr_config):
+    """
+    创建PaddleOCR引擎
+
+    Args:
+        use_gpu: 是否使用GPU加速
+        rec_batch_num: 识别模型每批处理的文本行数
+        ocr_config: 影响识别结果的引擎参数（lang、use_angle_cls、det_db_box_thresh等）
+    """
+    # 初始化OCR引擎，针对中文报纸进行优化
+    return PaddleOCR(
+        use_gpu=use_gpu,
+        show_log=False,
+        rec_batch_num=rec_batch_num,  # 识别批大小
+        rec_model_dir=None,  # 使用默认模型
+        det_model_dir=None,
+        cls_model_dir=None,  # 角度分类器模型
+        **ocr_config
+    )
+
+
+class EngineRegistry:
+    """按引擎参数共享PaddleOCR实例的注册表，超出内存预算时按LRU卸载"""
+
+    def __init__(self, memory_budget_mb=2048, engine_mb=500):
+        """
+        初始化引擎注册表
+
+        Args:
+            memory_budget_mb: 已加载引擎的内存预算（MB）
+            engine_mb: 单个引擎（检测、识别、角度分类模型）的估算内存（MB）
+        """
+        self.memory_budget_mb = memory_budget_mb
+        self.engine_mb = engine_mb
+        self._engines = OrderedDict()  # 键 -> PaddleOCR，最近使用的在末尾
+        self._load_locks = {}  # 键 -> 加载锁，同一模型只加载一次，不同模型可同时加载
+        self._inference_locks = {}  # 键 -> 推理锁，卸载后重新加载的引擎沿用同一把锁
+        self._lock = threading.Lock()
+        logger.info(f"OCR引擎注册表初始化完成，内存预算: {memory_budget_mb}MB，单个引擎估算: {engine_mb}MB")
+
+    @property
+    def max_engines(self):
+        """内存预算内可同时加载的引擎数，至少为1"""
+        return max(1, int(self.memory_budget_mb // max(1, self.engine_mb)))
+
+    @staticmethod
+    def _key(use_gpu, rec_batch_num, ocr_config):
+        return (bool(use_gpu), int(rec_batch_num), tuple(sorted(ocr_config.items())))
+
+    def get(self, use_gpu, rec_batch_num, ocr_config):
+        """
+        获取引擎，未加载时加载
+
+        被卸载的引擎仍可由正在使用它的任务继续使用，任务结束释放引用后回收内存。
+
+        Args:
+            use_gpu: 是否使用GPU加速
+            rec_batch_num: 识别模型每批处理的文本行数
+            ocr_config: 影响识别结果的引擎参数
+
+        Returns:
+            PaddleOCR实例
+        """
+        key = self._key(use_gpu, rec_batch_num, ocr_config)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                self._engines.move_to_end(key)
+                return engine
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                engine = self._engines.get(key)
+                if engine is not None:
+                    self._engines.move_to_end(key)
+                    return engine
+
+            logger.info(f"加载OCR引擎: {dict(key[2])}")
+            engine = load_engine(use_gpu, rec_batch_num, ocr_config)
+
+            with self._lock:
+                self._engines[key] = engine
+                while len(self._engines) > self.max_engines:
+                    evicted_key, _ = self._engines.popitem(last=False)
+                    logger.info(f"超出内存预算，卸载OCR引擎: {dict(evicted_key[2])}")
+            return engine
+
+    def inference_lock(self, use_gpu, rec_batch_num, ocr_config):
+        """
+        获取引擎的推理锁，共用该引擎的处理器在调用ocr()、text_recognizer等推理方法期间持有
+
+        Args:
+            use_gpu: 是否使用GPU加速
+            rec_batch_num: 识别模型每批处理的文本行数
+            ocr_config: 影响识别结果的引擎参数
+
+        Returns:
+            threading.Lock
+        """
+        key = self._key(use_gpu, rec_batch_num, ocr_config)
+        with self._lock:
+            return self._inference_locks.setdefault(key, threading.Lock())
+
+    def loaded(self):
+        """已加载引擎的参数列表（最久未使用的在前）"""
+        with self._lock:
+            return [dict(key[2], use_gpu=key[0], rec_batch_num=key[1]) for key in self._engines]
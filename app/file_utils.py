@@ -0,0 +1,45 @@
+"""
+文件工具模块
+
+上传文件的保存与内容哈希计算，用于识别重复上传的文件。
+"""
+import hashlib
+
+# 读写文件的块大小
+CHUNK_SIZE = 1024 * 1024
+
+
+def save_stream_with_hash(stream, save_path):
+    """
+    将上传的文件流写入磁盘，同时计算SHA-256
+
+    Args:
+        stream: 可读的二进制文件流（如werkzeug FileStorage.stream）
+        save_path: 保存路径
+
+    Returns:
+        (content_hash, file_size)
+    """
+    sha256 = hashlib.sha256()
+    file_size = 0
+    with open(save_path, 'wb') as f:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            f.write(chunk)
+            file_size += len(chunk)
+    return sha256.hexdigest(), file_size
+
+
+def hash_file(file_path):
+    """计算已有文件的SHA-256"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+    return sha256.hexdigest()
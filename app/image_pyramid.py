@@ -0,0 +1,146 @@
+"""
+页面缩略图与Deep Zoom瓦片金字塔模块
+
+每个页面图片page_N.jpg旁生成：
+    page_N_thumb.jpg      列表页使用的缩略图
+    page_N.dzi            Deep Zoom描述文件，最后写入，存在即表示金字塔已完整生成
+    page_N_files/<级别>/<列>_<行>.jpg  各级瓦片
+
+页面查看器（OpenSeadragon）按当前缩放级别只加载可见区域的瓦片。
+
+单独运行本模块可以为已有的页面补建缩略图和瓦片金字塔：
+    python app/image_pyramid.py data/processed
+"""
+import math
+import shutil
+import logging
+from pathlib import Path
+
+from PIL import Image
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Image_Pyramid")
+
+# 缩略图宽度
+THUMBNAIL_WIDTH = 360
+
+# 瓦片边长、相邻瓦片的重叠像素数和JPEG质量
+TILE_SIZE = 256
+TILE_OVERLAP = 1
+JPEG_QUALITY = 85
+
+DZI_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="jpg" Overlap="{overlap}" TileSize="{tile_size}">
+  <Size Width="{width}" Height="{height}"/>
+</Image>
+"""
+
+
+def thumbnail_path(image_path):
+    """页面图片对应的缩略图路径"""
+    image_path = Path(image_path)
+    return image_path.with_name(f"{image_path.stem}_thumb.jpg")
+
+
+def dzi_path(image_path):
+    """页面图片对应的Deep Zoom描述文件路径"""
+    return Path(image_path).with_suffix(".dzi")
+
+
+def tiles_dir(image_path):
+    """页面图片对应的瓦片目录"""
+    image_path = Path(image_path)
+    return image_path.with_name(f"{image_path.stem}_files")
+
+
+def _save_thumbnail(image, path):
+    thumbnail = image.copy()
+    thumbnail.thumbnail((THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * 4), Image.LANCZOS)
+    thumbnail.save(path, "JPEG", quality=JPEG_QUALITY)
+
+
+def ensure_thumbnail(image_path):
+    """
+    返回页面缩略图路径，缩略图不存在时生成
+
+    JPEG只按缩略图所需的分辨率解码，即使是300dpi整页也只需几十毫秒
+    """
+    path = thumbnail_path(image_path)
+    if not path.exists():
+        with Image.open(image_path) as image:
+            image.draft("RGB", (THUMBNAIL_WIDTH, THUMBNAIL_WIDTH * 4))
+            _save_thumbnail(image.convert("RGB"), path)
+    return path
+
+
+def build_pyramid(image_path, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    """
+    生成页面的缩略图和Deep Zoom瓦片金字塔
+
+    最高级别为原图尺寸，每低一级长宽减半，直到1x1像素。
+
+    Args:
+        image_path: 页面图片路径
+        tile_size: 瓦片边长
+        overlap: 相邻瓦片的重叠像素数
+
+    Returns:
+        Deep Zoom描述文件路径
+    """
+    image_path = Path(image_path)
+    with Image.open(image_path) as source:
+        image = source.convert("RGB")
+
+    _save_thumbnail(image, thumbnail_path(image_path))
+
+    width, height = image.size
+    max_level = math.ceil(math.log2(max(width, height, 1)))
+
+    # 先删除描述文件和旧瓦片，生成中断时查看器会回退到整页图片
+    dzi = dzi_path(image_path)
+    dzi.unlink(missing_ok=True)
+    files_dir = tiles_dir(image_path)
+    shutil.rmtree(files_dir, ignore_errors=True)
+
+    level_image = image
+    tile_count = 0
+    for level in range(max_level, -1, -1):
+        if level != max_level:
+            level_image = level_image.resize(
+                (max(1, math.ceil(level_image.width / 2)), max(1, math.ceil(level_image.height / 2))),
+                Image.LANCZOS
+            )
+        level_dir = files_dir / str(level)
+        level_dir.mkdir(parents=True)
+        level_width, level_height = level_image.size
+        for col, x in enumerate(range(0, level_width, tile_size)):
+            for row, y in enumerate(range(0, level_height, tile_size)):
+                box = (
+                    max(0, x - overlap), max(0, y - overlap),
+                    min(level_width, x + tile_size + overlap), min(level_height, y + tile_size + overlap)
+                )
+                level_image.crop(box).save(level_dir / f"{col}_{row}.jpg", "JPEG", quality=JPEG_QUALITY)
+                tile_count += 1
+
+    dzi.write_text(
+        DZI_TEMPLATE.format(overlap=overlap, tile_size=tile_size, width=width, height=height),
+        encoding="utf-8"
+    )
+    logger.info(f"瓦片金字塔已生成: {dzi}（{max_level + 1}级，{tile_count}个瓦片）")
+    return dzi
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="为已有的页面图片补建缩略图和瓦片金字塔")
+    parser.add_argument("directory", help="页面图片目录，如data/processed")
+    parser.add_argument("--force", action="store_true", help="重新生成已有的瓦片金字塔")
+    args = parser.parse_args()
+
+    for page_image in sorted(Path(args.directory).rglob("page_*.jpg")):
+        if page_image.stem.endswith("_thumb"):
+            continue
+        if args.force or not dzi_path(page_image).exists():
+            build_pyramid(page_image)
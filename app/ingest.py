@@ -0,0 +1,235 @@
+"""
+批量导入命令
+
+遍历目录树中的PDF和图片文件，用多个工作进程并行处理，跳过内容已导入的文件和本次重复的文件，
+内容相同的报纸处理失败或中断过时从未完成的页面继续处理，不再新建报纸记录。
+实时显示页/秒和预计剩余时间，结束时输出每个文件的耗时和失败汇总。
+
+用法:
+    python app/ingest.py /path/to/scans --workers 4
+    python app/ingest.py /path/to/scans --workers 8 --report ingest_report.json
+"""
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import logging
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# 将app目录添加到Python路径，以便能正确导入模块
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from dotenv import load_dotenv
+from tqdm import tqdm
+
+# 加载环境变量
+load_dotenv()
+
+# 设置日志（批量导入时只输出警告，避免刷屏）
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("Ingest")
+
+# 支持导入的文件扩展名
+INGEST_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png', '.tif', '.tiff', '.bmp'}
+
+# 工作进程内的OCR处理器和进度队列，由_init_worker创建
+_worker_handlers = None
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    """工作进程初始化：创建OCR处理器集合（继续处理的报纸使用其已处理页面的文字类型和方向）"""
+    global _worker_handlers, _progress_queue
+    from ocr_handler import OCRHandlerSet, handler_options_from_env
+    from engine_registry import EngineRegistry
+
+    options = handler_options_from_env()
+    options["ocr_processes"] = 0  # 文件级已并行，工作进程内不再嵌套进程池
+    _worker_handlers = OCRHandlerSet(options, EngineRegistry(
+        memory_budget_mb=int(os.getenv('OCR_ENGINE_BUDGET_MB', '2048')),
+        engine_mb=int(os.getenv('OCR_ENGINE_MB', '500'))
+    ))
+    _progress_queue = progress_queue
+
+
+def _ingest_file(file_path, content_hash, resume_id=None):
+    """
+    在工作进程中处理一个文件
+
+    Args:
+        file_path: 文件路径
+        content_hash: 文件内容的SHA-256
+        resume_id: 内容相同的未完成报纸ID，提供时从该报纸未完成的页面继续处理
+
+    Returns:
+        (file_path, newspaper_id, 页数, 耗时秒数, 错误信息)
+    """
+    start = time.perf_counter()
+    pages_done = 0
+    # PDF开始处理时会先回调一次已完成页数，之后每完成一页回调一次；图片只在完成时回调一次
+    skip_first = Path(file_path).suffix.lower() == '.pdf'
+
+    def on_progress(page_number, total_pages, newspaper_id):
+        nonlocal pages_done, skip_first
+        if skip_first:
+            skip_first = False
+            return
+        pages_done += 1
+        _progress_queue.put(1)
+
+    try:
+        if resume_id is not None:
+            newspaper_id = _worker_handlers.for_newspaper(resume_id).resume_newspaper(
+                resume_id, progress_callback=on_progress
+            )
+        else:
+            newspaper_id = _worker_handlers.get().process_file(
+                file_path, progress_callback=on_progress, content_hash=content_hash
+            )
+        return file_path, newspaper_id, pages_done, time.perf_counter() - start, None
+    except Exception as e:
+        return file_path, None, pages_done, time.perf_counter() - start, str(e)
+
+
+def find_files(root):
+    """遍历目录树，返回所有支持导入的文件（按路径排序）"""
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if Path(filename).suffix.lower() in INGEST_EXTENSIONS:
+                files.append(str(Path(dirpath) / filename))
+    return sorted(files)
+
+
+def count_pages(file_path, poppler_path=None):
+    """统计文件页数，用于估算总工作量；无法读取时按1页计"""
+    if Path(file_path).suffix.lower() != '.pdf':
+        return 1
+    try:
+        from pdf2image import pdfinfo_from_path
+        return int(pdfinfo_from_path(file_path, poppler_path=poppler_path).get("Pages", 1))
+    except Exception:
+        return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量导入目录中的报纸PDF和图片")
+    parser.add_argument("directory", help="要导入的目录，递归遍历子目录")
+    parser.add_argument("--workers", type=int, default=1, help="并行处理的工作进程数（默认1）")
+    parser.add_argument("--report", help="把每个文件的处理结果写入该JSON文件")
+    args = parser.parse_args()
+
+    from database import init_db, find_newspaper_by_hash, find_unfinished_newspaper_by_hash
+    from file_utils import hash_file
+
+    init_db()
+    poppler_path = os.getenv('POPPLER_PATH')
+
+    files = find_files(args.directory)
+    print(f"找到{len(files)}个文件，检查是否已导入...")
+
+    # 按内容哈希跳过已导入的文件和本次已有相同内容的文件；未完成的报纸继续处理
+    todo = []
+    skipped = []
+    seen = {}
+    for file_path in tqdm(files, unit="文件", desc="检查"):
+        content_hash = hash_file(file_path)
+        if content_hash in seen:
+            skipped.append({"file": file_path, "duplicate_of": seen[content_hash]})
+            continue
+        seen[content_hash] = file_path
+        existing_id = find_newspaper_by_hash(content_hash)
+        if existing_id is not None:
+            skipped.append({"file": file_path, "newspaper_id": existing_id})
+        else:
+            resume_id = find_unfinished_newspaper_by_hash(content_hash)
+            todo.append((file_path, content_hash, resume_id, count_pages(file_path, poppler_path)))
+
+    total_pages = sum(pages for _, _, _, pages in todo)
+    resumed = sum(1 for _, _, resume_id, _ in todo if resume_id is not None)
+    print(f"待处理{len(todo)}个文件（共{total_pages}页，其中继续处理{resumed}个），"
+          f"已导入或重复跳过{len(skipped)}个，工作进程数: {args.workers}")
+
+    results = []
+    start = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    progress_queue = context.Queue()
+
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context,
+                             initializer=_init_worker, initargs=(progress_queue,)) as executor, \
+            tqdm(total=total_pages, unit="页", desc="处理", smoothing=0.05) as bar:
+        pending = {
+            executor.submit(_ingest_file, file_path, content_hash, resume_id)
+            for file_path, content_hash, resume_id, _ in todo
+        }
+        expected_pages = {file_path: pages for file_path, _, _, pages in todo}
+        resume_ids = {file_path: resume_id for file_path, _, resume_id, _ in todo}
+
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+
+            # 按页更新进度条
+            while True:
+                try:
+                    bar.update(progress_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for future in done:
+                file_path, newspaper_id, pages_done, elapsed, error = future.result()
+                # 失败的文件剩余页数不再处理、继续处理的文件已完成的页数不再处理，从总量中扣除以保持预计时间准确
+                if pages_done < expected_pages[file_path]:
+                    bar.total -= expected_pages[file_path] - pages_done
+                    bar.refresh()
+                if error:
+                    tqdm.write(f"失败: {file_path}: {error}")
+                results.append({
+                    "file": file_path,
+                    "newspaper_id": newspaper_id,
+                    "resumed": resume_ids[file_path] is not None,
+                    "pages": pages_done,
+                    "seconds": round(elapsed, 2),
+                    "error": error
+                })
+
+    elapsed = time.perf_counter() - start
+    failed = [r for r in results if r["error"]]
+    pages_done = sum(r["pages"] for r in results)
+
+    # 汇总报告
+    print()
+    print("=" * 60)
+    print(f"{'文件':<40} {'页数':>5} {'耗时(秒)':>9}")
+    for r in sorted(results, key=lambda r: -r["seconds"]):
+        status = "失败" if r["error"] else ""
+        print(f"{Path(r['file']).name[:40]:<40} {r['pages']:>5} {r['seconds']:>9.1f} {status}")
+    print("=" * 60)
+    print(f"处理{len(results)}个文件，成功{len(results) - len(failed)}个，失败{len(failed)}个，跳过{len(skipped)}个")
+    print(f"共{pages_done}页，总耗时{elapsed:.1f}秒，平均{pages_done / elapsed if elapsed else 0:.2f}页/秒")
+    for r in failed:
+        print(f"失败: {r['file']}: {r['error']}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({
+                "directory": args.directory,
+                "workers": args.workers,
+                "seconds": round(elapsed, 2),
+                "pages": pages_done,
+                "results": results,
+                "skipped": skipped
+            }, f, ensure_ascii=False, indent=2)
+        print(f"报告已写入: {args.report}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
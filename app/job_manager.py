@@ -0,0 +1,223 @@
+"""
+OCR后台任务管理模块
+
+上传接口只负责保存文件并提交任务，OCR处理在后台线程池中执行，
+任务状态（排队、处理中、第N/M页、完成、失败）保存在内存中，供任务查询接口使用。
+"""
+import os
+import uuid
+import logging
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Job_Manager")
+
+# 任务状态
+JOB_QUEUED = 'queued'      # 排队中
+JOB_RUNNING = 'running'    # 处理中
+JOB_DONE = 'done'          # 已完成
+JOB_FAILED = 'failed'      # 处理失败
+
+
+class JobActiveError(RuntimeError):
+    """报纸已有排队或处理中的任务，不能再提交断点续处理"""
+
+    def __init__(self, newspaper_id, job_id):
+        super().__init__(f"报纸 {newspaper_id} 正在处理中，任务ID: {job_id}")
+        self.newspaper_id = newspaper_id
+        self.job_id = job_id
+
+
+class OCRJob:
+    """OCR任务，记录一次文件处理的状态和进度"""
+
+    def __init__(self, file_path, newspaper_name=None, content_hash=None, resume_newspaper_id=None, ocr_handler=None):
+        self.id = uuid.uuid4().hex
+        self.file_path = str(file_path)
+        self.newspaper_name = newspaper_name
+        self.content_hash = content_hash
+        self.resume = resume_newspaper_id is not None  # 是否为断点续处理任务
+        self.ocr_handler = ocr_handler  # 处理该任务的OCR处理器，None表示使用任务管理器的默认处理器
+        self.status = JOB_QUEUED
+        self.current_page = 0
+        self.total_pages = None
+        self.newspaper_id = resume_newspaper_id
+        self.error = None
+        self.created_at = datetime.datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        """转换为JSON可序列化格式"""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "file_name": os.path.basename(self.file_path),
+            "newspaper_name": self.newspaper_name,
+            "content_hash": self.content_hash,
+            "resume": self.resume,
+            "text_type": self.ocr_handler.text_type if self.ocr_handler else None,
+            "text_direction": self.ocr_handler.text_direction if self.ocr_handler else None,
+            "current_page": self.current_page,
+            "total_pages": self.total_pages,
+            "newspaper_id": self.newspaper_id,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f"<OCRJob(id='{self.id}', status='{self.status}', page={self.current_page}/{self.total_pages})>"
+
+
+class JobManager:
+    """后台OCR任务管理器"""
+
+    def __init__(self, ocr_handler, max_workers=1, max_jobs=1000):
+        """
+        初始化任务管理器
+
+        Args:
+            ocr_handler: 默认的OCRHandler实例，提交任务时未指定处理器的任务共用
+            max_workers: 后台工作线程数。PaddleOCR实例不是线程安全的，共用一个处理器时应保持为1
+            max_jobs: 内存中保留的任务记录上限，超出后丢弃最早的已结束任务
+        """
+        self.ocr_handler = ocr_handler
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ocr-job")
+        logger.info(f"任务管理器初始化完成，工作线程数: {max_workers}")
+
+    def submit(self, file_path, newspaper_name=None, delete_on_failure=True, content_hash=None, ocr_handler=None):
+        """
+        提交OCR任务，立即返回任务ID
+
+        Args:
+            file_path: 已保存的上传文件路径
+            newspaper_name: 报纸名称，如果为None则从文件名推断
+            delete_on_failure: 处理失败且尚未创建报纸记录时是否删除上传的文件
+            content_hash: 上传时计算的文件SHA-256，为None时由处理器计算
+            ocr_handler: 处理该文件的OCRHandler（如繁体、竖排），None表示使用默认处理器
+
+        Returns:
+            job_id: 任务ID
+        """
+        job = OCRJob(file_path, newspaper_name, content_hash, ocr_handler=ocr_handler or self.ocr_handler)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, delete_on_failure)
+        logger.info(f"已提交OCR任务: {job.id}, 文件: {file_path}")
+        return job.id
+
+    def submit_resume(self, newspaper_id, file_path, ocr_handler=None):
+        """
+        提交断点续处理任务，从第一个未完成的页面继续处理报纸
+
+        Args:
+            newspaper_id: 报纸ID
+            file_path: 报纸的原始文件路径
+            ocr_handler: 处理该报纸的OCRHandler，None表示使用默认处理器
+
+        Returns:
+            job_id: 任务ID
+
+        Raises:
+            JobActiveError: 该报纸已有排队或处理中的任务。两个任务同时处理同一报纸会重复识别相同的页面
+        """
+        job = OCRJob(file_path, resume_newspaper_id=newspaper_id, ocr_handler=ocr_handler or self.ocr_handler)
+        with self._lock:
+            active = self._active_job(newspaper_id)
+            if active is not None:
+                raise JobActiveError(newspaper_id, active.id)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, False)
+        logger.info(f"已提交断点续处理任务: {job.id}, 报纸ID: {newspaper_id}")
+        return job.id
+
+    def get_job(self, job_id):
+        """获取任务状态，任务不存在时返回None。处理中的PDF任务附带流水线各阶段的队列深度"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            data = job.to_dict()
+        if job.status == JOB_RUNNING and job.newspaper_id is not None:
+            data["stages"] = job.ocr_handler.pipeline_stats(job.newspaper_id)
+        return data
+
+    def active_job_id(self, newspaper_id):
+        """报纸排队或处理中的任务ID，没有时返回None"""
+        with self._lock:
+            job = self._active_job(newspaper_id)
+            return job.id if job else None
+
+    def _active_job(self, newspaper_id):
+        """报纸排队或处理中的任务（需持有锁）。新上传文件的任务在创建报纸记录后才有报纸ID"""
+        for job in self._jobs.values():
+            if job.newspaper_id == newspaper_id and job.status in (JOB_QUEUED, JOB_RUNNING):
+                return job
+        return None
+
+    def list_jobs(self, limit=50):
+        """获取最近提交的任务列表（最新的在前）"""
+        with self._lock:
+            jobs = list(self._jobs.values())[-limit:]
+            return [job.to_dict() for job in reversed(jobs)]
+
+    def shutdown(self, wait=True):
+        """关闭后台线程池"""
+        self._executor.shutdown(wait=wait)
+
+    def _prune(self):
+        """丢弃超出上限的已结束任务（需持有锁）"""
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in list(self._jobs.keys()):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].status in (JOB_DONE, JOB_FAILED):
+                del self._jobs[job_id]
+
+    def _update(self, job, **fields):
+        """在锁内更新任务字段"""
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+
+    def _run(self, job, delete_on_failure):
+        """在后台线程中执行OCR处理"""
+        self._update(job, status=JOB_RUNNING, started_at=datetime.datetime.now())
+        logger.info(f"开始执行OCR任务: {job.id}")
+
+        def on_progress(page_number, total_pages, newspaper_id):
+            self._update(job, current_page=page_number, total_pages=total_pages, newspaper_id=newspaper_id)
+
+        try:
+            if job.resume:
+                newspaper_id = job.ocr_handler.resume_newspaper(job.newspaper_id, progress_callback=on_progress)
+            else:
+                newspaper_id = job.ocr_handler.process_file(
+                    job.file_path, job.newspaper_name, progress_callback=on_progress,
+                    content_hash=job.content_hash
+                )
+            self._update(job, status=JOB_DONE, newspaper_id=newspaper_id, finished_at=datetime.datetime.now())
+            logger.info(f"OCR任务完成: {job.id}, 报纸ID: {newspaper_id}")
+        except Exception as e:
+            logger.exception(f"OCR任务失败: {job.id}, 错误: {e}")
+            self._update(job, status=JOB_FAILED, error=str(e), finished_at=datetime.datetime.now())
+
+            # 删除上传的文件。已创建报纸记录时保留文件，已完成的页面可以断点续处理
+            if delete_on_failure and job.newspaper_id is None:
+                try:
+                    os.remove(job.file_path)
+                    logger.info(f"由于处理失败，删除了上传的文件: {job.file_path}")
+                except Exception as del_err:
+                    logger.error(f"删除失败的上传文件时出错: {del_err}")
@@ -7,11 +7,20 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 from flask import Flask, request, render_template, redirect, url_for, flash, jsonify, send_from_directory
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 import logging
 import datetime
-from database import init_db, get_newspapers, search_articles_by_content, search_articles_by_keyword
-from ocr_handler import OCRHandler
-from sqlalchemy.orm import joinedload
+from database import (
+    init_db, db_session, preview_column, PREVIEW_LENGTH, get_newspapers, get_newspaper_page, get_newspaper_counts, search_articles_by_content, search_articles_by_keyword,
+    find_newspaper_by_hash, get_newspaper
+)
+from ocr_handler import OCRHandlerSet, handler_options_from_env
+from engine_registry import EngineRegistry
+from job_manager import JobManager, JobActiveError
+from file_utils import save_stream_with_hash
+from image_pyramid import ensure_thumbnail, dzi_path
+from page_boxes import load_page_boxes
+from sqlalchemy.orm import joinedload, selectinload, undefer
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -40,13 +49,18 @@ UPLOAD_FOLDER.mkdir(exist_ok=True, parents=True)
 # 初始化数据库
 init_db()
 
-# 初始化OCR处理器
-use_gpu = os.getenv('USE_GPU', 'false').lower() == 'true'
-poppler_path = os.getenv('POPPLER_PATH')
+@app.teardown_appcontext
+def remove_db_session(exception=None):
+    """请求结束时归还数据库会话的连接"""
+    db_session.remove()
+
+# 初始化OCR处理器，参数从环境变量读取（见ocr_handler.handler_options_from_env）
+ocr_options = handler_options_from_env()
+use_gpu = ocr_options['use_gpu']
+poppler_path = ocr_options['poppler_path']
 
-# 确保Poppler路径使用正斜杠
+# 检查Poppler路径
 if poppler_path:
-    poppler_path = poppler_path.replace('\\', '/')
     logger.info(f"设置Poppler路径: {poppler_path}")
     # 检查路径是否存在
     if os.path.exists(poppler_path):
@@ -54,12 +68,71 @@ if poppler_path:
     else:
         logger.warning(f"Poppler路径不存在: {poppler_path}")
 
-ocr_handler = OCRHandler(use_gpu=use_gpu, poppler_path=poppler_path)
+# OCR引擎注册表：各文字类型的识别模型在首次使用时加载并由所有处理器共用，
+# 估算内存超出预算时卸载最久未使用的模型
+engine_registry = EngineRegistry(
+    memory_budget_mb=int(os.getenv('OCR_ENGINE_BUDGET_MB', '2048')),
+    engine_mb=int(os.getenv('OCR_ENGINE_MB', '500'))
+)
+
+# 上传时可选的文字类型和文字方向
+TEXT_TYPES = ('simplified', 'traditional')
+TEXT_DIRECTIONS = ('horizontal', 'vertical')
+
+# 每种文字类型和方向组合的OCR处理器，首次使用时创建
+ocr_handlers = OCRHandlerSet(ocr_options, engine_registry)
+
+def get_ocr_handler(text_type='simplified', text_direction='horizontal'):
+    """获取指定文字类型和方向的OCR处理器"""
+    return ocr_handlers.get(text_type, text_direction)
+
+def get_resume_handler(newspaper_id):
+    """获取与报纸已处理页面相同设置的OCR处理器"""
+    return ocr_handlers.for_newspaper(newspaper_id)
+
+ocr_handler = get_ocr_handler()
+
+# 初始化后台OCR任务管理器，上传请求只提交任务，不在请求线程中执行OCR
+ocr_workers = int(os.getenv('OCR_WORKERS', '1'))
+job_manager = JobManager(ocr_handler, max_workers=ocr_workers)
+
+# 处理后的页面图片目录，页面图片、缩略图和瓦片金字塔都在该目录下
+PROCESSED_FOLDER = Path("data/processed")
+
+# 页面图片、缩略图和瓦片的浏览器缓存时间（秒），生成后内容不再变化
+IMAGE_MAX_AGE = 7 * 24 * 3600
+
+@app.template_filter('processed_path')
+def processed_path(page_image_path):
+    """页面图片相对于处理后图片目录的路径，用于生成图片、缩略图和瓦片的URL"""
+    return Path(os.path.relpath(page_image_path, PROCESSED_FOLDER)).as_posix()
 
 def allowed_file(filename):
     """检查文件扩展名是否被允许"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def remove_duplicate_upload(save_path):
+    """删除与已处理文件内容相同的上传文件"""
+    try:
+        os.remove(save_path)
+        logger.info(f"文件内容与已处理的报纸相同，删除了重复上传的文件: {save_path}")
+    except Exception as del_err:
+        logger.error(f"删除重复上传的文件时出错: {del_err}")
+
+def describe_processing_error(error_msg):
+    """将处理错误转换为更友好的提示信息"""
+    if not error_msg:
+        return None
+    if "poppler" in error_msg.lower() or "pdftoppm" in error_msg.lower():
+        return f'PDF处理失败: 未安装Poppler或路径配置错误，请检查配置并参阅Poppler安装说明。错误: {error_msg}'
+    elif "找不到pdftoppm" in error_msg:
+        return 'PDF处理失败: 找不到pdftoppm工具，请确保Poppler正确安装并配置路径。'
+    elif "PDF处理失败" in error_msg:
+        return f'PDF处理失败: {error_msg}'
+    elif "不支持的文件类型" in error_msg:
+        return '文件类型错误: 系统内部文件类型检测失败，请确保上传了正确的PDF或图片文件。'
+    return f'处理文件时出错: {error_msg}'
+
 @app.route('/')
 def index():
     """首页"""
@@ -100,6 +173,15 @@ def upload_file():
         
         logger.info(f"文件上传: {file.filename}, 报纸名称: {newspaper_name}")
         
+        # 文字类型和方向决定使用的OCR引擎
+        text_type = request.form.get('text_type', 'simplified')
+        text_direction = request.form.get('text_direction', 'horizontal')
+        if text_type not in TEXT_TYPES or text_direction not in TEXT_DIRECTIONS:
+            logger.warning(f"不支持的识别设置: {text_type}, {text_direction}")
+            flash('不支持的文字类型或文字方向')
+            return redirect(request.url)
+        logger.info(f"文字类型: {text_type}, 文字方向: {text_direction}")
+        
         # 详细检查文件类型
         original_filename = file.filename
         file_ext = Path(original_filename).suffix.lower()
@@ -123,8 +205,8 @@ def upload_file():
         save_path = os.path.join(app.config['UPLOAD_FOLDER'], save_filename)
         
         try:
-            file.save(save_path)
-            logger.info(f"文件已保存: {save_path}")
+            content_hash, _ = save_stream_with_hash(file.stream, save_path)
+            logger.info(f"文件已保存: {save_path}, SHA-256: {content_hash}")
         except Exception as save_err:
             logger.exception(f"保存文件失败: {save_err}")
             flash('保存文件时出错')
@@ -159,118 +241,159 @@ def upload_file():
             except Exception as e:
                 logger.error(f"读取文件头失败: {e}")
         
-        # 启动处理任务
-        try:
-            logger.info(f"开始处理文件: {save_path}")
-            logger.info(f"文件扩展名: {file_ext}")
-            logger.info(f"OCR处理器配置: 使用GPU={use_gpu}, poppler_path={ocr_handler.poppler_path}")
-            
-            newspaper_id = ocr_handler.process_file(save_path, newspaper_name)
-            flash(f'文件上传成功并已处理，ID: {newspaper_id}')
-            logger.info(f"文件处理成功, 报纸ID: {newspaper_id}")
-            return redirect(url_for('view_newspaper', newspaper_id=newspaper_id))
+        # 相同内容的文件已处理过时，直接关联到已有报纸
+        existing_id = find_newspaper_by_hash(content_hash)
+        if existing_id is not None:
+            remove_duplicate_upload(save_path)
+            flash(f'该文件已处理过，已关联到现有报纸，ID: {existing_id}')
+            return redirect(url_for('view_newspaper', newspaper_id=existing_id))
         
-        except Exception as e:
-            logger.exception(f"处理文件出错: {e}")
-            error_msg = str(e)
-            
-            # 对于常见错误提供更友好的信息
-            if "poppler" in error_msg.lower() or "pdftoppm" in error_msg.lower():
-                flash(f'PDF处理失败: 未安装Poppler或路径配置错误，请检查配置并参阅Poppler安装说明。错误: {error_msg}')
-            elif "找不到pdftoppm" in error_msg:
-                flash(f'PDF处理失败: 找不到pdftoppm工具，请确保Poppler正确安装并配置路径。')
-            elif "PDF处理失败" in error_msg:
-                flash(f'PDF处理失败: {error_msg}')
-            elif "不支持的文件类型" in error_msg:
-                flash(f'文件类型错误: 系统内部文件类型检测失败，请确保上传了正确的PDF或图片文件。')
-            else:
-                flash(f'处理文件时出错: {error_msg}')
-            
-            # 删除上传的文件
-            try:
-                os.remove(save_path)
-                logger.info(f"由于处理失败，删除了上传的文件: {save_path}")
-            except Exception as del_err:
-                logger.error(f"删除失败的上传文件时出错: {del_err}")
-            
-            return redirect(request.url)
+        # 提交后台处理任务
+        logger.info(f"提交OCR任务: {save_path}")
+        logger.info(f"OCR处理器配置: 使用GPU={use_gpu}, poppler_path={ocr_handler.poppler_path}")
+        job_id = job_manager.submit(save_path, newspaper_name, content_hash=content_hash,
+                                    ocr_handler=get_ocr_handler(text_type, text_direction))
+        flash(f'文件上传成功，正在后台处理，任务ID: {job_id}')
+        return redirect(url_for('view_job', job_id=job_id))
     
     # GET请求展示上传表单
     return render_template('upload.html')
 
+# 报纸列表每页的最大条数
+MAX_PAGE_SIZE = 200
+
+def _newspaper_page_args():
+    """读取报纸列表的分页参数：limit和游标before/after（见get_newspaper_page）"""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), MAX_PAGE_SIZE)
+    return limit, request.args.get('before') or None, request.args.get('after') or None
+
 @app.route('/newspapers')
 def list_newspapers():
     """列出所有已上传的报纸"""
-    offset = request.args.get('offset', 0, type=int)
-    limit = request.args.get('limit', 50, type=int)
+    limit, before, after = _newspaper_page_args()
+    try:
+        newspapers, next_cursor, prev_cursor = get_newspaper_page(limit, before=before, after=after)
+    except ValueError:
+        return redirect(url_for('list_newspapers', limit=limit))
+    return render_template('newspapers.html', newspapers=newspapers, counts=get_newspaper_counts(),
+                           limit=limit, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+@app.route('/api/newspapers', methods=['GET'])
+def api_newspapers():
+    """API接口：按上传时间倒序分页列出报纸"""
+    limit, before, after = _newspaper_page_args()
+    try:
+        newspapers, next_cursor, prev_cursor = get_newspaper_page(limit, before=before, after=after)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    newspapers = get_newspapers(limit=limit, offset=offset)
-    return render_template('newspapers.html', newspapers=newspapers)
+    counts = get_newspaper_counts()
+    return jsonify({
+        "newspapers": [
+            {
+                "id": newspaper.id,
+                "name": newspaper.name,
+                "issue_date": newspaper.issue_date.isoformat() if newspaper.issue_date else None,
+                "issue_number": newspaper.issue_number,
+                "total_pages": newspaper.total_pages,
+                "ocr_status": newspaper.ocr_status,
+                "created_at": newspaper.created_at.isoformat() if newspaper.created_at else None
+            }
+            for newspaper in newspapers
+        ],
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "total": counts["total"],
+        "status_counts": {str(status): count for status, count in counts["by_status"].items()}
+    })
 
 @app.route('/newspaper/<int:newspaper_id>')
 def view_newspaper(newspaper_id):
     """查看特定报纸的详细信息"""
-    from database import get_session, Newspaper, NewspaperPage
-    from sqlalchemy.orm import joinedload
+    from database import Newspaper, NewspaperPage
+    
+    newspaper = db_session.query(Newspaper).filter_by(id=newspaper_id).first()
+    if not newspaper:
+        flash('报纸不存在')
+        return redirect(url_for('index'))
+    
+    # 页面列表只显示OCR文本的开头，在SQL中截取，不读入整页文本
+    pages = []
+    for page, preview in db_session.query(NewspaperPage, preview_column(NewspaperPage.ocr_text)).filter_by(
+        newspaper_id=newspaper_id
+    ).order_by(NewspaperPage.page_number):
+        page.preview = preview
+        pages.append(page)
+    
+    return render_template('newspaper_detail.html', newspaper=newspaper, pages=pages)
+
+@app.route('/newspaper/<int:newspaper_id>/resume', methods=['POST'])
+def resume_newspaper(newspaper_id):
+    """从第一个未完成的页面继续处理报纸"""
+    newspaper = get_newspaper(newspaper_id)
+    if not newspaper:
+        flash('报纸不存在')
+        return redirect(url_for('index'))
+    if newspaper.ocr_status == 1:
+        flash('该报纸已处理完成')
+        return redirect(url_for('view_newspaper', newspaper_id=newspaper_id))
     
-    session = get_session()
     try:
-        newspaper = session.query(Newspaper).filter_by(id=newspaper_id).first()
-        if not newspaper:
-            flash('报纸不存在')
-            return redirect(url_for('index'))
-        
-        pages = session.query(NewspaperPage).options(
-            joinedload(NewspaperPage.newspaper)
-        ).filter_by(newspaper_id=newspaper_id).order_by(NewspaperPage.page_number).all()
-        
-        return render_template('newspaper_detail.html', newspaper=newspaper, pages=pages)
-    finally:
-        session.close()
+        job_id = job_manager.submit_resume(newspaper_id, newspaper.file_path, get_resume_handler(newspaper_id))
+    except JobActiveError as e:
+        flash('该报纸正在处理中')
+        return redirect(url_for('view_job', job_id=e.job_id))
+    flash(f'已开始继续处理，任务ID: {job_id}')
+    return redirect(url_for('view_job', job_id=job_id))
 
 @app.route('/page/<int:page_id>')
 def view_page(page_id):
     """查看报纸页面详细信息"""
-    from database import get_session, NewspaperPage, Article
-    from sqlalchemy.orm import joinedload
+    from database import NewspaperPage, Article
     
-    session = get_session()
-    try:
-        page = session.query(NewspaperPage).options(
-            joinedload(NewspaperPage.newspaper)
-        ).filter_by(id=page_id).first()
-        
-        if not page:
-            flash('页面不存在')
-            return redirect(url_for('index'))
-        
-        articles = session.query(Article).options(
-            joinedload(Article.keywords)
-        ).filter_by(page_id=page_id).all()
-        
-        return render_template('page_detail.html', page=page, articles=articles)
-    finally:
-        session.close()
+    page = db_session.query(NewspaperPage).options(
+        joinedload(NewspaperPage.newspaper),
+        undefer(NewspaperPage.ocr_text)  # 页面详情显示整页文本
+    ).filter_by(id=page_id).first()
+    
+    if not page:
+        flash('页面不存在')
+        return redirect(url_for('index'))
+    
+    # 文章列表只显示内容开头，全文在文章详情中加载
+    articles = []
+    for article, preview in db_session.query(Article, preview_column(Article.content)).options(
+        selectinload(Article.keywords)
+    ).filter_by(page_id=page_id):
+        article.preview = preview
+        articles.append(article)
+    
+    # 已生成瓦片金字塔的页面使用缩放查看器，只加载可见区域的瓦片
+    image_file = processed_path(page.page_image_path)
+    dzi_url = None
+    if dzi_path(page.page_image_path).exists():
+        dzi_url = url_for('download_file', filename=Path(image_file).with_suffix('.dzi').as_posix())
+    
+    return render_template('page_detail.html', page=page, articles=articles,
+                           image_url=url_for('download_file', filename=image_file), dzi_url=dzi_url)
 
 @app.route('/article/<int:article_id>')
 def view_article(article_id):
     """查看文章详细信息"""
-    from database import get_session, Article, NewspaperPage
+    from database import Article, NewspaperPage
     
-    session = get_session()
-    try:
-        article = session.query(Article).options(
-            joinedload(Article.keywords),
-            joinedload(Article.page).joinedload(NewspaperPage.newspaper)
-        ).filter_by(id=article_id).first()
-        
-        if not article:
-            flash('文章不存在')
-            return redirect(url_for('index'))
-        
-        return render_template('article_detail.html', article=article)
-    finally:
-        session.close()
+    article = db_session.query(Article).options(
+        selectinload(Article.keywords),
+        # 文章内容可能是页面文本中的区间，一并加载页面文本
+        joinedload(Article.page).options(joinedload(NewspaperPage.newspaper), undefer(NewspaperPage.ocr_text)),
+        undefer(Article.content_data)
+    ).filter_by(id=article_id).first()
+    
+    if not article:
+        flash('文章不存在')
+        return redirect(url_for('index'))
+    
+    return render_template('article_detail.html', article=article)
 
 @app.route('/search', methods=['GET', 'POST'])
 def search():
@@ -298,7 +421,20 @@ def search():
 @app.route('/data/images/<path:filename>')
 def download_file(filename):
     """提供图片文件访问"""
-    return send_from_directory(Path("data/processed"), filename)
+    return send_from_directory(PROCESSED_FOLDER, filename, max_age=IMAGE_MAX_AGE)
+
+@app.route('/data/thumbnails/<path:filename>')
+def page_thumbnail(filename):
+    """提供页面缩略图，缩略图尚未生成时按需生成"""
+    image_path = safe_join(str(PROCESSED_FOLDER), filename)
+    if image_path is None or not os.path.isfile(image_path):
+        return jsonify({"error": "页面图片不存在"}), 404
+    try:
+        thumbnail = ensure_thumbnail(image_path)
+    except Exception as e:
+        logger.error(f"生成缩略图失败: {image_path}, 错误: {e}")
+        return send_from_directory(PROCESSED_FOLDER, filename, max_age=IMAGE_MAX_AGE)
+    return send_from_directory(PROCESSED_FOLDER, processed_path(thumbnail), max_age=IMAGE_MAX_AGE)
 
 @app.route('/api/search', methods=['GET'])
 def api_search():
@@ -321,7 +457,8 @@ def api_search():
         results.append({
             "id": article.id,
             "title": article.title,
-            "content": article.content[:200] + "..." if len(article.content) > 200 else article.content,
+            "content": article.preview[:PREVIEW_LENGTH] + "..." if len(article.preview) > PREVIEW_LENGTH else article.preview,
+            "snippet": article.snippet,
             "date": article.extracted_date.isoformat() if article.extracted_date else None
         })
     
@@ -338,30 +475,132 @@ def api_ocr():
     if file.filename == '':
         return jsonify({"error": "没有选择文件"}), 400
     
+    text_type = request.form.get('text_type', 'simplified')
+    text_direction = request.form.get('text_direction', 'horizontal')
+    if text_type not in TEXT_TYPES:
+        return jsonify({"error": f"不支持的文字类型，可选: {', '.join(TEXT_TYPES)}"}), 400
+    if text_direction not in TEXT_DIRECTIONS:
+        return jsonify({"error": f"不支持的文字方向，可选: {', '.join(TEXT_DIRECTIONS)}"}), 400
+    
     if file and allowed_file(file.filename):
         # 保存文件并处理
         filename = secure_filename(file.filename)
         timestamp = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
         save_filename = f"{timestamp}_{filename}"
         save_path = os.path.join(app.config['UPLOAD_FOLDER'], save_filename)
-        file.save(save_path)
+        content_hash, _ = save_stream_with_hash(file.stream, save_path)
         
-        try:
-            newspaper_id = ocr_handler.process_file(save_path)
+        # 相同内容的文件已处理过时，直接返回已有报纸
+        existing_id = find_newspaper_by_hash(content_hash)
+        if existing_id is not None:
+            remove_duplicate_upload(save_path)
             return jsonify({
                 "success": True,
-                "newspaper_id": newspaper_id,
-                "message": "文件处理成功"
+                "duplicate": True,
+                "newspaper_id": existing_id,
+                "message": "文件已处理过"
             })
-        except Exception as e:
-            logger.error(f"API处理文件出错: {e}")
-            return jsonify({
-                "success": False,
-                "error": str(e)
-            }), 500
+        
+        newspaper_name = request.form.get('newspaper_name', '').strip() or None
+        job_id = job_manager.submit(save_path, newspaper_name, content_hash=content_hash,
+                                    ocr_handler=get_ocr_handler(text_type, text_direction))
+        response = jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status_url": url_for('api_job_status', job_id=job_id),
+            "message": "文件已提交处理"
+        })
+        response.headers['Location'] = url_for('api_job_status', job_id=job_id)
+        return response, 202
     
     return jsonify({"error": "不支持的文件类型"}), 400
 
+@app.route('/api/newspapers/<int:newspaper_id>/resume', methods=['POST'])
+def api_resume_newspaper(newspaper_id):
+    """API接口：从第一个未完成的页面继续处理报纸"""
+    newspaper = get_newspaper(newspaper_id)
+    if not newspaper:
+        return jsonify({"error": "报纸不存在"}), 404
+    if newspaper.ocr_status == 1:
+        return jsonify({"success": True, "newspaper_id": newspaper_id, "message": "报纸已处理完成"})
+    
+    try:
+        job_id = job_manager.submit_resume(newspaper_id, newspaper.file_path, get_resume_handler(newspaper_id))
+    except JobActiveError as e:
+        return jsonify({
+            "error": "报纸正在处理中",
+            "job_id": e.job_id,
+            "status_url": url_for('api_job_status', job_id=e.job_id)
+        }), 409
+    response = jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status_url": url_for('api_job_status', job_id=job_id),
+        "message": "已提交继续处理"
+    })
+    response.headers['Location'] = url_for('api_job_status', job_id=job_id)
+    return response, 202
+
+@app.route('/job/<job_id>')
+def view_job(job_id):
+    """查看OCR任务处理进度"""
+    job = job_manager.get_job(job_id)
+    if not job:
+        flash('任务不存在')
+        return redirect(url_for('index'))
+    error_message = describe_processing_error(job['error'])
+    return render_template('job_status.html', job=job, error_message=error_message)
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """API接口：查询OCR任务状态"""
+    job = job_manager.get_job(job_id)
+    if not job:
+        return jsonify({"error": "任务不存在"}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs', methods=['GET'])
+def api_jobs():
+    """API接口：列出最近的OCR任务"""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({"jobs": job_manager.list_jobs(limit=limit)})
+
+@app.route('/api/pages/<int:page_id>/boxes')
+def api_page_boxes(page_id):
+    """API接口：页面的OCR文本框（页面图片像素坐标），提供q参数时只返回文字包含q的行，用于检索高亮"""
+    from database import NewspaperPage
+    
+    page = db_session.query(NewspaperPage).filter_by(id=page_id).first()
+    if page is None:
+        return jsonify({"error": "页面不存在"}), 404
+    page_boxes = load_page_boxes(page.page_image_path)
+    if page_boxes is None:
+        return jsonify({"error": "该页面没有保存文本框"}), 404
+    
+    query = request.args.get('q', '')
+    indices = page_boxes.find(query) if query else range(len(page_boxes))
+    return jsonify({
+        "page_id": page_id,
+        "page_width": page_boxes.page_width,
+        "page_height": page_boxes.page_height,
+        "lines": [
+            {
+                "box": page_boxes.boxes[index].tolist(),
+                "text": page_boxes.text(index),
+                "confidence": round(float(page_boxes.confidences[index]), 3)
+            }
+            for index in indices
+        ]
+    })
+
+@app.route('/api/engines')
+def api_engines():
+    """API接口：列出已加载的OCR引擎（最久未使用的在前）"""
+    return jsonify({
+        "engines": engine_registry.loaded(),
+        "max_engines": engine_registry.max_engines
+    })
+
 if __name__ == '__main__':
     # 启动Web服务器
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+数据库结构迁移模块
+
+每个迁移有一个递增的版本号，数据库当前版本保存在SQLite的user_version中。
+init_db()先用create_all创建缺失的表（新数据库直接得到最新结构），再依次执行版本号高于当前版本的迁移，
+每个迁移在单独的事务中执行并更新版本号。迁移都是幂等的，新数据库上执行时不做任何改动。
+
+修改模型（database.py）时，在末尾追加新的迁移，不要修改已发布的迁移。
+
+查看或执行迁移（--vacuum在迁移后整理数据库文件，回收删除和压缩数据释放的空间）：
+    python app/migrations.py [--vacuum]
+"""
+import sys
+import logging
+
+from search_index import create_index, index_available, rebuild_index
+from text_storage import compress_text, inflate, text_span
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Migrations")
+
+# (版本号, 说明, 迁移函数)，按版本号排序
+MIGRATIONS = []
+
+
+def migration(version, description):
+    """注册迁移函数，函数接收数据库连接"""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return register
+
+
+def _columns(connection, table):
+    return {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({table})")}
+
+
+def _add_column(connection, table, column, definition):
+    if column not in _columns(connection, table):
+        logger.info(f"添加{table}.{column}列")
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+@migration(1, "添加文字方向、文字类型、识别方向和内容哈希列")
+def _add_page_settings_columns(connection):
+    _add_column(connection, "newspaper_page", "text_direction", "VARCHAR(20) DEFAULT 'horizontal'")
+    _add_column(connection, "newspaper_page", "text_type", "VARCHAR(20) DEFAULT 'simplified'")
+    _add_column(connection, "newspaper_page", "orientation", "VARCHAR(20)")
+    _add_column(connection, "newspaper", "content_hash", "VARCHAR(64)")
+    connection.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_newspaper_content_hash ON newspaper (content_hash)")
+
+
+@migration(2, "添加外键、排序和筛选列的索引，文章关键词关联去重")
+def _add_indexes(connection):
+    # 旧版本可能重复写入同一关联，先去重再建唯一索引
+    removed = connection.exec_driver_sql(
+        "DELETE FROM article_keyword WHERE rowid NOT IN "
+        "(SELECT MIN(rowid) FROM article_keyword GROUP BY article_id, keyword_id)"
+    ).rowcount
+    if removed:
+        logger.info(f"删除{removed}条重复的文章关键词关联")
+    for statement in (
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_article_keyword ON article_keyword (article_id, keyword_id)",
+        "CREATE INDEX IF NOT EXISTS ix_article_keyword_keyword_id ON article_keyword (keyword_id, article_id)",
+        "CREATE INDEX IF NOT EXISTS ix_article_page_id ON article (page_id)",
+        "CREATE INDEX IF NOT EXISTS ix_article_extracted_date ON article (extracted_date)",
+        "CREATE INDEX IF NOT EXISTS ix_newspaper_page_newspaper_id_page_number "
+        "ON newspaper_page (newspaper_id, page_number)",
+        "CREATE INDEX IF NOT EXISTS ix_newspaper_created_at ON newspaper (created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_newspaper_ocr_status ON newspaper (ocr_status)",
+        # 按哈希查找已处理的报纸同时筛选ocr_status，单列索引时SQLite可能选用区分度很低的ocr_status索引
+        "DROP INDEX IF EXISTS ix_newspaper_content_hash",
+        "CREATE INDEX IF NOT EXISTS ix_newspaper_content_hash_ocr_status ON newspaper (content_hash, ocr_status)",
+    ):
+        connection.exec_driver_sql(statement)
+
+
+@migration(3, "创建文章全文索引")
+def _add_search_index(connection):
+    create_index(connection)
+
+
+@migration(4, "按处理状态统计报纸数量，由触发器增量维护")
+def _add_status_counts(connection):
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS newspaper_status_count "
+        "(ocr_status INTEGER PRIMARY KEY, count INTEGER NOT NULL DEFAULT 0)"
+    )
+    # 旧数据库中ocr_status可能为空，与未处理(0)一起统计
+    increment = (
+        "INSERT INTO newspaper_status_count (ocr_status, count) VALUES (IFNULL(NEW.ocr_status, 0), 1) "
+        "ON CONFLICT (ocr_status) DO UPDATE SET count = count + 1;"
+    )
+    decrement = "UPDATE newspaper_status_count SET count = count - 1 WHERE ocr_status = IFNULL(OLD.ocr_status, 0);"
+    for statement in (
+        f"CREATE TRIGGER IF NOT EXISTS newspaper_status_count_insert AFTER INSERT ON newspaper "
+        f"BEGIN {increment} END",
+        f"CREATE TRIGGER IF NOT EXISTS newspaper_status_count_delete AFTER DELETE ON newspaper "
+        f"BEGIN {decrement} END",
+        f"CREATE TRIGGER IF NOT EXISTS newspaper_status_count_update AFTER UPDATE OF ocr_status ON newspaper "
+        f"WHEN IFNULL(OLD.ocr_status, 0) != IFNULL(NEW.ocr_status, 0) BEGIN {decrement} {increment} END",
+    ):
+        connection.exec_driver_sql(statement)
+    # 触发器和初始统计在同一事务中，期间其他写入者等待，统计不会漏记
+    connection.exec_driver_sql("DELETE FROM newspaper_status_count")
+    connection.exec_driver_sql(
+        "INSERT INTO newspaper_status_count (ocr_status, count) "
+        "SELECT IFNULL(ocr_status, 0), COUNT(*) FROM newspaper GROUP BY IFNULL(ocr_status, 0)"
+    )
+
+
+# 压缩迁移每批处理的页面数
+_COMPRESS_CHUNK = 500
+
+
+@migration(5, "压缩存储OCR文本，文章内容改为引用页面文本的区间")
+def _compress_text(connection):
+    _add_column(connection, "article", "content_start", "INTEGER")
+    _add_column(connection, "article", "content_end", "INTEGER")
+
+    last_id = 0
+    pages = 0
+    while True:
+        rows = connection.exec_driver_sql(
+            "SELECT id, ocr_text FROM newspaper_page WHERE id > ? ORDER BY id LIMIT ?", (last_id, _COMPRESS_CHUNK)
+        ).all()
+        if not rows:
+            break
+        for page_id, stored in rows:
+            page_text = inflate(stored)
+            if isinstance(stored, str):
+                connection.exec_driver_sql(
+                    "UPDATE newspaper_page SET ocr_text = ? WHERE id = ?", (compress_text(page_text), page_id)
+                )
+            articles = connection.exec_driver_sql(
+                "SELECT id, content FROM article WHERE page_id = ? AND typeof(content) = 'text'", (page_id,)
+            ).all()
+            for article_id, content in articles:
+                span = text_span(page_text, content)
+                if span:
+                    connection.exec_driver_sql(
+                        "UPDATE article SET content = NULL, content_start = ?, content_end = ? WHERE id = ?",
+                        (span[0], span[1], article_id)
+                    )
+                else:
+                    connection.exec_driver_sql(
+                        "UPDATE article SET content = ? WHERE id = ?", (compress_text(content), article_id)
+                    )
+        last_id = rows[-1][0]
+        pages += len(rows)
+        logger.info(f"已压缩{pages}页OCR文本")
+
+    # 页面已被删除的文章
+    for article_id, content in connection.exec_driver_sql(
+        "SELECT id, content FROM article WHERE typeof(content) = 'text'"
+    ).all():
+        connection.exec_driver_sql("UPDATE article SET content = ? WHERE id = ?", (compress_text(content), article_id))
+
+
+@migration(6, "同一报纸的页码唯一，删除重复写入的页面")
+def _unique_page_numbers(connection):
+    # 同一报纸同时运行两个处理任务时可能重复写入同一页，保留最早写入的页面
+    duplicates = (
+        "SELECT id FROM newspaper_page WHERE id NOT IN "
+        "(SELECT MIN(id) FROM newspaper_page GROUP BY newspaper_id, page_number)"
+    )
+    connection.exec_driver_sql(
+        f"DELETE FROM article_keyword WHERE article_id IN (SELECT id FROM article WHERE page_id IN ({duplicates}))"
+    )
+    connection.exec_driver_sql(f"DELETE FROM article WHERE page_id IN ({duplicates})")
+    removed = connection.exec_driver_sql(f"DELETE FROM newspaper_page WHERE id IN ({duplicates})").rowcount
+    if removed:
+        logger.info(f"删除{removed}个重复的页面")
+        # 无内容全文索引不能按文章ID删除，重建索引去掉已删除的文章
+        if index_available(connection):
+            rebuild_index(connection)
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_newspaper_page_newspaper_id_page_number")
+    connection.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_newspaper_page_newspaper_id_page_number "
+        "ON newspaper_page (newspaper_id, page_number)"
+    )
+
+
+def schema_version(connection):
+    """数据库当前的结构版本"""
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def latest_version():
+    """最新的结构版本"""
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+
+def migrate(engine):
+    """
+    执行所有未执行的迁移
+
+    Args:
+        engine: 数据库引擎，SQLite引擎需已用database.register_sqlite_functions注册自定义函数
+
+    Returns:
+        迁移后的结构版本，非SQLite数据库返回None（只使用create_all创建的结构）
+    """
+    if engine.dialect.name != "sqlite":
+        logger.warning(f"数据库迁移只支持SQLite，跳过: {engine.dialect.name}")
+        return None
+
+    with engine.connect() as connection:
+        version = schema_version(connection)
+    for target, description, func in MIGRATIONS:
+        if target <= version:
+            continue
+        logger.info(f"数据库迁移到版本{target}: {description}")
+        with engine.begin() as connection:
+            func(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {int(target)}")
+        version = target
+    return version
+
+
+if __name__ == "__main__":
+    from database import engine, init_db
+
+    with engine.connect() as connection:
+        before = schema_version(connection)
+    print(f"当前结构版本: {before}，最新版本: {latest_version()}")
+    for target, description, _ in MIGRATIONS:
+        print(f"  {'已执行' if target <= before else '待执行'} {target}: {description}")
+    init_db()
+    with engine.connect() as connection:
+        print(f"迁移完成，结构版本: {schema_version(connection)}")
+        if "--vacuum" in sys.argv:
+            # 压缩文本等迁移释放的空间只有VACUUM后才会从数据库文件中回收
+            print("整理数据库文件...")
+            connection.exec_driver_sql("VACUUM")
@@ -0,0 +1,119 @@
+"""
+OCR结果缓存模块
+
+以页面像素哈希和OCR配置为键，把原始OCR结果（文本框、文字、置信度）保存在磁盘上。
+重复处理相同的扫描件时直接读取缓存，跳过OCR。缓存总大小超过上限时按最近最少使用淘汰。
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("OCR_Cache")
+
+
+def image_cache_key(image, config):
+    """
+    计算页面图像的缓存键
+
+    Args:
+        image: numpy图像数组
+        config: 影响OCR结果的配置（字典），如语言、角度分类、检测阈值、文字方向
+
+    Returns:
+        十六进制字符串
+    """
+    sha256 = hashlib.sha256()
+    sha256.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+    sha256.update(f"{image.shape}|{image.dtype}".encode('utf-8'))
+    sha256.update(np.ascontiguousarray(image))
+    return sha256.hexdigest()
+
+
+class OCRResultCache:
+    """磁盘OCR结果缓存，多进程共享同一目录"""
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 * 1024 * 1024):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = sum(path.stat().st_size for path in self.cache_dir.glob("*/*.json"))
+        logger.info(f"OCR结果缓存: {self.cache_dir}, 当前大小: {self._total_bytes} 字节, 上限: {max_bytes} 字节")
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """读取缓存的OCR结果，未命中时返回None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        # 更新访问时间，用于LRU淘汰
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, ocr_result):
+        """写入OCR结果"""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        data = json.dumps(ocr_result, ensure_ascii=False).encode('utf-8')
+
+        # 先写临时文件再替换，避免其他进程读到写了一半的文件
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+
+        with self._lock:
+            # 覆盖已有的键时减去被替换文件的大小，否则统计的总大小只增不减，会过早淘汰有效缓存
+            try:
+                old_size = path.stat().st_size
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """按最近访问时间淘汰缓存，直到总大小降到上限的90%（需持有锁）"""
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        self._total_bytes = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        removed = 0
+        for _, size, path in sorted(entries):
+            if self._total_bytes <= target:
+                break
+            try:
+                path.unlink()
+                self._total_bytes -= size
+                removed += 1
+            except FileNotFoundError:
+                continue
+        logger.info(f"OCR结果缓存淘汰了{removed}条记录，当前大小: {self._total_bytes} 字节")
@@ -4,17 +4,35 @@ import numpy as np
 import logging
 from pathlib import Path
 import uuid
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from paddleocr import PaddleOCR
-from pdf2image import convert_from_path
+from engine_registry import load_engine
+from batch_recognizer import BatchRecognizer, crop_text_box, sort_boxes, recognize_crops, classify_crops
+from ocr_cache import OCRResultCache, image_cache_key
+from tiled_ocr import ocr_tiled
+from reocr import reocr_weak_lines
+from preprocess import Preprocessor, ENHANCE_PIPELINE
+from image_pyramid import build_pyramid
+from page_pipeline import PipelineStage, StagedPipeline
+from page_boxes import boxes_path, write_page_boxes
+from region_raster import (
+    FULL_PAGE_RATIO, find_text_regions, render_pdf_region,
+    scale_region, offset_ocr_result
+)
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
 import re
 import jieba
 import jieba.analyse
 from database import (
-    add_newspaper, add_newspaper_page, 
-    update_newspaper_ocr_status, 
-    get_session, Article, Keyword
+    add_newspaper, save_newspaper_pages,
+    update_newspaper_ocr_status, find_newspaper_by_hash,
+    get_newspaper, prepare_newspaper_resume, get_newspaper_text_settings
 )
+from file_utils import hash_file
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
@@ -29,10 +47,72 @@ PROCESSED_DIR = DATA_DIR / "processed"
 RAW_DIR.mkdir(exist_ok=True, parents=True)
 PROCESSED_DIR.mkdir(exist_ok=True, parents=True)
 
+# 页面识别方向
+ORIENTATION_ORIGINAL = 'original'                  # 原始图像
+ORIENTATION_CLOCKWISE = 'clockwise'                # 顺时针旋转90度
+ORIENTATION_COUNTERCLOCKWISE = 'counterclockwise'  # 逆时针旋转90度
+ORIENTATION_ENHANCED = 'enhanced'                  # 图像增强后识别
+
+# 竖排页面方向预判：低分辨率图像的最长边，以及送入角度分类器的文本框数量
+ORIENTATION_MAX_SIDE = 960
+ORIENTATION_SAMPLE_SIZE = 8
+
+def handler_options_from_env():
+    """
+    从环境变量读取OCRHandler的参数，Web应用和命令行工具共用
+    
+    Returns:
+        可直接传给OCRHandler的参数字典
+    """
+    # 确保Poppler路径使用正斜杠
+    poppler_path = os.getenv('POPPLER_PATH')
+    if poppler_path:
+        poppler_path = poppler_path.replace('\\', '/')
+    
+    # OCR结果缓存目录和大小上限，OCR_CACHE_MAX_MB为0时不启用缓存
+    cache_max_mb = int(os.getenv('OCR_CACHE_MAX_MB', '2048'))
+    
+    return {
+        "use_gpu": os.getenv('USE_GPU', 'false').lower() == 'true',
+        "poppler_path": poppler_path,
+        # PDF每批渲染的页数，决定处理PDF时的峰值内存
+        "raster_window": int(os.getenv('PDF_RASTER_WINDOW', '1')),
+        # 并行识别PDF页面的工作进程数，0表示逐页识别
+        "ocr_processes": int(os.getenv('OCR_PROCESSES', '0')),
+        # 跨页批量识别：每批汇总的页数（0表示逐页识别）和识别模型的批大小
+        "rec_batch_pages": int(os.getenv('OCR_BATCH_PAGES', '0')),
+        "rec_batch_num": int(os.getenv('OCR_REC_BATCH', '6')),
+        "cache_dir": os.getenv('OCR_CACHE_DIR', 'data/cache/ocr') if cache_max_mb > 0 else None,
+        "cache_max_bytes": cache_max_mb * 1024 * 1024,
+        # 分块识别：分块边长（0表示整页识别）和相邻分块的重叠像素数
+        "tile_size": int(os.getenv('OCR_TILE_SIZE', '0')),
+        "tile_overlap": int(os.getenv('OCR_TILE_OVERLAP', '200')),
+        # 两遍分辨率模式：先以该DPI检测文字区域，只对文字区域高分辨率识别（0表示不启用）
+        "preview_dpi": int(os.getenv('PDF_PREVIEW_DPI', '0')),
+        # 识别前的预处理算子，逗号分隔，如"grayscale,clahe"（空表示不做预处理）
+        "preprocess": os.getenv('OCR_PREPROCESS', ''),
+        # 生成页面缩略图和瓦片金字塔的后台线程数，0表示不生成
+        "pyramid_workers": int(os.getenv('PAGE_PYRAMID_WORKERS', '1')),
+        # 页面处理流水线：阶段间队列容量，以及保存和分析阶段的线程数
+        "pipeline_queue_size": int(os.getenv('PIPELINE_QUEUE_SIZE', '2')),
+        "save_workers": int(os.getenv('PIPELINE_SAVE_WORKERS', '2')),
+        "analyze_workers": int(os.getenv('PIPELINE_ANALYZE_WORKERS', '1')),
+        # 二次识别：置信度低于该值的文本行重新识别（0表示不启用），以及每页最多二次识别的行数
+        "reocr_threshold": float(os.getenv('OCR_REOCR_THRESHOLD', '0')),
+        "reocr_max_lines": int(os.getenv('OCR_REOCR_MAX_LINES', '20')),
+        # PDF每完成多少页写入一次数据库
+        "save_batch_pages": int(os.getenv('PAGE_SAVE_BATCH', '10'))
+    }
+
 class OCRHandler:
     """OCR处理类，负责从报纸图片/PDF中提取文字"""
     
-    def __init__(self, use_gpu=False, poppler_path=None, text_direction='horizontal', text_type='simplified'):
+    def __init__(self, use_gpu=False, poppler_path=None, text_direction='horizontal', text_type='simplified',
+                 raster_dpi=300, raster_window=1, ocr_processes=0, rec_batch_pages=0, rec_batch_num=6,
+                 cache_dir=None, cache_max_bytes=2 * 1024 * 1024 * 1024, tile_size=0, tile_overlap=200,
+                 preview_dpi=0, engine_registry=None, preprocess='', pyramid_workers=1,
+                 pipeline_queue_size=2, save_workers=2, analyze_workers=1, reocr_threshold=0, reocr_max_lines=20,
+                 save_batch_pages=10):
         """
         初始化OCR处理器
         
@@ -41,6 +121,27 @@ class OCRHandler:
             poppler_path: Poppler的路径，主要用于Windows系统
             text_direction: 文字方向，horizontal(横排)或vertical(竖排)
             text_type: 文字类型，simplified(简体中文)或traditional(繁体中文)
+            raster_dpi: PDF页面渲染分辨率
+            raster_window: PDF每批渲染的页数，决定处理PDF时的峰值内存
+            ocr_processes: 并行识别PDF页面的工作进程数，0表示在当前进程中逐页识别
+            rec_batch_pages: 跨页批量识别时每批汇总的页数，0或1表示逐页完整识别
+            rec_batch_num: 识别模型每批处理的文本行数
+            cache_dir: OCR结果缓存目录，None表示不启用缓存
+            cache_max_bytes: OCR结果缓存的总大小上限（字节）
+            tile_size: 分块识别的分块边长，0表示整页识别；页面小于分块时仍整页识别
+            tile_overlap: 相邻分块的重叠像素数
+            preview_dpi: 两遍分辨率模式的低分辨率DPI，0表示不启用。启用后PDF先以该DPI渲染并检测文字区域，
+                只识别以raster_dpi渲染的页面中的文字区域，保存的页面图片仍为raster_dpi。仅用于横排文字
+            engine_registry: EngineRegistry，提供时从注册表获取共享的OCR引擎，None表示由本处理器自行创建
+            preprocess: 识别前对每页运行的预处理算子，逗号分隔（见preprocess.OPERATORS），空字符串表示不做预处理
+            pyramid_workers: 生成页面缩略图和瓦片金字塔的后台线程数，0表示不生成
+            pipeline_queue_size: PDF页面处理流水线各阶段之间的队列容量，决定在途页面数
+            save_workers: 流水线中保存页面图片（JPEG编码）的线程数
+            analyze_workers: 流水线中分析页面文本（分词、提取关键词）的线程数
+            reocr_threshold: 置信度低于该值的文本行用外扩、增强和反向旋转的裁剪图像二次识别，0表示不启用。
+                跨页批量识别模式下不进行二次识别
+            reocr_max_lines: 每页最多二次识别的行数
+            save_batch_pages: PDF每完成多少页写入一次数据库（每批一个事务），进程中途被终止时最多损失一批
         """
         # 确定OCR语言选项
         lang = "ch"
@@ -56,33 +157,127 @@ class OCRHandler:
         self.text_type = text_type
         logger.info(f"文字方向设置为: {text_direction}, 文字类型: {text_type}")
         
-        # 初始化OCR引擎，针对中文报纸进行优化
-        self.ocr = PaddleOCR(
-            use_gpu=use_gpu,
-            lang=lang,  # 语言模型
-            use_angle_cls=True,  # 使用角度分类器
-            show_log=False,
-            det_db_box_thresh=0.5,  # 检测框阈值
-            rec_model_dir=None,  # 使用默认模型
-            det_model_dir=None,
-            cls_model_dir=None  # 角度分类器模型
-        )
+        # OCR引擎在首次使用时创建（见ocr属性），进程池工作进程导入本模块时不会额外加载模型
+        self.use_gpu = use_gpu
+        self.lang = lang
+        # 影响识别结果的引擎参数，同时作为OCR结果缓存键的一部分
+        self.ocr_config = {
+            "lang": lang,  # 语言模型
+            "use_angle_cls": True,  # 使用角度分类器
+            "det_db_box_thresh": 0.5  # 检测框阈值
+        }
+        self.rec_batch_num = max(1, int(rec_batch_num))
+        self.engine_registry = engine_registry
+        self._ocr = None
+        self._ocr_lock = threading.Lock()
+        self._inference_lock = threading.Lock()
+        
+        # 跨页批量识别：逐页检测，多页文本行汇总后统一识别
+        self.rec_batch_pages = max(0, int(rec_batch_pages))
+        
+        # 两遍分辨率模式的低分辨率DPI
+        self.preview_dpi = max(0, int(preview_dpi))
+        
+        # 低置信度文本行二次识别参数
+        self.reocr_threshold = max(0.0, float(reocr_threshold))
+        self.reocr_max_lines = max(0, int(reocr_max_lines))
+        
+        # 分块识别参数
+        self.tile_size = max(0, int(tile_size))
+        self.tile_overlap = max(0, int(tile_overlap))
+        
+        # 识别前的预处理，以及竖排页面检测不到文字时使用的增强
+        self.preprocessor = Preprocessor(preprocess)
+        self.enhancer = Preprocessor(ENHANCE_PIPELINE)
+        
+        # OCR结果缓存，以页面像素哈希和引擎配置为键
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.ocr_cache = OCRResultCache(cache_dir, cache_max_bytes) if cache_dir else None
+        
+        # 并行识别进程池，在首次处理PDF时创建
+        self.ocr_processes = max(0, int(ocr_processes))
+        self._ocr_pool = None
+        self._pool_lock = threading.Lock()
+        
+        # 页面缩略图和瓦片金字塔在后台线程中生成，与后续页面的识别同时进行
+        self.pyramid_workers = max(0, int(pyramid_workers))
+        self._pyramid_executor = None
+        self._pyramid_lock = threading.Lock()
+        
+        # PDF页面处理流水线参数，以及正在运行的流水线（报纸ID -> StagedPipeline）
+        self.pipeline_queue_size = max(1, int(pipeline_queue_size))
+        self.save_workers = max(1, int(save_workers))
+        self.analyze_workers = max(1, int(analyze_workers))
+        self._pipelines = {}
+        self.save_batch_pages = max(1, int(save_batch_pages))
         
         # 保存Poppler路径
         self.poppler_path = poppler_path
         
+        # PDF渲染参数
+        self.raster_dpi = raster_dpi
+        self.raster_window = max(1, int(raster_window))
+        
         # 加载结巴分词词典（可以添加古文/民国时期常用词汇）
         # jieba.load_userdict("path/to/dict.txt")
         
         logger.info(f"OCR引擎初始化完成，文字方向: {text_direction}，文字类型: {text_type}")
     
-    def process_file(self, file_path, newspaper_name=None):
+    @property
+    def ocr(self):
+        """PaddleOCR引擎，首次访问时创建；使用引擎注册表时每次从注册表获取"""
+        if self.engine_registry is not None:
+            return self.engine_registry.get(self.use_gpu, self.rec_batch_num, self.ocr_config)
+        if self._ocr is None:
+            with self._ocr_lock:
+                if self._ocr is None:
+                    self._ocr = load_engine(self.use_gpu, self.rec_batch_num, self.ocr_config)
+        return self._ocr
+    
+    @property
+    def inference_lock(self):
+        """
+        OCR引擎的推理锁，PaddleOCR实例不是线程安全的，调用引擎推理期间持有
+        
+        使用引擎注册表时为注册表中该引擎的锁，与共用同一引擎的其他处理器互斥
+        """
+        if self.engine_registry is not None:
+            return self.engine_registry.inference_lock(self.use_gpu, self.rec_batch_num, self.ocr_config)
+        return self._inference_lock
+    
+    @property
+    def ocr_pool(self):
+        """并行识别进程池，未启用并行模式时为None"""
+        if self.ocr_processes and self._ocr_pool is None:
+            with self._pool_lock:
+                if self._ocr_pool is None:
+                    from ocr_pool import OCRWorkerPool
+                    self._ocr_pool = OCRWorkerPool(self.ocr_processes, {
+                        "use_gpu": self.use_gpu,
+                        "text_direction": self.text_direction,
+                        "text_type": self.text_type,
+                        "cache_dir": self.cache_dir,
+                        "cache_max_bytes": self.cache_max_bytes,
+                        "tile_size": self.tile_size,
+                        "tile_overlap": self.tile_overlap,
+                        "preprocess": self.preprocessor.spec,
+                        "reocr_threshold": self.reocr_threshold,
+                        "reocr_max_lines": self.reocr_max_lines
+                    })
+        return self._ocr_pool
+    
+    def process_file(self, file_path, newspaper_name=None, progress_callback=None, content_hash=None):
         """
         处理文件（图片或PDF）
         
+        内容哈希与已处理的报纸相同时，不再重复OCR，直接返回已有报纸的ID
+        
         Args:
             file_path: 文件路径
             newspaper_name: 报纸名称，如果为None则从文件名推断
+            progress_callback: 进度回调，每处理完一页调用一次，参数为(page_number, total_pages, newspaper_id)
+            content_hash: 文件内容的SHA-256，为None时读取文件计算
             
         Returns:
             newspaper_id: 数据库中的报纸ID
@@ -96,6 +291,14 @@ class OCRHandler:
         if newspaper_name is None:
             newspaper_name = file_path.stem
         
+        # 检查是否已处理过相同内容的文件
+        if content_hash is None:
+            content_hash = hash_file(file_path)
+        existing_id = find_newspaper_by_hash(content_hash)
+        if existing_id is not None:
+            logger.info(f"文件内容与已处理的报纸相同，跳过OCR: {file_path}, 报纸ID: {existing_id}")
+            return existing_id
+        
         # 确定文件类型
         file_ext = file_path.suffix.lower()
         logger.info(f"处理文件: {file_path}, 文件扩展名: {file_ext}")
@@ -131,7 +334,7 @@ class OCRHandler:
                 logger.warning(f"文件头未确认是PDF文件，但仍按PDF处理")
             
             try:
-                return self._process_pdf(file_path, newspaper_name)
+                return self._process_pdf(file_path, newspaper_name, progress_callback, content_hash)
             except Exception as e:
                 logger.exception(f"PDF处理错误: {e}")
                 raise RuntimeError(f"PDF处理失败: {str(e)}")
@@ -139,7 +342,7 @@ class OCRHandler:
         elif is_image_by_ext:
             logger.info(f"基于扩展名，确定为图片文件: {file_path}")
             try:
-                return self._process_image(file_path, newspaper_name)
+                return self._process_image(file_path, newspaper_name, progress_callback, content_hash)
             except Exception as e:
                 logger.exception(f"图片处理错误: {e}")
                 raise RuntimeError(f"图片处理失败: {str(e)}")
@@ -148,7 +351,7 @@ class OCRHandler:
         elif file_type_by_header == 'pdf':
             logger.warning(f"扩展名不支持({file_ext})，但文件头显示这是PDF文件，尝试按PDF处理")
             try:
-                return self._process_pdf(file_path, newspaper_name)
+                return self._process_pdf(file_path, newspaper_name, progress_callback, content_hash)
             except Exception as e:
                 logger.exception(f"PDF处理错误: {e}")
                 raise RuntimeError(f"PDF处理失败: {str(e)}")
@@ -156,7 +359,7 @@ class OCRHandler:
         elif file_type_by_header in ['jpeg', 'png']:
             logger.warning(f"扩展名不支持({file_ext})，但文件头显示这是图片文件，尝试按图片处理")
             try:
-                return self._process_image(file_path, newspaper_name)
+                return self._process_image(file_path, newspaper_name, progress_callback, content_hash)
             except Exception as e:
                 logger.exception(f"图片处理错误: {e}")
                 raise RuntimeError(f"图片处理失败: {str(e)}")
@@ -165,8 +368,46 @@ class OCRHandler:
             logger.error(f"不支持的文件类型: {file_ext}, 文件: {file_path}")
             raise ValueError(f"不支持的文件类型: {file_ext}")
     
-    def _process_pdf(self, pdf_path, newspaper_name):
-        """处理PDF文件"""
+    def resume_newspaper(self, newspaper_id, progress_callback=None):
+        """
+        从第一个未完成的页面继续处理失败或中断的报纸
+        
+        Args:
+            newspaper_id: 报纸ID
+            progress_callback: 进度回调，参数同process_file
+            
+        Returns:
+            newspaper_id: 报纸ID
+        """
+        newspaper = get_newspaper(newspaper_id)
+        if newspaper is None:
+            raise ValueError(f"报纸不存在: {newspaper_id}")
+        if newspaper.ocr_status == 1:
+            logger.info(f"报纸 {newspaper_id} 已处理完成，无需继续")
+            return newspaper_id
+        
+        file_path = Path(newspaper.file_path)
+        if not file_path.exists():
+            logger.error(f"原始文件不存在，无法继续处理: {file_path}")
+            raise FileNotFoundError(f"原始文件不存在: {file_path}")
+        
+        with open(file_path, 'rb') as f:
+            is_pdf = f.read(4) == b'%PDF' or file_path.suffix.lower() == '.pdf'
+        
+        logger.info(f"继续处理报纸 {newspaper_id}: {file_path}")
+        update_newspaper_ocr_status(newspaper_id, 0)  # 重新标记为未处理
+        if is_pdf:
+            return self._process_pdf(file_path, newspaper.name, progress_callback,
+                                     newspaper.content_hash, newspaper_id=newspaper_id)
+        return self._process_image(file_path, newspaper.name, progress_callback,
+                                   newspaper.content_hash, newspaper_id=newspaper_id)
+    
+    def _process_pdf(self, pdf_path, newspaper_name, progress_callback=None, content_hash=None, newspaper_id=None):
+        """
+        处理PDF文件
+        
+        提供newspaper_id时为断点续处理：不再创建报纸记录，已完成的页面不再渲染和识别
+        """
         try:
             logger.info(f"准备将PDF转换为图片: {pdf_path}")
             
@@ -212,121 +453,431 @@ class OCRHandler:
                 logger.error(f"读取PDF文件头失败: {e}")
                 raise
             
-            # 将PDF转换为图片
+            # 读取PDF页数，页面图片在处理时按窗口逐批渲染，不一次性全部转换
             try:
                 # 记录环境变量
                 logger.info(f"系统环境: os.name={os.name}, PATH={os.environ.get('PATH', '')}")
                 
-                # 尝试将PDF转换为图片
-                logger.info("开始PDF到图片的转换...")
+                logger.info("读取PDF页数...")
                 if poppler_path:
                     logger.info(f"使用自定义Poppler路径: {poppler_path}")
                     try:
-                        pages = convert_from_path(str(pdf_path), 300, poppler_path=poppler_path)
-                        logger.info(f"使用自定义Poppler路径转换成功")
+                        page_count = self._get_pdf_page_count(pdf_path, poppler_path)
+                        logger.info(f"使用自定义Poppler路径读取成功")
                     except Exception as custom_poppler_err:
                         logger.exception(f"使用自定义Poppler路径失败: {custom_poppler_err}")
                         logger.info("尝试使用系统Poppler路径作为备选...")
-                        pages = convert_from_path(str(pdf_path), 300)
-                        logger.info(f"使用系统Poppler路径转换成功")
+                        poppler_path = None
+                        page_count = self._get_pdf_page_count(pdf_path, poppler_path)
+                        logger.info(f"使用系统Poppler路径读取成功")
                 else:
                     logger.info(f"使用系统Poppler路径")
-                    pages = convert_from_path(str(pdf_path), 300)
+                    page_count = self._get_pdf_page_count(pdf_path, poppler_path)
                 
-                if not pages:
-                    logger.error("PDF转换结果为空，没有页面被转换")
+                if not page_count:
+                    logger.error("PDF页数为0，没有页面可转换")
                     raise RuntimeError("PDF转换结果为空，没有页面被转换")
                 
-                logger.info(f"PDF成功转换为{len(pages)}个页面图片")
+                logger.info(f"PDF共{page_count}页，每批渲染{self.raster_window}页")
             except Exception as pdf_err:
-                logger.exception(f"PDF转换错误: {str(pdf_err)}")
-                # 通常这是因为缺少Poppler依赖
-                if "poppler" in str(pdf_err).lower() or "pdftoppm" in str(pdf_err).lower():
-                    error_msg = f"PDF处理需要安装Poppler库，详细错误: {str(pdf_err)}\n"
-                    error_msg += "Windows用户：https://github.com/oschwartz10612/poppler-windows/releases/\n"
-                    error_msg += "下载后，将bin目录添加到系统PATH环境变量中，或在.env文件中设置POPPLER_PATH参数。"
-                    logger.error(error_msg)
-                    raise RuntimeError(error_msg)
-                else:
-                    logger.error(f"PDF转换失败，详细错误: {str(pdf_err)}")
-                    raise RuntimeError(f"PDF转换失败: {str(pdf_err)}")
-            
-            # 创建报纸记录
-            logger.info(f"创建报纸记录: {newspaper_name}")
-            newspaper_id = add_newspaper(
-                name=newspaper_name,
-                file_path=str(pdf_path),
-                total_pages=len(pages)
-            )
-            logger.info(f"报纸记录创建成功, ID: {newspaper_id}")
+                self._raise_pdf_conversion_error(pdf_err)
+            
+            if newspaper_id is None:
+                # 创建报纸记录
+                logger.info(f"创建报纸记录: {newspaper_name}")
+                newspaper_id = add_newspaper(
+                    name=newspaper_name,
+                    file_path=str(pdf_path),
+                    total_pages=page_count,
+                    content_hash=content_hash
+                )
+                logger.info(f"报纸记录创建成功, ID: {newspaper_id}")
+                completed_pages = set()
+            else:
+                # 断点续处理：跳过已写入数据库的页面
+                completed_pages = prepare_newspaper_resume(newspaper_id)
+                logger.info(f"继续处理报纸 {newspaper_id}，已完成{len(completed_pages)}/{page_count}页")
             
             # 创建存储处理后图片的目录
             save_dir = PROCESSED_DIR / f"newspaper_{newspaper_id}"
             save_dir.mkdir(exist_ok=True)
             logger.info(f"创建图片存储目录: {save_dir}")
             
-            # 处理每一页
-            for i, page in enumerate(pages):
-                page_number = i + 1
-                logger.info(f"处理第{page_number}页...")
-                
-                # 保存页面图片
-                page_image_path = save_dir / f"page_{page_number}.jpg"
-                page.save(str(page_image_path), "JPEG")
-                logger.info(f"页面图片已保存: {page_image_path}")
-                
-                # 处理图片并提取文字
-                logger.info(f"从图像中提取文字...")
-                ocr_result = self._extract_text_from_image(np.array(page))
-                ocr_text = self._convert_ocr_result_to_text(ocr_result)
-                logger.info(f"提取了{len(ocr_text.splitlines())}行文本")
-                
-                # 添加页面记录
-                logger.info(f"添加页面记录到数据库...")
-                page_id = add_newspaper_page(
-                    newspaper_id=newspaper_id,
-                    page_number=page_number,
-                    page_image_path=str(page_image_path),
-                    ocr_text=ocr_text,
-                    text_direction=self.text_direction,
-                    text_type=self.text_type
-                )
-                logger.info(f"页面记录添加成功, ID: {page_id}")
-                
-                # 提取文章和关键词
-                logger.info(f"提取文章和关键词...")
-                self._extract_articles_and_keywords(page_id, ocr_result, ocr_text)
-                
-                logger.info(f"已处理页面 {page_number}/{len(pages)}")
+            if progress_callback:
+                progress_callback(len(completed_pages), page_count, newspaper_id)
+            
+            # 渲染、保存、识别、分析分阶段并行进行，页面按完成顺序返回
+            pipeline, source, pyramids = self._build_pdf_pipeline(
+                pdf_path, page_count, poppler_path, save_dir, newspaper_id, completed_pages
+            )
+            self._pipelines[newspaper_id] = pipeline
+            done_pages = len(completed_pages)
+            records = []
+            finished = False
+            try:
+                for record in pipeline.run(source):
+                    records.append(record)
+                    done_pages += 1
+                    logger.info(f"已处理页面 {record['page_number']}（{done_pages}/{page_count}）")
+                    # 每批页面及其文章和关键词在一个事务中写入，进程被终止时已写入的页面供断点续处理跳过
+                    if len(records) >= self.save_batch_pages:
+                        batch, records = records, []
+                        self._save_pages(newspaper_id, batch)
+                    if progress_callback:
+                        progress_callback(done_pages, page_count, newspaper_id)
+                finished = True
+            finally:
+                self._pipelines.pop(newspaper_id, None)
+                self._wait_pyramids(pyramids)
+                # 写入剩余的页面；处理中途出错时也保存已完成的页面，保存失败时不掩盖原来的异常
+                try:
+                    self._save_pages(newspaper_id, records)
+                except Exception as save_err:
+                    if finished:
+                        raise
+                    logger.exception(f"保存已完成的{len(records)}页失败: {save_err}")
+            
+            logger.info("流水线各阶段: " + ", ".join(
+                f"{stage['stage']} {stage['processed']}页/{stage['busy_seconds']}s" for stage in pipeline.stats()
+            ))
             
             # 更新处理状态
             logger.info(f"更新报纸处理状态...")
             update_newspaper_ocr_status(newspaper_id, 1)  # 标记为已处理
             logger.info(f"PDF处理完成: {pdf_path}")
+            if self.preprocessor:
+                # 并行识别时预处理在工作进程中进行，这里只统计当前进程内的耗时
+                costs = ", ".join(f"{step} {cost['avg_ms']:.0f}ms" for step, cost in self.preprocessor.costs().items())
+                logger.info(f"预处理平均耗时: {costs}")
             
             return newspaper_id
         
         except Exception as e:
             logger.exception(f"PDF处理过程中出错: {e}")
-            if 'newspaper_id' in locals():
+            if newspaper_id is not None:
                 logger.info(f"将报纸状态标记为处理错误: {newspaper_id}")
                 update_newspaper_ocr_status(newspaper_id, 2)  # 标记为处理错误
             raise
     
-    def _process_image(self, image_path, newspaper_name):
-        """处理单个图片文件"""
+    def _get_pdf_page_count(self, pdf_path, poppler_path=None):
+        """读取PDF页数"""
+        info = pdfinfo_from_path(str(pdf_path), poppler_path=poppler_path)
+        return int(info.get("Pages", 0))
+    
+    def _iter_pdf_pages(self, pdf_path, page_count, poppler_path=None, dpi=None, skip_pages=None):
+        """
+        按窗口逐批渲染PDF页面
+        
+        每次只调用pdftoppm渲染raster_window页，峰值内存由窗口大小决定，与总页数无关
+        
+        Args:
+            pdf_path: PDF文件路径
+            page_count: PDF总页数
+            poppler_path: Poppler路径，None表示使用系统路径
+            dpi: 渲染分辨率，None表示使用raster_dpi
+            skip_pages: 不需要渲染的页码集合（断点续处理时已完成的页面）
+            
+        Yields:
+            (page_number, PIL图片)，页码从1开始
+        """
+        dpi = dpi or self.raster_dpi
+        for first_page, last_page in self._page_windows(page_count, skip_pages or set()):
+            try:
+                window = convert_from_path(
+                    str(pdf_path), dpi,
+                    first_page=first_page, last_page=last_page,
+                    poppler_path=poppler_path
+                )
+            except Exception as pdf_err:
+                self._raise_pdf_conversion_error(pdf_err)
+            
+            if not window:
+                logger.error(f"PDF第{first_page}-{last_page}页转换结果为空")
+                raise RuntimeError(f"PDF第{first_page}-{last_page}页转换结果为空")
+            
+            # 逐页交出，已交出的页面不再被窗口列表引用
+            window.reverse()
+            page_number = first_page
+            while window:
+                yield page_number, window.pop()
+                page_number += 1
+    
+    def _page_windows(self, page_count, skip_pages):
+        """把需要渲染的页码分成连续且不超过raster_window页的区间"""
+        windows = []
+        for page_number in range(1, page_count + 1):
+            if page_number in skip_pages:
+                continue
+            if windows and windows[-1][1] == page_number - 1 and page_number - windows[-1][0] < self.raster_window:
+                windows[-1][1] = page_number
+            else:
+                windows.append([page_number, page_number])
+        return windows
+    
+    def _build_pdf_pipeline(self, pdf_path, page_count, poppler_path, save_dir, newspaper_id, completed_pages):
+        """
+        构建PDF页面处理流水线
+        
+        逐页识别和进程池并行识别时，流水线为：渲染 -> 保存 -> 识别 -> 分析，
+        识别阶段的线程数为1（共用一个PaddleOCR引擎）或进程池进程数的2倍（各线程等待进程池结果）。
+        两遍分辨率和跨页批量识别模式下，渲染、保存和识别由原有的生成器完成，流水线只包含分析。
+        流水线输出待入库的页面记录（见_page_record），由调用方整份报纸一次写入数据库。
+        
+        Returns:
+            (StagedPipeline, 输入迭代器, 瓦片金字塔Future列表)
+        """
+        pyramids = []
+        
+        def save(item):
+            page_number, page = item
+            page_image_path = save_dir / f"page_{page_number}.jpg"
+            page.save(str(page_image_path), "JPEG")
+            # 进程池模式下也把渲染得到的数组传给工作进程，不从有损的JPEG重新读取
+            image = np.array(page)
+            page.close()
+            return page_number, page_image_path, image
+        
+        def recognize(item):
+            page_number, page_image_path, image = item
+            if pool is not None:
+                _, ocr_result, orientation = pool.submit(page_number, image).result()
+            else:
+                ocr_result, orientation = self._extract_text_from_image(image)
+            return page_number, page_image_path, ocr_result, orientation
+        
+        def analyze(item):
+            page_number, page_image_path, ocr_result, orientation = item
+            pyramids.append(self._submit_pyramid(page_image_path))
+            ocr_text = self._convert_ocr_result_to_text(ocr_result)
+            logger.info(f"第{page_number}页提取了{len(ocr_text.splitlines())}行文本")
+            position = self._store_page_boxes(page_image_path, ocr_result, orientation)
+            return self._page_record(page_number, page_image_path, ocr_result, ocr_text, orientation, position)
+        
+        tail = [PipelineStage("analyze", analyze, self.analyze_workers)]
+        
+        pool = None
+        if self.preview_dpi and self.text_direction != 'vertical':
+            pages = self._iter_pdf_pages(pdf_path, page_count, poppler_path, dpi=self.preview_dpi,
+                                         skip_pages=completed_pages)
+            source = self._ocr_pdf_pages_two_pass(pdf_path, pages, poppler_path, save_dir)
+            stages = tail
+        elif self.rec_batch_pages > 1 and not self.ocr_processes:
+            pages = self._iter_pdf_pages(pdf_path, page_count, poppler_path, skip_pages=completed_pages)
+            source = self._ocr_pdf_pages_batched(pages, save_dir)
+            stages = tail
+        else:
+            pool = self.ocr_pool
+            source = self._iter_pdf_pages(pdf_path, page_count, poppler_path, skip_pages=completed_pages)
+            stages = [
+                PipelineStage("save", save, self.save_workers),
+                PipelineStage("ocr", recognize, pool.processes * 2 if pool is not None else 1)
+            ] + tail
+        
+        pipeline = StagedPipeline(stages, self.pipeline_queue_size, name=f"newspaper-{newspaper_id}")
+        return pipeline, source, pyramids
+    
+    def pipeline_stats(self, newspaper_id):
+        """正在处理的报纸的流水线各阶段统计，未在处理时返回None"""
+        pipeline = self._pipelines.get(newspaper_id)
+        return pipeline.stats() if pipeline is not None else None
+    
+    def _ocr_pdf_pages_batched(self, pages, save_dir):
+        """
+        跨页批量识别PDF页面
+        
+        逐页保存并检测，汇总rec_batch_pages页的文本行后统一识别
+        
+        Args:
+            pages: (page_number, PIL图片)迭代器
+            save_dir: 页面图片保存目录
+            
+        Yields:
+            (page_number, page_image_path, OCR结果, 识别方向)，按页码顺序
+        """
+        batcher = BatchRecognizer(self.ocr, self.rec_batch_num)
+        pending = deque()
+        
+        for page_number, page in pages:
+            logger.info(f"处理第{page_number}页...")
+            
+            # 保存页面图片
+            page_image_path = save_dir / f"page_{page_number}.jpg"
+            page.save(str(page_image_path), "JPEG")
+            
+            # 只做检测，识别留到整批汇总后进行
+            pending.append((page_number, page_image_path, self._detect_for_batch(batcher, page_number, np.array(page))))
+            page.close()
+            if len(pending) >= self.rec_batch_pages:
+                yield from self._flush_batch(batcher, pending)
+        
+        yield from self._flush_batch(batcher, pending)
+    
+    def _ocr_pdf_pages_two_pass(self, pdf_path, pages, poppler_path, save_dir):
+        """
+        两遍分辨率识别PDF页面
+        
+        低分辨率页面只用于检测文字区域；整页以raster_dpi渲染一次并保存为页面图片，
+        只有各文字区域从该图像中裁出后识别，结果换算到整页坐标。文字区域占页面大部分时直接识别整页。
+        
+        Args:
+            pdf_path: PDF文件路径
+            pages: 以preview_dpi渲染的(page_number, PIL图片)迭代器
+            poppler_path: Poppler路径
+            save_dir: 页面图片保存目录
+            
+        Yields:
+            (page_number, page_image_path, OCR结果, 识别方向)，按页码顺序
+        """
+        for page_number, page in pages:
+            logger.info(f"处理第{page_number}页（两遍分辨率）...")
+            preview = np.array(page)
+            page.close()
+            
+            # 第一遍：低分辨率检测文字区域
+            with self.inference_lock:
+                result = self.ocr.ocr(preview, det=True, rec=False, cls=False)
+            boxes = result[0] if result and result[0] else []
+            height, width = preview.shape[:2]
+            regions = find_text_regions(boxes, height, width)
+            covered = sum(w * h for _, _, w, h in regions)
+            logger.info(f"第{page_number}页检测到{len(regions)}个文字区域，占页面{covered / (height * width):.0%}")
+            
+            # 页面图片与其他模式一致，以raster_dpi保存
+            full = render_pdf_region(pdf_path, page_number, self.raster_dpi, poppler_path=poppler_path)
+            page_image_path = save_dir / f"page_{page_number}.jpg"
+            Image.fromarray(full).save(str(page_image_path), "JPEG")
+            full_height, full_width = full.shape[:2]
+            factor = full_width / width
+            
+            # 第二遍：只识别高分辨率图像中的文字区域
+            if not regions:
+                ocr_result = []
+            elif covered > FULL_PAGE_RATIO * height * width:
+                ocr_result, _ = self._extract_text_from_image(full)
+            else:
+                ocr_result = []
+                for region in regions:
+                    x, y, w, h = scale_region(region, factor, full_height, full_width)
+                    image = np.ascontiguousarray(full[y:y + h, x:x + w])
+                    region_result, _ = self._extract_text_from_image(image)
+                    ocr_result.extend(offset_ocr_result(region_result, x, y))
+                ocr_result = sort_boxes(ocr_result, key=lambda line: line[0])
+            
+            yield page_number, page_image_path, ocr_result, ORIENTATION_ORIGINAL
+    
+    def _detect_text_boxes(self, image):
+        """
+        只运行文字检测
+        
+        竖排文字先预判页面方向，在旋转后的图像上检测
+        
+        Returns:
+            (检测所用图像, 文本框列表, 识别方向)
+        """
+        if self.preprocessor:
+            image = self.preprocessor(image)
+        orientation = self._detect_orientation(image) if self.text_direction == 'vertical' else ORIENTATION_ORIGINAL
+        image = self._orient_image(image, orientation)
+        with self.inference_lock:
+            result = self.ocr.ocr(image, det=True, rec=False, cls=False)
+        boxes = result[0] if result and result[0] else []
+        return image, boxes, orientation
+    
+    def _detect_for_batch(self, batcher, key, image):
+        """
+        检测一页并把文本行加入批量识别器
+        
+        Returns:
+            (直接结果, 识别方向, 缓存键)。直接结果为None表示该页待批量识别后取回；
+            命中缓存或检测不到文字时直接给出结果
+        """
+        cache_key = self._cache_key(image, batch=True)
+        if cache_key is not None:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.info("命中OCR结果缓存，跳过识别")
+                return cached + (None,)
+        
+        detect_image, boxes, orientation = self._detect_text_boxes(image)
+        if boxes:
+            batcher.add_page(key, detect_image, boxes)
+            return None, orientation, cache_key
+        return [], orientation, cache_key
+    
+    def _flush_batch(self, batcher, pending):
+        """批量识别已收集的页面，按页码顺序返回结果并清空pending"""
+        with self.inference_lock:
+            results = batcher.recognize() if len(batcher) else {}
+        while pending:
+            page_number, page_image_path, (direct_result, orientation, cache_key) = pending.popleft()
+            ocr_result = direct_result if direct_result is not None else results.get(page_number, [])
+            if cache_key is not None:
+                self._cache_put(cache_key, ocr_result, orientation)
+            yield page_number, page_image_path, ocr_result, orientation
+    
+    def _submit_pyramid(self, page_image_path):
+        """提交页面缩略图和瓦片金字塔的后台生成任务，返回Future，未启用时返回None"""
+        if not self.pyramid_workers:
+            return None
+        if self._pyramid_executor is None:
+            with self._pyramid_lock:
+                if self._pyramid_executor is None:
+                    self._pyramid_executor = ThreadPoolExecutor(
+                        max_workers=self.pyramid_workers, thread_name_prefix="page-pyramid"
+                    )
+        return self._pyramid_executor.submit(build_pyramid, page_image_path)
+    
+    def _wait_pyramids(self, futures):
+        """等待文档各页的瓦片金字塔生成完成。生成失败只记录日志，查看器会回退到整页图片"""
+        for future in futures:
+            if future is None:
+                continue
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning(f"生成页面瓦片金字塔失败: {e}")
+    
+    def _raise_pdf_conversion_error(self, pdf_err):
+        """将PDF转换异常转换为带安装提示的错误信息"""
+        logger.exception(f"PDF转换错误: {str(pdf_err)}")
+        # 通常这是因为缺少Poppler依赖
+        if "poppler" in str(pdf_err).lower() or "pdftoppm" in str(pdf_err).lower() or "pdfinfo" in str(pdf_err).lower():
+            error_msg = f"PDF处理需要安装Poppler库，详细错误: {str(pdf_err)}\n"
+            error_msg += "Windows用户：https://github.com/oschwartz10612/poppler-windows/releases/\n"
+            error_msg += "下载后，将bin目录添加到系统PATH环境变量中，或在.env文件中设置POPPLER_PATH参数。"
+            logger.error(error_msg)
+            raise RuntimeError(error_msg)
+        else:
+            logger.error(f"PDF转换失败，详细错误: {str(pdf_err)}")
+            raise RuntimeError(f"PDF转换失败: {str(pdf_err)}")
+    
+    def _process_image(self, image_path, newspaper_name, progress_callback=None, content_hash=None, newspaper_id=None):
+        """
+        处理单个图片文件
+        
+        提供newspaper_id时为断点续处理，页面已写入数据库时不再识别
+        """
         try:
             # 读取图片
             image = cv2.imread(str(image_path))
             if image is None:
                 raise ValueError(f"无法读取图片: {image_path}")
             
-            # 创建报纸记录
-            newspaper_id = add_newspaper(
-                name=newspaper_name,
-                file_path=str(image_path),
-                total_pages=1
-            )
+            if newspaper_id is None:
+                # 创建报纸记录
+                newspaper_id = add_newspaper(
+                    name=newspaper_name,
+                    file_path=str(image_path),
+                    total_pages=1,
+                    content_hash=content_hash
+                )
+                if progress_callback:
+                    # 任务记录报纸ID，处理期间不能再提交该报纸的断点续处理
+                    progress_callback(0, 1, newspaper_id)
+            elif prepare_newspaper_resume(newspaper_id):
+                logger.info(f"报纸 {newspaper_id} 的页面已处理完成，无需重新识别")
+                update_newspaper_ocr_status(newspaper_id, 1)  # 标记为已处理
+                return newspaper_id
             
             # 创建存储处理后图片的目录
             save_dir = PROCESSED_DIR / f"newspaper_{newspaper_id}"
@@ -335,23 +886,21 @@ class OCRHandler:
             # 复制原始图片
             page_image_path = save_dir / f"page_1.jpg"
             cv2.imwrite(str(page_image_path), image)
+            pyramid = self._submit_pyramid(page_image_path)
             
-            # 处理图片并提取文字
-            ocr_result = self._extract_text_from_image(image)
+            # 处理图片并提取文字，与PDF页面一致使用RGB数组（预处理算子按RGB转换灰度）
+            ocr_result, orientation = self._extract_text_from_image(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
             ocr_text = self._convert_ocr_result_to_text(ocr_result)
+            position = self._store_page_boxes(page_image_path, ocr_result, orientation,
+                                              page_size=(image.shape[1], image.shape[0]))
             
-            # 添加页面记录
-            page_id = add_newspaper_page(
-                newspaper_id=newspaper_id,
-                page_number=1,
-                page_image_path=str(page_image_path),
-                ocr_text=ocr_text,
-                text_direction=self.text_direction,
-                text_type=self.text_type
-            )
-            
-            # 提取文章和关键词
-            self._extract_articles_and_keywords(page_id, ocr_result, ocr_text)
+            # 提取文章和关键词，与页面记录一起写入
+            self._save_pages(newspaper_id, [
+                self._page_record(1, page_image_path, ocr_result, ocr_text, orientation, position)
+            ])
+            if progress_callback:
+                progress_callback(1, 1, newspaper_id)
+            self._wait_pyramids([pyramid])
             
             # 更新处理状态
             update_newspaper_ocr_status(newspaper_id, 1)  # 标记为已处理
@@ -361,76 +910,233 @@ class OCRHandler:
         
         except Exception as e:
             logger.error(f"图片处理错误: {e}")
-            if 'newspaper_id' in locals():
+            if newspaper_id is not None:
                 update_newspaper_ocr_status(newspaper_id, 2)  # 标记为处理错误
             raise
     
     def _extract_text_from_image(self, image):
         """
-        从图片中提取文字
+        从图片中提取文字，启用缓存时相同像素和配置的页面直接返回缓存结果
         
         Args:
             image: OpenCV图片对象
         
         Returns:
-            OCR结果
+            (OCR结果, 识别方向)
         """
-        # 图像预处理
-        # 如果是竖排文字，需要特殊处理
+        cache_key = self._cache_key(image)
+        if cache_key is not None:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.info("命中OCR结果缓存，跳过识别")
+                return cached
+        
+        ocr_result, orientation = self._run_ocr(image)
+        if cache_key is not None:
+            self._cache_put(cache_key, ocr_result, orientation)
+        return ocr_result, orientation
+    
+    def _cache_key(self, image, batch=False):
+        """
+        计算OCR结果缓存键，未启用缓存时返回None
+        
+        Args:
+            image: 识别的图像
+            batch: 是否为跨页批量识别。批量识别不分块、不二次识别，结果只与同样批量识别的页面共用缓存，
+                分块和二次识别参数不计入键
+        """
+        if self.ocr_cache is None:
+            return None
+        config = dict(self.ocr_config, text_direction=self.text_direction)
+        if self.preprocessor:
+            config["preprocess"] = ",".join(self.preprocessor.steps)
+        if batch:
+            config["mode"] = "batch"
+        else:
+            config.update(tile_size=self.tile_size, tile_overlap=self.tile_overlap)
+            if self.reocr_threshold and self.reocr_max_lines:
+                config["reocr"] = [self.reocr_threshold, self.reocr_max_lines]
+        return image_cache_key(image, config)
+    
+    def _cache_get(self, cache_key):
+        """读取缓存，返回(OCR结果, 识别方向)，未命中时返回None"""
+        cached = self.ocr_cache.get(cache_key)
+        if cached is None:
+            return None
+        return cached["result"], cached["orientation"]
+    
+    def _cache_put(self, cache_key, ocr_result, orientation):
+        """写入缓存"""
+        self.ocr_cache.put(cache_key, {"result": ocr_result, "orientation": orientation})
+    
+    def _run_ocr(self, image):
+        """
+        对图片运行一次完整OCR
+        
+        竖排文字先用低分辨率检测预判页面方向，再只在选定方向上做一次完整识别，
+        不再依次尝试顺时针、逆时针、原图和增强图像
+        
+        Args:
+            image: OpenCV图片对象
+        
+        Returns:
+            (OCR结果, 识别方向)
+        """
+        if self.preprocessor:
+            image = self.preprocessor(image)
+        
         if self.text_direction == 'vertical':
-            logger.info("处理竖排文字，应用图像旋转...")
-            
-            # 竖排文字处理方法1：顺时针旋转图像90度
-            # 这会把竖排文字转为横排，然后使用标准OCR识别
-            rotated_image = cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
-            result = self.ocr.ocr(rotated_image, cls=True)
-            
-            # 如果旋转后识别结果不好，可以尝试以下备选方法
-            if not result or not result[0]:
-                logger.info("旋转90度后识别效果不佳，尝试逆时针旋转...")
-                rotated_image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
-                result = self.ocr.ocr(rotated_image, cls=True)
-            
-            if not result or not result[0]:
-                logger.info("尝试使用原始图像进行识别...")
-                result = self.ocr.ocr(image, cls=True)
-            
-            # 如果仍然没有识别到文字，使用更强的图像增强
-            if not result or not result[0]:
-                logger.info("尝试使用图像增强进行识别...")
-                # 增强图像对比度
-                enhanced_image = self._enhance_image(image)
-                result = self.ocr.ocr(enhanced_image, cls=True)
-                
-            return result[0] if result else []
+            orientation = self._detect_orientation(image)
+            logger.info(f"竖排页面方向预判结果: {orientation}")
         else:
             # 常规横排文字处理
+            orientation = ORIENTATION_ORIGINAL
+        
+        image = self._orient_image(image, orientation)
+        ocr_result = self._recognize(image)
+        if self.reocr_threshold and self.reocr_max_lines:
+            ocr_result, _ = reocr_weak_lines(
+                image, ocr_result, self._recognize_crops,
+                self.reocr_threshold, self.reocr_max_lines, enhance=self.enhancer
+            )
+        return ocr_result, orientation
+    
+    def _recognize(self, image):
+        """
+        对已定向的图像做完整识别（检测、角度分类、识别）
+        
+        启用分块识别且页面大于分块时，切成重叠分块识别后合并；
+        当前进程有进程池时各分块并行识别
+        
+        Returns:
+            OCR结果
+        """
+        height, width = image.shape[:2]
+        if self.tile_size and max(height, width) > self.tile_size:
+            return ocr_tiled(image, self.tile_size, self.tile_overlap, self._recognize_whole, self.ocr_pool)
+        return self._recognize_whole(image)
+    
+    def _recognize_whole(self, image):
+        """整页识别"""
+        with self.inference_lock:
             result = self.ocr.ocr(image, cls=True)
-            return result[0] if result else []
+        return (result[0] or []) if result else []
     
-    def _enhance_image(self, image):
+    def _recognize_crops(self, crops):
+        """批量识别已裁剪的文本行图像，不做角度分类，返回与crops一一对应的[(text, confidence), ...]"""
+        with self.inference_lock:
+            return recognize_crops(self.ocr, crops)
+    
+    def _detect_orientation(self, image):
         """
-        增强图像处理，提高OCR识别率
+        预判竖排页面的识别方向
+        
+        在缩小的图像上只运行文字检测：多数文本框为横向时页面无需旋转；
+        多数为竖长时取若干最大的文本框，顺时针旋转后交给角度分类器，
+        多数被判为上下颠倒则改用逆时针旋转；检测不到文字时使用图像增强。
         
         Args:
             image: OpenCV图片对象
             
         Returns:
-            增强后的图像
+            识别方向
         """
-        # 转换为灰度图
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height, width = image.shape[:2]
+        scale = min(1.0, ORIENTATION_MAX_SIDE / max(height, width))
+        if scale < 1.0:
+            small = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
         else:
-            gray = image
+            small = image
+        
+        with self.inference_lock:
+            result = self.ocr.ocr(small, det=True, rec=False, cls=False)
+        boxes = result[0] if result and result[0] else []
+        if not boxes:
+            return ORIENTATION_ENHANCED
+        
+        def box_size(box):
+            points = np.array(box)
+            return np.ptp(points[:, 0]), np.ptp(points[:, 1])
+        
+        tall_boxes = [box for box in boxes if box_size(box)[1] >= box_size(box)[0] * 1.5]
+        if len(tall_boxes) * 2 < len(boxes):
+            return ORIENTATION_ORIGINAL
+        
+        sample = sorted(tall_boxes, key=lambda box: box_size(box)[0] * box_size(box)[1], reverse=True)
+        crops = [
+            cv2.rotate(crop_text_box(small, box, rotate_tall=False), cv2.ROTATE_90_CLOCKWISE)
+            for box in sample[:ORIENTATION_SAMPLE_SIZE]
+        ]
+        # 直接运行角度分类器，每个采样文本框各投一票，不运行识别
+        with self.inference_lock:
+            _, cls_result = classify_crops(self.ocr, crops)
+        labels = [label for label, _ in cls_result]
+        flipped = sum(1 for label in labels if label == '180')
+        return ORIENTATION_COUNTERCLOCKWISE if flipped * 2 > len(labels) else ORIENTATION_CLOCKWISE
+    
+    def _store_page_boxes(self, page_image_path, ocr_result, orientation, page_size=None):
+        """
+        把识别结果换算到页面图片坐标，保存为文本框文件（见page_boxes）
+        
+        Args:
+            page_image_path: 页面图片路径
+            ocr_result: 识别所用图像坐标下的OCR结果
+            orientation: 识别方向，旋转后识别的页面换算回原图坐标
+            page_size: 页面图片的(宽, 高)，None时从图片文件头读取
             
-        # 二值化处理
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        Returns:
+            文章在页面上的相对位置（position_x、position_y、width、height），没有文字时为空字典
+        """
+        if page_size is None:
+            with Image.open(page_image_path) as page:
+                page_size = page.size
+        width, height = page_size
         
-        # 去噪
-        denoised = cv2.fastNlMeansDenoising(binary, None, 10, 7, 21)
+        def to_page(x, y):
+            if orientation == ORIENTATION_CLOCKWISE:
+                return y, height - 1 - x
+            if orientation == ORIENTATION_COUNTERCLOCKWISE:
+                return width - 1 - y, x
+            return x, y
         
-        return denoised
+        page_result = [
+            [[list(to_page(x, y)) for x, y in box], rec]
+            for box, rec in ocr_result or []
+        ]
+        write_page_boxes(boxes_path(page_image_path), page_result, width, height)
+        
+        if not page_result or not width or not height:
+            return {}
+        xs = [x for box, _ in page_result for x, _ in box]
+        ys = [y for box, _ in page_result for _, y in box]
+        x0, y0 = max(0.0, min(xs) / width), max(0.0, min(ys) / height)
+        x1, y1 = min(1.0, max(xs) / width), min(1.0, max(ys) / height)
+        return {"position_x": x0, "position_y": y0, "width": x1 - x0, "height": y1 - y0}
+    
+    def _orient_image(self, image, orientation):
+        """按识别方向旋转或增强图像"""
+        if orientation == ORIENTATION_CLOCKWISE:
+            return cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
+        if orientation == ORIENTATION_COUNTERCLOCKWISE:
+            return cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        if orientation == ORIENTATION_ENHANCED:
+            return self._enhance_image(image)
+        return image
+    
+    def _enhance_image(self, image):
+        """
+        增强图像处理，提高OCR识别率
+        
+        使用CLAHE、自适应阈值和中值滤波（见preprocess.ENHANCE_PIPELINE），
+        代替耗时数秒的全尺寸非局部均值去噪
+        
+        Args:
+            image: OpenCV图片对象
+            
+        Returns:
+            增强后的图像
+        """
+        return self.enhancer(image)
     
     def _convert_ocr_result_to_text(self, ocr_result):
         """
@@ -519,71 +1225,106 @@ class OCRHandler:
         # 将所有列连接起来，每列之间用空行分隔
         return '\n\n'.join(result_text)
     
-    def _extract_articles_and_keywords(self, page_id, ocr_result, ocr_text):
+    def _page_record(self, page_number, page_image_path, ocr_result, ocr_text, orientation, position=None):
         """
-        从OCR结果中提取文章和关键词
+        从OCR结果中提取文章和关键词，生成待入库的页面记录（见save_newspaper_pages）
         
         Args:
-            page_id: 页面ID
+            page_number: 页码
+            page_image_path: 页面图片路径
             ocr_result: OCR的原始结果
             ocr_text: OCR提取的完整文本
+            orientation: 识别时采用的页面方向
+            position: 文章在页面上的相对位置（见_store_page_boxes）
         """
-        session = get_session()
-        try:
-            # 简单的文章分割方法（实际项目可能需要更复杂的算法）
-            # 这里简单地把整页当作一篇文章处理
-            
-            # 尝试提取标题（假设页面上第一行文字是标题）
-            title = ocr_result[0][1][0] if ocr_result else "未知标题"
-            
-            # 尝试从文本中提取日期
-            date_match = re.search(r'(\d{2,4})[年/-](\d{1,2})[月/-](\d{1,2})[日号]?', ocr_text)
-            extracted_date = None
-            if date_match:
-                try:
-                    year, month, day = map(int, date_match.groups())
-                    # 处理民国年份或其他特殊年份格式
-                    if year < 100:
-                        # 假设是民国年份，转换为公元年份
-                        year += 1911
-                    extracted_date = datetime(year, month, day).date()
-                except ValueError:
-                    pass
-            
-            # 提取关键词
-            keywords = jieba.analyse.extract_tags(ocr_text, topK=10)
-            
-            # 创建文章记录
-            article = Article(
-                page_id=page_id,
-                title=title,
-                content=ocr_text,
-                extracted_date=extracted_date
-            )
-            session.add(article)
-            session.flush()  # 获取article_id
-            
-            # 添加关键词
-            for word in keywords:
-                # 检查关键词是否已存在
-                keyword = session.query(Keyword).filter_by(word=word).first()
-                if not keyword:
-                    keyword = Keyword(word=word)
-                    session.add(keyword)
-                    session.flush()
-                
-                # 将关键词与文章关联
-                article.keywords.append(keyword)
-            
-            session.commit()
-            logger.info(f"已添加文章: {title}, 关键词: {', '.join(keywords)}")
+        return {
+            "page_number": page_number,
+            "page_image_path": str(page_image_path),
+            "ocr_text": ocr_text,
+            "text_direction": self.text_direction,
+            "text_type": self.text_type,
+            "orientation": orientation,
+            "article": dict(self._analyze_page(ocr_result, ocr_text), **(position or {}))
+        }
+    
+    def _save_pages(self, newspaper_id, records):
+        """在一个事务中写入页面记录及其文章和关键词"""
+        if not records:
+            return
+        start = time.perf_counter()
+        save_newspaper_pages(newspaper_id, records)
+        logger.info(f"已写入{len(records)}页及其文章和关键词，耗时{(time.perf_counter() - start) * 1000:.0f}ms")
+    
+    def _analyze_page(self, ocr_result, ocr_text):
+        """
+        分析页面文本，提取文章标题、日期和关键词（不访问数据库）
+        
+        Args:
+            ocr_result: OCR的原始结果
+            ocr_text: OCR提取的完整文本
             
-        except Exception as e:
-            session.rollback()
-            logger.error(f"提取文章和关键词时出错: {e}")
-            raise
-        finally:
-            session.close()
+        Returns:
+            文章字段字典：title、content、extracted_date、keywords
+        """
+        # 简单的文章分割方法（实际项目可能需要更复杂的算法）
+        # 这里简单地把整页当作一篇文章处理
+        
+        # 尝试提取标题（假设页面上第一行文字是标题）
+        title = ocr_result[0][1][0] if ocr_result else "未知标题"
+        
+        # 尝试从文本中提取日期
+        date_match = re.search(r'(\d{2,4})[年/-](\d{1,2})[月/-](\d{1,2})[日号]?', ocr_text)
+        extracted_date = None
+        if date_match:
+            try:
+                year, month, day = map(int, date_match.groups())
+                # 处理民国年份或其他特殊年份格式
+                if year < 100:
+                    # 假设是民国年份，转换为公元年份
+                    year += 1911
+                extracted_date = datetime(year, month, day).date()
+            except ValueError:
+                pass
+        
+        # 提取关键词
+        keywords = jieba.analyse.extract_tags(ocr_text, topK=10)
+        
+        return {
+            "title": title,
+            "content": ocr_text,
+            "extracted_date": extracted_date,
+            "keywords": keywords
+        }
+
+class OCRHandlerSet:
+    """按文字类型和文字方向创建并缓存OCR处理器，Web应用和命令行工具共用"""
+    
+    def __init__(self, options, engine_registry=None):
+        """
+        Args:
+            options: 传给OCRHandler的其他参数（见handler_options_from_env）
+            engine_registry: EngineRegistry，各处理器共用已加载的识别模型；None表示各处理器自行创建引擎
+        """
+        self.options = options
+        self.engine_registry = engine_registry
+        self._handlers = {}
+        self._lock = threading.Lock()
+    
+    def get(self, text_type='simplified', text_direction='horizontal'):
+        """获取指定文字类型和方向的OCR处理器，首次使用时创建"""
+        key = (text_type, text_direction)
+        with self._lock:
+            if key not in self._handlers:
+                self._handlers[key] = OCRHandler(
+                    **self.options, text_type=text_type, text_direction=text_direction,
+                    engine_registry=self.engine_registry
+                )
+            return self._handlers[key]
+    
+    def for_newspaper(self, newspaper_id):
+        """获取与报纸已处理页面相同设置的OCR处理器，用于断点续处理；还没有已处理的页面时使用默认设置"""
+        settings = get_newspaper_text_settings(newspaper_id)
+        return self.get(*settings) if settings else self.get()
 
 # 单独测试
 if __name__ == "__main__":
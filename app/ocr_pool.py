@@ -0,0 +1,83 @@
+"""
+OCR进程池模块
+
+把同一文档的各页分发到多个工作进程并行识别，每个工作进程持有自己预热好的PaddleOCR引擎。
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("OCR_Pool")
+
+# 工作进程内的OCR处理器，由_init_worker创建
+_worker_handler = None
+
+
+def _init_worker(handler_kwargs):
+    """工作进程初始化：创建OCR处理器并用空白图片预热引擎"""
+    global _worker_handler
+    from ocr_handler import OCRHandler
+
+    _worker_handler = OCRHandler(**handler_kwargs)
+    blank = np.full((64, 256, 3), 255, dtype=np.uint8)
+    _worker_handler.ocr.ocr(blank, cls=True)
+    logger.info("OCR工作进程初始化完成")
+
+
+def _ocr_page(page_number, image):
+    """
+    在工作进程中识别一页图片
+
+    Args:
+        page_number: 页码，原样返回以便调用方核对
+        image: 页面的RGB数组，与串行模式识别的是同一渲染结果（而非有损压缩后保存的JPEG），
+            识别结果和缓存键与串行模式一致
+
+    Returns:
+        (page_number, OCR结果, 识别方向)
+    """
+    ocr_result, orientation = _worker_handler._extract_text_from_image(image)
+    return page_number, ocr_result, orientation
+
+
+def _ocr_image(image):
+    """在工作进程中对一张已定向的图像（如页面分块）做完整识别"""
+    return _worker_handler._recognize_whole(image)
+
+
+class OCRWorkerPool:
+    """PaddleOCR工作进程池"""
+
+    def __init__(self, processes, handler_kwargs):
+        """
+        初始化进程池
+
+        Args:
+            processes: 工作进程数
+            handler_kwargs: 传给工作进程内OCRHandler的参数（use_gpu、text_direction、text_type）
+        """
+        self.processes = processes
+        # 使用spawn启动，避免fork已加载Paddle的父进程
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(handler_kwargs,)
+        )
+        logger.info(f"OCR进程池已创建，工作进程数: {processes}")
+
+    def submit(self, page_number, image):
+        """提交一页识别任务（页面的RGB数组），返回Future，结果为(page_number, OCR结果, 识别方向)"""
+        return self._executor.submit(_ocr_page, page_number, image)
+
+    def submit_image(self, image):
+        """提交一张图像的识别任务，返回Future，结果为OCR结果"""
+        return self._executor.submit(_ocr_image, image)
+
+    def shutdown(self, wait=True):
+        """关闭进程池"""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,142 @@
+"""
+页面OCR文本框存储模块
+
+每页的原始识别结果（文本框、置信度、文字）以紧凑的列式二进制文件保存在页面图片旁（page_N.boxes），
+版面分析、重新排版和检索高亮可以直接内存映射读取，无需重新OCR。
+
+文件格式（小端序，各段按8字节对齐）：
+    文件头   magic(8) 行数(uint32) 文字总字节数(uint32) 页面宽度(uint32) 页面高度(uint32)
+    文本框   int16[行数, 4, 2]，页面图片像素坐标，顺时针，从左上角开始
+    置信度   float16[行数]
+    偏移     uint32[行数 + 1]，第i行文字为文字段[偏移[i]:偏移[i+1]]
+    文字     各行UTF-8文字依次拼接
+"""
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"OCRBOX1\0"
+HEADER = struct.Struct("<8sIIII")
+ALIGN = 8
+
+INT16_MIN, INT16_MAX = -32768, 32767
+
+
+def boxes_path(page_image_path):
+    """页面图片对应的文本框文件路径"""
+    return Path(page_image_path).with_suffix(".boxes")
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _layout(count, blob_size):
+    """各段在文件中的起始位置：(文本框, 置信度, 偏移, 文字, 文件总长)"""
+    boxes_start = _aligned(HEADER.size)
+    confidences_start = _aligned(boxes_start + count * 16)
+    offsets_start = _aligned(confidences_start + count * 2)
+    blob_start = _aligned(offsets_start + (count + 1) * 4)
+    return boxes_start, confidences_start, offsets_start, blob_start, blob_start + blob_size
+
+
+def write_page_boxes(path, ocr_result, page_width, page_height):
+    """
+    保存一页的识别结果
+
+    Args:
+        path: 文本框文件路径
+        ocr_result: 页面图片坐标下的OCR结果，格式为[[box, (text, confidence)], ...]
+        page_width: 页面图片宽度
+        page_height: 页面图片高度
+    """
+    lines = [line for line in ocr_result or [] if line]
+    texts = [line[1][0].encode("utf-8") for line in lines]
+    count = len(lines)
+
+    boxes = np.zeros((count, 4, 2), dtype="<i2")
+    if count:
+        boxes[:] = np.clip(np.rint(np.array([line[0] for line in lines], dtype=np.float64)), INT16_MIN, INT16_MAX)
+    confidences = np.array([line[1][1] for line in lines], dtype="<f2")
+    offsets = np.zeros(count + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(text) for text in texts])
+    blob = b"".join(texts)
+
+    boxes_start, confidences_start, offsets_start, blob_start, total = _layout(count, len(blob))
+    buffer = bytearray(total)
+    buffer[:HEADER.size] = HEADER.pack(MAGIC, count, len(blob), int(page_width), int(page_height))
+    buffer[boxes_start:boxes_start + boxes.nbytes] = boxes.tobytes()
+    buffer[confidences_start:confidences_start + confidences.nbytes] = confidences.tobytes()
+    buffer[offsets_start:offsets_start + offsets.nbytes] = offsets.tobytes()
+    buffer[blob_start:] = blob
+
+    # 先写临时文件再替换，读取方不会看到写了一半的文件
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(buffer)
+    os.replace(tmp_path, path)
+
+
+class PageBoxes:
+    """内存映射读取的一页识别结果"""
+
+    def __init__(self, path):
+        """
+        打开文本框文件，只读取文件头，各段按需从映射的页面中读取
+
+        Args:
+            path: 文本框文件路径
+        """
+        self.path = Path(path)
+        self._data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        magic, count, blob_size, self.page_width, self.page_height = HEADER.unpack(bytes(self._data[:HEADER.size]))
+        if magic != MAGIC:
+            raise ValueError(f"不是有效的文本框文件: {path}")
+
+        boxes_start, confidences_start, offsets_start, blob_start, total = _layout(count, blob_size)
+        if len(self._data) < total:
+            raise ValueError(f"文本框文件不完整: {path}")
+
+        self.boxes = self._data[boxes_start:boxes_start + count * 16].view("<i2").reshape(count, 4, 2)
+        self.confidences = self._data[confidences_start:confidences_start + count * 2].view("<f2")
+        self.offsets = self._data[offsets_start:offsets_start + (count + 1) * 4].view("<u4")
+        self._blob = self._data[blob_start:blob_start + blob_size]
+
+    def __len__(self):
+        return len(self.confidences)
+
+    def text(self, index):
+        """第index行的文字"""
+        return bytes(self._blob[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+    def texts(self):
+        """所有行的文字"""
+        blob = bytes(self._blob)
+        return [blob[start:end].decode("utf-8") for start, end in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def find(self, query):
+        """文字包含query的行号列表，用于检索高亮"""
+        return [index for index, text in enumerate(self.texts()) if query in text]
+
+    def bounds(self):
+        """所有文本框的外接矩形(x0, y0, x1, y1)，没有文本框时返回None"""
+        if not len(self):
+            return None
+        return (int(self.boxes[:, :, 0].min()), int(self.boxes[:, :, 1].min()),
+                int(self.boxes[:, :, 0].max()), int(self.boxes[:, :, 1].max()))
+
+    def to_ocr_result(self):
+        """转换回OCR结果格式[[box, (text, confidence)], ...]"""
+        return [
+            [box.tolist(), (text, float(confidence))]
+            for box, text, confidence in zip(self.boxes, self.texts(), self.confidences)
+        ]
+
+
+def load_page_boxes(page_image_path):
+    """读取页面图片对应的文本框文件，文件不存在时返回None"""
+    path = boxes_path(page_image_path)
+    return PageBoxes(path) if path.exists() else None
@@ -0,0 +1,189 @@
+"""
+分阶段页面处理流水线模块
+
+PDF的各页依次经过渲染、保存、识别和分析几个阶段。每个阶段由各自的工作线程处理，
+阶段之间用有界队列连接：OCR识别时，下一页已在渲染和保存，上一页在分析。
+队列满时上游阶段等待，在途页面数（即内存占用）有上限。
+各阶段的队列深度和忙碌时间可用于判断瓶颈所在：队列长期满的阶段之后就是瓶颈。
+"""
+import time
+import queue
+import logging
+import threading
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Page_Pipeline")
+
+# 队列结束标记
+_DONE = object()
+
+# 等待队列时检查停止标记的间隔（秒）
+_POLL_INTERVAL = 0.1
+
+
+class PipelineStage:
+    """流水线的一个阶段"""
+
+    def __init__(self, name, func, workers=1):
+        """
+        Args:
+            name: 阶段名称
+            func: 处理函数，接收上一阶段的输出，返回交给下一阶段的结果
+            workers: 工作线程数。使用同一PaddleOCR引擎或写SQLite的阶段应保持为1
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.processed = 0
+        self.busy_seconds = 0.0
+
+
+class StagedPipeline:
+    """由有界队列连接的多阶段流水线"""
+
+    def __init__(self, stages, queue_size=2, name="pipeline"):
+        """
+        初始化流水线
+
+        Args:
+            stages: PipelineStage列表，按处理顺序排列
+            queue_size: 每个阶段输入队列的容量
+            name: 流水线名称，用于线程名和日志
+        """
+        self.stages = stages
+        self.queue_size = max(1, int(queue_size))
+        self.name = name
+        # 第i个队列是第i个阶段的输入，最后一个队列是整条流水线的输出
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(stages) + 1)]
+        self._remaining = [stage.workers for stage in stages]
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._error = None
+
+    def run(self, source):
+        """
+        运行流水线
+
+        source在单独的线程中迭代，作为第一个阶段（如渲染PDF页面）。
+        任一阶段出错时停止整条流水线，并在调用方线程中重新抛出该异常；
+        调用方提前停止迭代时，各阶段处理完手头的一项后退出。
+
+        Args:
+            source: 输入项的可迭代对象
+
+        Yields:
+            最后一个阶段的输出，按完成顺序
+        """
+        threads = [threading.Thread(target=self._feed, args=(source,), name=f"{self.name}-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            for worker in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(index,), name=f"{self.name}-{stage.name}-{worker}", daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = self._get(self._queues[-1])
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        """各阶段的输入队列深度、工作线程数、已处理项数和累计忙碌时间"""
+        return [
+            {
+                "stage": stage.name,
+                "queued": self._queues[index].qsize(),
+                "queue_size": self.queue_size,
+                "workers": stage.workers,
+                "processed": stage.processed,
+                "busy_seconds": round(stage.busy_seconds, 2)
+            }
+            for index, stage in enumerate(self.stages)
+        ]
+
+    def _fail(self, error):
+        """记录第一个异常并停止流水线"""
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _put(self, target, item):
+        """放入队列，队列满时等待；流水线停止时返回False"""
+        while not self._stop.is_set():
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source):
+        """从队列取出一项，队列空时等待；流水线停止时返回结束标记"""
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _feed(self, source):
+        """迭代输入，放入第一个阶段的队列"""
+        iterator = iter(source)
+        try:
+            for item in iterator:
+                if not self._put(self._queues[0], item):
+                    break
+            else:
+                self._put(self._queues[0], _DONE)
+        except Exception as e:
+            logger.exception(f"{self.name}输入出错: {e}")
+            self._fail(e)
+        finally:
+            # 提前停止时关闭生成器，释放其持有的资源
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def _work(self, index):
+        """阶段工作线程：从输入队列取出一项，处理后放入下一阶段的队列"""
+        stage = self.stages[index]
+        inbox, outbox = self._queues[index], self._queues[index + 1]
+        try:
+            while True:
+                item = self._get(inbox)
+                if item is _DONE:
+                    if not self._stop.is_set():
+                        # 放回结束标记，让同一阶段的其他工作线程也能退出
+                        inbox.put(_DONE)
+                    break
+
+                start = time.perf_counter()
+                result = stage.func(item)
+                with self._lock:
+                    stage.processed += 1
+                    stage.busy_seconds += time.perf_counter() - start
+
+                if not self._put(outbox, result):
+                    break
+        except Exception as e:
+            logger.exception(f"{self.name}阶段{stage.name}出错: {e}")
+            self._fail(e)
+        finally:
+            with self._lock:
+                self._remaining[index] -= 1
+                last = self._remaining[index] == 0
+            # 同一阶段的最后一个工作线程退出时，通知下一阶段输入已结束
+            if last and not self._stop.is_set():
+                self._put(outbox, _DONE)
@@ -0,0 +1,100 @@
+"""
+按区域渲染PDF页面模块
+
+两遍分辨率模式先以低DPI渲染整页并检测文字区域，再把这些区域换算到高DPI整页图像中裁出识别。
+大幅照片、广告和页边空白不再送入识别。render_pdf_region也可通过pdftoppm的裁剪参数
+（-x/-y/-W/-H）只渲染页面的一个区域。
+"""
+import os
+import logging
+import subprocess
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Region_Raster")
+
+# 文字区域合计面积超过页面的该比例时，直接以高DPI渲染整页
+FULL_PAGE_RATIO = 0.7
+
+
+def find_text_regions(boxes, height, width, margin=8):
+    """
+    把检测出的文本框合并为若干矩形文字区域
+
+    在低分辨率掩膜上填充文本框并膨胀，使相邻文本行连成一片，再取各连通区域的外接矩形。
+
+    Args:
+        boxes: 低分辨率页面上的文本框列表
+        height: 低分辨率页面高度
+        width: 低分辨率页面宽度
+        margin: 区域向外扩展的像素数
+
+    Returns:
+        [(x, y, w, h), ...] 低分辨率坐标下的文字区域
+    """
+    mask = np.zeros((height, width), dtype=np.uint8)
+    for box in boxes:
+        cv2.fillPoly(mask, [np.array(box, dtype=np.int32)], 255)
+    kernel = np.ones((margin * 2 + 1, margin * 2 + 1), dtype=np.uint8)
+    mask = cv2.dilate(mask, kernel)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    regions = [cv2.boundingRect(contour) for contour in contours]
+    # 从上到下、从左到右
+    return sorted(regions, key=lambda region: (region[1], region[0]))
+
+
+def render_pdf_region(pdf_path, page_number, dpi, region=None, poppler_path=None):
+    """
+    用pdftoppm以指定DPI渲染PDF页面的一个区域
+
+    Args:
+        pdf_path: PDF文件路径
+        page_number: 页码，从1开始
+        dpi: 渲染分辨率
+        region: (x, y, w, h)，该DPI下的像素坐标；None表示整页
+        poppler_path: Poppler路径，None表示使用系统路径
+
+    Returns:
+        RGB图像数组
+    """
+    executable = "pdftoppm.exe" if os.name == 'nt' else "pdftoppm"
+    if poppler_path:
+        executable = str(Path(poppler_path) / executable)
+
+    command = [executable, "-f", str(page_number), "-l", str(page_number), "-r", str(dpi)]
+    if region is not None:
+        x, y, w, h = region
+        command += ["-x", str(x), "-y", str(y), "-W", str(w), "-H", str(h)]
+    command.append(str(pdf_path))
+
+    completed = subprocess.run(command, capture_output=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"pdftoppm渲染第{page_number}页失败: {completed.stderr.decode(errors='replace')}")
+
+    image = cv2.imdecode(np.frombuffer(completed.stdout, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise RuntimeError(f"pdftoppm第{page_number}页输出无法解码")
+    # 与pdf2image渲染的PIL页面保持一致，使用RGB
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def scale_region(region, factor, height, width):
+    """把低分辨率区域换算到高分辨率坐标，并限制在页面范围内"""
+    x, y, w, h = region
+    x0 = max(0, int(x * factor))
+    y0 = max(0, int(y * factor))
+    x1 = min(width, int((x + w) * factor + 0.5))
+    y1 = min(height, int((y + h) * factor + 0.5))
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def offset_ocr_result(ocr_result, dx, dy):
+    """把区域内的OCR结果平移到整页坐标"""
+    return [
+        [[[float(x) + dx, float(y) + dy] for x, y in box], rec]
+        for box, rec in ocr_result or []
+    ]
@@ -0,0 +1,114 @@
+"""
+低置信度文本行二次识别模块
+
+第一遍整页识别后，只挑出置信度低于阈值的文本行，对每行生成几种候选裁剪图像
+（外扩边距并放大、图像增强、反方向旋转），一次批量送入识别模型，保留置信度最高的结果。
+每页最多二次识别max_lines行，代价远小于整页重新识别。
+"""
+import logging
+
+import cv2
+import numpy as np
+
+from batch_recognizer import crop_text_box
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("ReOCR")
+
+# 文本框外扩的比例（相对文本行高度），检测框截断笔画是低置信度的常见原因
+PAD_RATIO = 0.15
+
+# 行高低于该像素数的裁剪图像先放大两倍再识别
+UPSCALE_BELOW = 32
+
+
+def select_weak_lines(ocr_result, threshold, max_lines):
+    """
+    选出需要二次识别的文本行
+
+    Returns:
+        行号列表，置信度最低的在前，最多max_lines行
+    """
+    weak = [index for index, line in enumerate(ocr_result) if line[1][1] < threshold]
+    weak.sort(key=lambda index: ocr_result[index][1][1])
+    return weak[:max_lines]
+
+
+def pad_box(box, height, width, ratio=PAD_RATIO):
+    """按文本行高度向外扩展文本框，并限制在图像范围内"""
+    points = np.array(box, dtype=np.float32)
+    center = points.mean(axis=0)
+    line_height = min(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[0] - points[1]))
+    direction = points - center
+    norms = np.linalg.norm(direction, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    padded = points + direction / norms * line_height * ratio
+    padded[:, 0] = np.clip(padded[:, 0], 0, width - 1)
+    padded[:, 1] = np.clip(padded[:, 1], 0, height - 1)
+    return padded.tolist()
+
+
+def candidate_crops(image, box, enhance=None):
+    """
+    生成一行文字的候选裁剪图像
+
+    Args:
+        image: 第一遍识别所用的图像
+        box: 文本框
+        enhance: 图像增强函数，None表示不生成增强候选
+
+    Returns:
+        候选裁剪图像列表
+    """
+    height, width = image.shape[:2]
+    crop = crop_text_box(image, box)
+    padded = crop_text_box(image, pad_box(box, height, width))
+    if padded.shape[0] < UPSCALE_BELOW:
+        padded = cv2.resize(padded, (padded.shape[1] * 2, padded.shape[0] * 2), interpolation=cv2.INTER_CUBIC)
+
+    candidates = [padded]
+    if enhance is not None:
+        candidates.append(enhance(padded))
+    # 角度分类器判断错误时，反方向旋转后可能识别正确
+    candidates.append(np.ascontiguousarray(np.rot90(crop, 2)))
+    return candidates
+
+
+def reocr_weak_lines(image, ocr_result, recognize_crops, threshold, max_lines, enhance=None):
+    """
+    二次识别低置信度的文本行
+
+    Args:
+        image: 第一遍识别所用的图像
+        ocr_result: 第一遍OCR结果
+        recognize_crops: 批量识别裁剪图像的函数，返回[(text, confidence), ...]
+        threshold: 置信度低于该值的行进行二次识别
+        max_lines: 每页最多二次识别的行数
+        enhance: 图像增强函数
+
+    Returns:
+        (OCR结果, 结果被替换的行数)
+    """
+    weak = select_weak_lines(ocr_result, threshold, max_lines)
+    if not weak:
+        return ocr_result, 0
+
+    crops = []
+    owners = []
+    for index in weak:
+        for crop in candidate_crops(image, ocr_result[index][0], enhance):
+            crops.append(crop)
+            owners.append(index)
+
+    best = {}
+    for index, rec in zip(owners, recognize_crops(crops) or []):
+        if rec and rec[0] and rec[1] > best.get(index, ocr_result[index][1])[1]:
+            best[index] = (rec[0], float(rec[1]))
+
+    result = [
+        [line[0], best[index]] if index in best else line
+        for index, line in enumerate(ocr_result)
+    ]
+    logger.info(f"二次识别{len(weak)}行低置信度文本（{len(crops)}个候选），{len(best)}行结果被替换")
+    return result, len(best)
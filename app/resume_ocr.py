@@ -0,0 +1,72 @@
+"""
+断点续处理命令
+
+从第一个未完成的页面继续处理失败或中断的报纸，已写入数据库的页面不会重新识别。
+
+用法:
+    python app/resume_ocr.py 12 15      # 继续处理指定的报纸
+    python app/resume_ocr.py --all      # 继续处理所有未完成的报纸
+"""
+import os
+import sys
+import argparse
+import logging
+
+# 将app目录添加到Python路径，以便能正确导入模块
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from dotenv import load_dotenv
+
+# 加载环境变量
+load_dotenv()
+
+from database import init_db, get_unfinished_newspapers
+from ocr_handler import OCRHandlerSet, handler_options_from_env
+from engine_registry import EngineRegistry
+
+# 设置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("Resume_OCR")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="继续处理失败或中断的报纸")
+    parser.add_argument("newspaper_ids", type=int, nargs="*", help="要继续处理的报纸ID")
+    parser.add_argument("--all", action="store_true", help="继续处理所有未完成的报纸")
+    args = parser.parse_args()
+
+    init_db()
+
+    newspaper_ids = list(args.newspaper_ids)
+    if args.all:
+        newspaper_ids += [newspaper.id for newspaper in get_unfinished_newspapers()]
+    if not newspaper_ids:
+        parser.print_help()
+        return 1
+
+    # 每份报纸使用与已处理页面相同文字类型和方向的处理器（与Web应用一致），各处理器共用已加载的识别模型
+    handlers = OCRHandlerSet(handler_options_from_env(), EngineRegistry(
+        memory_budget_mb=int(os.getenv('OCR_ENGINE_BUDGET_MB', '2048')),
+        engine_mb=int(os.getenv('OCR_ENGINE_MB', '500'))
+    ))
+    failed = 0
+    for newspaper_id in newspaper_ids:
+        def on_progress(page_number, total_pages, _):
+            logger.info(f"报纸 {newspaper_id}: {page_number}/{total_pages}页")
+
+        try:
+            handlers.for_newspaper(newspaper_id).resume_newspaper(newspaper_id, progress_callback=on_progress)
+            logger.info(f"报纸 {newspaper_id} 处理完成")
+        except Exception as e:
+            failed += 1
+            logger.error(f"报纸 {newspaper_id} 继续处理失败: {e}")
+
+    logger.info(f"共{len(newspaper_ids)}份报纸，失败{failed}份")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+文章全文检索索引模块
+
+使用SQLite FTS5为文章标题和内容建立倒排索引，按BM25相关度排序。
+FTS5自带的unicode61分词器会把连续的汉字当作一个词，因此汉字在写入索引前先切分为重叠的二元组：
+"上海市政府" -> "上海 海市 市政 政府 府"（末尾单字用于单字查询）。
+查询时同样切分，多字查询成为二元组短语（要求相邻），等价于子串匹配；单字查询使用前缀匹配。
+
+索引为无内容表（content=''），只保存倒排表，不重复保存文章原文，行号即文章ID。
+单独运行本模块可以重建索引：
+    python app/search_index.py
+"""
+import re
+import html
+import logging
+
+from sqlalchemy import text, func, Integer
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.ext.compiler import compiles
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Search_Index")
+
+FTS_TABLE = "article_fts"
+
+# BM25中标题和内容列的权重
+TITLE_WEIGHT = 2.0
+CONTENT_WEIGHT = 1.0
+
+# 摘要长度（字符）
+SNIPPET_LENGTH = 120
+
+# 中日韩统一表意文字（含扩展A区和兼容区）
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_SEGMENT_RE = re.compile(f"[{_CJK}]+|[^\\W_{_CJK}]+")
+_CJK_RE = re.compile(f"[{_CJK}]")
+
+# 每次重建索引读取的文章数
+_REBUILD_CHUNK = 1000
+
+# 各进程缓存的索引是否存在
+_index_exists = None
+
+
+def _segments(value):
+    """切分为(片段, 是否为汉字)列表，标点和空白作为分隔"""
+    return [(match, bool(_CJK_RE.match(match))) for match in _SEGMENT_RE.findall(value or "")]
+
+
+def index_text(value):
+    """把文本转换为写入索引的词序列：汉字切分为重叠二元组加末尾单字，其他文字按词保留"""
+    tokens = []
+    for segment, is_cjk in _segments(value):
+        if is_cjk:
+            tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+            tokens.append(segment[-1])
+        else:
+            tokens.append(segment)
+    return " ".join(tokens)
+
+
+def match_query(query):
+    """
+    把用户输入转换为FTS5查询表达式
+
+    空白分隔的各词之间为AND关系；每个词内部的片段组成短语，要求在文中相邻出现
+
+    Returns:
+        查询表达式，输入中没有可检索的文字时返回None
+    """
+    parts = []
+    for term in query.split():
+        phrase = []
+        for segment, is_cjk in _segments(term):
+            if not is_cjk:
+                phrase.append(segment)
+            elif len(segment) > 1:
+                phrase.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+            else:
+                # 单字只能以前缀形式匹配以它开头的二元组或末尾单字，前缀只能用在短语末尾
+                phrase.append(segment)
+                parts.append('"' + " ".join(phrase) + '"*')
+                phrase = []
+        if phrase:
+            parts.append('"' + " ".join(phrase) + '"')
+    return " ".join(parts) or None
+
+
+class _position(FunctionElement):
+    """子串在文本中的位置（从1开始，找不到时为0）：SQLite/MySQL为instr，PostgreSQL为strpos"""
+    name = "position"
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(_position)
+def _compile_position(element, compiler, **kw):
+    return f"instr({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(_position, "postgresql")
+def _compile_position_postgresql(element, compiler, **kw):
+    return f"strpos({compiler.process(element.clauses, **kw)})"
+
+
+class _greatest(FunctionElement):
+    """两个值中较大的一个：SQLite中双参数的max()是标量函数，其他数据库中max()是聚合函数，使用greatest()"""
+    name = "greatest"
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(_greatest)
+def _compile_greatest(element, compiler, **kw):
+    return f"greatest({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(_greatest, "sqlite")
+def _compile_greatest_sqlite(element, compiler, **kw):
+    return f"max({compiler.process(element.clauses, **kw)})"
+
+
+def snippet_columns(column, query, length=SNIPPET_LENGTH):
+    """
+    在SQL中截取第一个查询词附近的片段，只把片段而不是全文读入Python
+
+    Args:
+        column: 文本列
+        query: 用户输入的查询
+        length: 片段长度（字符）
+
+    Returns:
+        (片段起始位置表达式, 片段表达式)，起始位置从1开始；找不到查询词时从开头截取
+    """
+    terms = query.split()
+    position = _position(column, terms[0]) if terms else 0
+    start = _greatest(position - length // 3, 1)
+    return start, func.substr(column, start, length)
+
+
+def format_snippet(start, window, query, length=SNIPPET_LENGTH):
+    """
+    转义snippet_columns截取的片段并用<mark>标记查询词，截断处加省略号
+
+    Returns:
+        可直接插入页面的HTML片段
+    """
+    window = window or ""
+    terms = sorted({term for term in query.split() if term}, key=len, reverse=True)
+    pieces = []
+    position = 0
+    if terms:
+        pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+        for match in pattern.finditer(window):
+            pieces.append(html.escape(window[position:match.start()]))
+            pieces.append(f"<mark>{html.escape(match.group())}</mark>")
+            position = match.end()
+    pieces.append(html.escape(window[position:]))
+    return ("..." if start and start > 1 else "") + "".join(pieces) + ("..." if len(window) >= length else "")
+
+
+def index_available(connection):
+    """当前数据库是否有全文索引（非SQLite或SQLite未编译FTS5时没有）"""
+    global _index_exists
+    if _index_exists is None:
+        if connection.dialect.name != "sqlite":
+            _index_exists = False
+        else:
+            _index_exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+            ).first() is not None
+    return _index_exists
+
+
+def create_index(connection):
+    """
+    创建全文索引并为已有文章建立索引，由数据库迁移调用
+
+    Returns:
+        索引是否可用
+    """
+    global _index_exists
+    _index_exists = None
+    if index_available(connection):
+        return True
+    try:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, content, content='', tokenize='unicode61')"
+        ))
+    except Exception as e:
+        logger.warning(f"SQLite不支持FTS5，内容搜索将使用LIKE查询: {e}")
+        _index_exists = False
+        return False
+    _index_exists = True
+    rebuild_index(connection)
+    return True
+
+
+def index_articles(connection, articles):
+    """
+    把文章写入索引，应与文章记录在同一事务中调用
+
+    Args:
+        connection: 数据库连接
+        articles: (文章ID, 标题, 内容)列表
+    """
+    if not articles or not index_available(connection):
+        return
+    connection.execute(
+        text(f"INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (:id, :title, :content)"),
+        [
+            {"id": article_id, "title": index_text(title), "content": index_text(content)}
+            for article_id, title, content in articles
+        ]
+    )
+
+
+def _article_rows_sql(connection):
+    """读取文章ID、标题和内容的SQL，兼容文章内容改为引用页面文本区间（迁移5）之前的结构"""
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(article)")}
+    if "content_start" not in columns:
+        return "SELECT id, title, content FROM article WHERE id > :last_id ORDER BY id LIMIT :limit"
+    return (
+        "SELECT article.id, article.title, CASE WHEN article.content IS NOT NULL THEN inflate(article.content) "
+        "ELSE substr(inflate(newspaper_page.ocr_text), article.content_start + 1, "
+        "article.content_end - article.content_start) END "
+        "FROM article LEFT JOIN newspaper_page ON newspaper_page.id = article.page_id "
+        "WHERE article.id > :last_id ORDER BY article.id LIMIT :limit"
+    )
+
+
+def rebuild_index(connection):
+    """清空索引后为所有文章重新建立索引"""
+    connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')"))
+    rows_sql = _article_rows_sql(connection)
+    last_id = 0
+    total = 0
+    while True:
+        rows = connection.execute(
+            text(rows_sql), {"last_id": last_id, "limit": _REBUILD_CHUNK}
+        ).all()
+        if not rows:
+            break
+        index_articles(connection, rows)
+        last_id = rows[-1][0]
+        total += len(rows)
+    logger.info(f"全文索引已重建，共{total}篇文章")
+    return total
+
+
+def search_article_ids(connection, query, limit=50):
+    """
+    按BM25相关度检索文章
+
+    Returns:
+        [(文章ID, 相关度分数)]，分数越小越相关；查询中没有可检索的文字时返回空列表
+    """
+    expression = match_query(query)
+    if expression is None:
+        return []
+    rows = connection.execute(
+        text(
+            f"SELECT rowid, bm25({FTS_TABLE}, :title_weight, :content_weight) AS score "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :query ORDER BY score LIMIT :limit"
+        ),
+        {"query": expression, "limit": limit, "title_weight": TITLE_WEIGHT, "content_weight": CONTENT_WEIGHT}
+    )
+    return [(row[0], row[1]) for row in rows]
+
+
+if __name__ == "__main__":
+    from database import engine, init_db
+
+    init_db()
+    with engine.begin() as connection:
+        if index_available(connection):
+            rebuild_index(connection)
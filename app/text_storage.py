@@ -0,0 +1,91 @@
+"""
+OCR文本压缩存储模块
+
+页面OCR文本以zlib压缩后的BLOB保存，读取时由CompressedText类型透明解压；
+文章内容与页面文本相同或是其中一段时，只保存在页面文本中的区间，不重复存储。
+
+SQL中使用inflate()函数解压（每个SQLite连接注册，见database.py），因此截取摘要等操作仍可在SQL中完成：
+    SELECT substr(inflate(ocr_text), 1, 200) FROM newspaper_page
+旧版本以TEXT保存的未压缩文本可以直接读取，inflate()原样返回。
+
+只有SQLite数据库压缩存储；其他数据库没有inflate()函数，文本不压缩，查询中的inflated()直接使用列值。
+"""
+import zlib
+
+from sqlalchemy.types import TypeDecorator, Text
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.ext.compiler import compiles
+
+# zlib压缩级别，6为速度和压缩率的常用折中
+COMPRESS_LEVEL = 6
+
+
+def compress_text(value):
+    """压缩文本，None原样返回"""
+    if value is None:
+        return None
+    return zlib.compress(value.encode("utf-8"), COMPRESS_LEVEL)
+
+
+def inflate(value):
+    """解压compress_text的结果；未压缩的文本（旧数据）和None原样返回"""
+    if value is None or isinstance(value, str):
+        return value
+    return zlib.decompress(value).decode("utf-8")
+
+
+def text_span(page_text, content):
+    """
+    文章内容在页面文本中的区间
+
+    Returns:
+        (起始位置, 结束位置)字符偏移，内容不是页面文本的一段时返回None
+    """
+    if page_text is None or content is None:
+        return None
+    if content == page_text:
+        return 0, len(page_text)
+    start = page_text.find(content) if content else -1
+    if start < 0:
+        return None
+    return start, start + len(content)
+
+
+class CompressedText(TypeDecorator):
+    """
+    压缩存储的文本列
+
+    列类型仍声明为TEXT，与旧数据库一致；SQLite按值的实际类型存储，压缩后的值保存为BLOB。
+    其他数据库的TEXT列不能保存二进制值，也无法在SQL中解压，按原文保存
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if dialect.name != "sqlite":
+            return value
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return inflate(value)
+
+
+class inflated(FunctionElement):
+    """
+    SQL中解压CompressedText列的值
+
+    SQLite编译为inflate(列)；其他数据库不压缩存储，直接使用列值
+    """
+    name = "inflated"
+    type = Text()
+    inherit_cache = True
+
+
+@compiles(inflated)
+def _compile_inflated(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(inflated, "sqlite")
+def _compile_inflated_sqlite(element, compiler, **kw):
+    return f"inflate({compiler.process(element.clauses, **kw)})"
@@ -0,0 +1,175 @@
+"""
+分块OCR模块
+
+整版大报在300dpi下尺寸很大，检测模型内部会把整页缩小，细小的正文容易漏检。
+分块模式把页面切成相互重叠的小块分别识别，再把文本框换算回整页坐标，
+合并重叠区域内重复识别的文本框。
+
+单独运行本模块可以对比整页识别和分块识别的耗时与识别行数：
+    python app/tiled_ocr.py page.jpg --tile-size 1600 --overlap 200
+"""
+import logging
+
+import numpy as np
+
+from batch_recognizer import sort_boxes
+
+# 设置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("Tiled_OCR")
+
+# 两个文本框的交集占较小文本框面积的比例超过该值时视为重复
+DUPLICATE_OVERLAP = 0.6
+
+# 文本框距分块内侧边缘小于该像素数时，认为它可能被分块边界截断
+EDGE_MARGIN = 4
+
+
+def iter_tiles(height, width, tile_size, overlap):
+    """
+    生成覆盖整页的重叠分块
+
+    Args:
+        height: 页面高度
+        width: 页面宽度
+        tile_size: 分块边长
+        overlap: 相邻分块的重叠像素数
+
+    Yields:
+        (x0, y0, x1, y1) 分块在整页中的坐标
+    """
+    step = max(1, tile_size - overlap)
+
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    for y0 in starts(height):
+        for x0 in starts(width):
+            yield x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height)
+
+
+def _bounds(box):
+    points = np.array(box)
+    return points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()
+
+
+def _overlap_ratio(a, b):
+    """交集面积占较小文本框面积的比例"""
+    ix = min(a[2], b[2]) - max(a[0], b[0])
+    iy = min(a[3], b[3]) - max(a[1], b[1])
+    if ix <= 0 or iy <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return ix * iy / smaller if smaller > 0 else 0.0
+
+
+def merge_tile_results(tile_results, height, width):
+    """
+    把各分块的识别结果换算到整页坐标并去除重复
+
+    重叠区域内的同一行文字会被相邻分块各识别一次，优先保留未被分块边界截断的文本框，
+    其次保留文字更长、置信度更高的结果。
+
+    Args:
+        tile_results: [((x0, y0, x1, y1), 分块OCR结果), ...]
+        height: 页面高度
+        width: 页面宽度
+
+    Returns:
+        整页OCR结果，格式为[[box, (text, confidence)], ...]
+    """
+    candidates = []
+    for (x0, y0, x1, y1), ocr_result in tile_results:
+        for box, (text, confidence) in ocr_result or []:
+            page_box = [[float(x) + x0, float(y) + y0] for x, y in box]
+            bounds = _bounds(page_box)
+            # 只有分块的内侧边缘（不是页面边缘）会截断文字
+            truncated = (
+                (x0 > 0 and bounds[0] - x0 < EDGE_MARGIN) or
+                (y0 > 0 and bounds[1] - y0 < EDGE_MARGIN) or
+                (x1 < width and x1 - bounds[2] < EDGE_MARGIN) or
+                (y1 < height and y1 - bounds[3] < EDGE_MARGIN)
+            )
+            candidates.append((page_box, bounds, text, confidence, truncated))
+
+    # 质量高的候选排在前面，依次保留与已保留文本框不重复的候选
+    candidates.sort(key=lambda c: (c[4], -len(c[2]), -c[3]))
+    kept = []
+    for candidate in candidates:
+        if all(_overlap_ratio(candidate[1], other[1]) < DUPLICATE_OVERLAP for other in kept):
+            kept.append(candidate)
+
+    return [[c[0], (c[2], c[3])] for c in sort_boxes(kept, key=lambda c: c[0])]
+
+
+def ocr_tiled(image, tile_size, overlap, recognize, pool=None):
+    """
+    分块识别整页图像
+
+    Args:
+        image: 页面图像
+        tile_size: 分块边长
+        overlap: 相邻分块的重叠像素数
+        recognize: 识别单个分块的函数，返回OCR结果
+        pool: OCRWorkerPool，提供时各分块并行识别
+
+    Returns:
+        整页OCR结果
+    """
+    height, width = image.shape[:2]
+    tiles = list(iter_tiles(height, width, tile_size, overlap))
+
+    if pool is not None:
+        futures = [
+            (tile, pool.submit_image(np.ascontiguousarray(image[tile[1]:tile[3], tile[0]:tile[2]])))
+            for tile in tiles
+        ]
+        tile_results = [(tile, future.result()) for tile, future in futures]
+    else:
+        tile_results = [
+            (tile, recognize(np.ascontiguousarray(image[tile[1]:tile[3], tile[0]:tile[2]])))
+            for tile in tiles
+        ]
+
+    merged = merge_tile_results(tile_results, height, width)
+    logger.info(f"分块识别完成: {len(tiles)}个分块, 合并后{len(merged)}行")
+    return merged
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import cv2
+
+    from ocr_handler import OCRHandler
+
+    parser = argparse.ArgumentParser(description="对比整页识别与分块识别")
+    parser.add_argument("image", help="页面图片路径")
+    parser.add_argument("--tile-size", type=int, nargs="+", default=[1280, 1600, 2048], help="分块边长，可指定多个")
+    parser.add_argument("--overlap", type=int, default=200, help="相邻分块的重叠像素数")
+    args = parser.parse_args()
+
+    page = cv2.imread(args.image)
+    if page is None:
+        raise SystemExit(f"无法读取图片: {args.image}")
+
+    handler = OCRHandler()
+    handler.ocr.ocr(np.full((64, 256, 3), 255, dtype=np.uint8), cls=True)  # 预热
+
+    def report(label, run):
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        chars = sum(len(line[1][0]) for line in result)
+        print(f"{label:<24} 耗时 {elapsed:7.2f}s  行数 {len(result):5d}  字数 {chars:6d}")
+
+    print(f"页面尺寸: {page.shape[1]}x{page.shape[0]}")
+    report("整页识别", lambda: (handler.ocr.ocr(page, cls=True) or [[]])[0] or [])
+    for size in args.tile_size:
+        report(f"分块 {size}/{args.overlap}",
+               lambda: ocr_tiled(page, size, args.overlap, lambda tile: (handler.ocr.ocr(tile, cls=True) or [[]])[0] or []))
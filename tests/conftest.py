@@ -0,0 +1,10 @@
+"""测试配置：app目录下的模块以顶层模块互相导入，加入导入路径；数据库使用临时文件"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+# database模块导入时按DB_PATH创建引擎，必须在导入前指定，测试不能写入实际的数据库
+os.environ["DB_PATH"] = f"sqlite:///{Path(tempfile.mkdtemp(prefix='newspaper_test_')) / 'test.db'}"
@@ -0,0 +1,85 @@
+"""跨页批量识别与整页识别结果一致性测试"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from batch_recognizer import BatchRecognizer, recognize_crops, classify_crops
+
+
+def make_boxes(count):
+    """每行一个文本框，从上到下排列"""
+    return [[[10, 20 + 40 * i], [210, 20 + 40 * i], [210, 50 + 40 * i], [10, 50 + 40 * i]] for i in range(count)]
+
+
+class FakePaddleOCR:
+    """
+    模拟paddleocr 2.6.1.3的PaddleOCR接口
+
+    ocr(列表, det=False)与2.6.1.3一致：列表按多页处理，每张图像单独识别，返回每张图像一项，
+    且第一次调用后page_num固定为第一个列表的长度
+    """
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.page_num = 0
+        self.recognized = 0
+
+    def _recognize(self, crops):
+        self.recognized += len(crops)
+        return [(f"行{crop.shape[1]}x{crop.shape[0]}", 0.9) for crop in crops], 0.0
+
+    def text_recognizer(self, crops):
+        return self._recognize(crops)
+
+    def text_classifier(self, crops):
+        return crops, [["0", 0.99] for _ in crops], 0.0
+
+    def ocr(self, img, det=True, rec=True, cls=True):
+        if det:
+            if not rec:
+                return [self.boxes]
+            return [[[box, ("行", 0.9)] for box in self.boxes]]
+        images = img if isinstance(img, list) else [img]
+        if self.page_num == 0:
+            self.page_num = len(images)
+        return [self._recognize([image])[0] for image in images[:self.page_num]]
+
+
+def test_batched_line_counts_match_whole_page():
+    boxes = make_boxes(8)
+    engine = FakePaddleOCR(boxes)
+    pages = {page: np.full((400, 240, 3), 255, dtype=np.uint8) for page in (1, 2, 3)}
+
+    unbatched = {page: engine.ocr(image, cls=True)[0] for page, image in pages.items()}
+
+    batcher = BatchRecognizer(engine, batch_size=5)
+    for page, image in pages.items():
+        batcher.add_page(page, image, boxes)
+    batched = batcher.recognize()
+
+    assert {page: len(lines) for page, lines in batched.items()} == \
+        {page: len(lines) for page, lines in unbatched.items()}
+    assert engine.recognized == 24
+    assert len(batcher) == 0
+
+
+def test_recognize_crops_one_result_per_crop():
+    engine = FakePaddleOCR([])
+    crops = [np.full((32, 100 + i, 3), 255, dtype=np.uint8) for i in range(4)]
+    crops.append(np.full((32, 50), 255, dtype=np.uint8))  # 灰度图像
+
+    results = recognize_crops(engine, crops)
+
+    assert [text for text, _ in results] == [f"行{crop.shape[1]}x32" for crop in crops]
+    assert recognize_crops(engine, []) == []
+
+
+def test_classify_crops_labels_every_crop():
+    engine = FakePaddleOCR([])
+    crops = [np.full((32, 100, 3), 255, dtype=np.uint8) for _ in range(3)]
+
+    images, labels = classify_crops(engine, crops)
+
+    assert len(images) == 3
+    assert labels == [("0", 0.99)] * 3
@@ -0,0 +1,77 @@
+"""数据库单写线程测试：组提交和写入失败时的逐个重试"""
+import threading
+
+import pytest
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from db_writer import DatabaseWriter
+
+
+@pytest.fixture
+def writer(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'writer.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)"))
+    writer = DatabaseWriter(sessionmaker(bind=engine))
+    yield writer
+    writer.close()
+    engine.dispose()
+
+
+def _insert(session, name):
+    return session.execute(text("INSERT INTO item (name) VALUES (:name)"), {"name": name}).lastrowid
+
+
+def _names(writer):
+    session = writer.session_factory()
+    try:
+        return sorted(row[0] for row in session.execute(text("SELECT name FROM item")))
+    finally:
+        session.close()
+
+
+def _block_writer(writer):
+    """提交一个阻塞写线程的写操作，返回释放它的Event；之后提交的写操作在队列中积压"""
+    started, release = threading.Event(), threading.Event()
+
+    def wait(session):
+        started.set()
+        release.wait(timeout=5)
+
+    writer.submit(wait)
+    assert started.wait(timeout=5)
+    return release
+
+
+def test_queued_writes_share_one_commit(writer):
+    release = _block_writer(writer)
+    futures = [writer.submit(_insert, f"page-{i}") for i in range(5)]
+    release.set()
+
+    assert [future.result(timeout=5) for future in futures] == [1, 2, 3, 4, 5]
+    assert writer.commits == 2
+    assert writer.writes == 6
+    assert _names(writer) == [f"page-{i}" for i in range(5)]
+
+
+def test_failed_write_does_not_roll_back_its_batch(writer):
+    writer.execute(_insert, "duplicate")
+    release = _block_writer(writer)
+    ok_before = writer.submit(_insert, "before")
+    failing = writer.submit(_insert, "duplicate")
+    ok_after = writer.submit(_insert, "after")
+    release.set()
+
+    with pytest.raises(sqlalchemy.exc.IntegrityError):
+        failing.result(timeout=5)
+    assert ok_before.result(timeout=5) and ok_after.result(timeout=5)
+    assert _names(writer) == ["after", "before", "duplicate"]
+
+
+def test_nested_submit_is_rejected(writer):
+    with pytest.raises(RuntimeError):
+        writer.execute(lambda session: writer.submit(_insert, "nested"))
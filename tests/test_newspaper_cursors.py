@@ -0,0 +1,77 @@
+"""报纸列表键集分页测试：上传时间相同的报纸按ID区分，前后翻页不重复、不遗漏"""
+import datetime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+import database
+from database import Newspaper
+
+
+@pytest.fixture(scope="module")
+def expected_order():
+    """写入7份报纸，其中5份上传时间相同，返回整个列表应有的顺序（报纸ID）"""
+    database.init_db()
+    ids = [database.add_newspaper(f"同时上传{i}", f"data/raw/tied_{i}.pdf") for i in range(7)]
+    tied = datetime.datetime(1937, 7, 7, 8, 0, 0)
+    session = database.get_session()
+    try:
+        for newspaper in session.query(Newspaper).filter(Newspaper.id.in_(ids)):
+            if newspaper.id in ids[1:6]:
+                newspaper.created_at = tied
+            else:
+                newspaper.created_at = tied + datetime.timedelta(seconds=1 if newspaper.id == ids[0] else -1)
+        session.commit()
+        rows = session.query(Newspaper.id).order_by(Newspaper.created_at.desc(), Newspaper.id.desc()).all()
+        return [row.id for row in rows]
+    finally:
+        session.close()
+
+
+def test_forward_pages_cover_ties_once(expected_order):
+    seen = []
+    cursor = None
+    while True:
+        newspapers, cursor, _ = database.get_newspaper_page(limit=2, before=cursor)
+        seen.extend(newspaper.id for newspaper in newspapers)
+        if cursor is None:
+            break
+
+    assert seen == expected_order
+
+
+def test_backward_pages_return_to_first_page(expected_order):
+    # 先翻到最后一页，再用上一页游标逐页翻回
+    forward = []
+    cursor = None
+    while True:
+        newspapers, cursor, prev_cursor = database.get_newspaper_page(limit=2, before=cursor)
+        forward.append([newspaper.id for newspaper in newspapers])
+        if cursor is None:
+            break
+
+    backward = []
+    while prev_cursor is not None:
+        newspapers, _, prev_cursor = database.get_newspaper_page(limit=2, after=prev_cursor)
+        backward.append([newspaper.id for newspaper in newspapers])
+
+    assert backward == forward[-2::-1]
+    assert backward[-1] == expected_order[:2]
+
+
+def test_cursor_round_trip_keeps_id_for_tied_timestamps(expected_order):
+    session = database.get_session()
+    try:
+        newspaper = session.get(Newspaper, expected_order[2])
+        cursor = database.encode_cursor(newspaper)
+        assert database.decode_cursor(cursor) == (newspaper.created_at, newspaper.id)
+    finally:
+        session.close()
+
+
+def test_invalid_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        database.decode_cursor("不是游标")
+    with pytest.raises(ValueError):
+        database.decode_cursor("bm90LWEtY3Vyc29y")
@@ -0,0 +1,19 @@
+"""OCR结果缓存大小统计测试"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from ocr_cache import OCRResultCache
+
+
+def test_overwrite_does_not_grow_tracked_size(tmp_path):
+    cache = OCRResultCache(tmp_path, max_bytes=10 * 1024 * 1024)
+    result = {"result": [[[[0, 0], [1, 0], [1, 1], [0, 1]], ["文字", 0.9]]], "orientation": "original"}
+
+    for _ in range(5):
+        cache.put("ab" + "0" * 62, result)
+
+    on_disk = sum(path.stat().st_size for path in tmp_path.glob("*/*.json"))
+    assert cache._total_bytes == on_disk
+    assert cache.get("ab" + "0" * 62) == result
+
@@ -0,0 +1,91 @@
+"""分阶段页面处理流水线测试：输出顺序、异常传递、提前停止和有界队列"""
+import threading
+
+import pytest
+
+from page_pipeline import PipelineStage, StagedPipeline
+
+
+def test_single_worker_stages_keep_input_order():
+    pipeline = StagedPipeline([
+        PipelineStage("double", lambda x: x * 2),
+        PipelineStage("label", lambda x: f"page-{x}"),
+    ], queue_size=1)
+
+    assert list(pipeline.run(range(20))) == [f"page-{x * 2}" for x in range(20)]
+    assert [stage["processed"] for stage in pipeline.stats()] == [20, 20]
+
+
+def test_multi_worker_stage_processes_every_item():
+    pipeline = StagedPipeline([PipelineStage("square", lambda x: x * x, workers=3)], queue_size=2)
+
+    assert sorted(pipeline.run(range(50))) == [x * x for x in range(50)]
+
+
+def test_stage_error_is_raised_in_caller():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("第3页识别失败")
+        return x
+
+    pipeline = StagedPipeline([PipelineStage("recognize", fail_on_three)], queue_size=1)
+
+    with pytest.raises(ValueError, match="第3页"):
+        list(pipeline.run(range(10)))
+
+
+def test_source_error_is_raised_in_caller():
+    def pages():
+        yield 1
+        raise RuntimeError("渲染失败")
+
+    pipeline = StagedPipeline([PipelineStage("identity", lambda x: x)])
+
+    with pytest.raises(RuntimeError, match="渲染失败"):
+        list(pipeline.run(pages()))
+
+
+def test_early_stop_closes_source_and_joins_threads():
+    closed = threading.Event()
+
+    def pages():
+        try:
+            for page in range(1000):
+                yield page
+        finally:
+            closed.set()
+
+    pipeline = StagedPipeline([PipelineStage("identity", lambda x: x)], queue_size=1, name="early-stop")
+    results = pipeline.run(pages())
+    assert next(results) == 0
+    results.close()
+
+    assert closed.is_set()
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith("early-stop-")]
+
+
+def test_bounded_queues_limit_pages_in_flight():
+    released = threading.Event()
+    produced = []
+    output = []
+
+    def pages():
+        for page in range(20):
+            produced.append(page)
+            yield page
+
+    def slow(x):
+        released.wait(timeout=5)
+        return x
+
+    pipeline = StagedPipeline([PipelineStage("slow", slow)], queue_size=2)
+    consumer = threading.Thread(target=lambda: output.extend(pipeline.run(pages())))
+    consumer.start()
+    # 阶段阻塞时，在途页面为：阶段手头1项 + 输入队列2项 + 输入线程等待放入的1项
+    released.wait(timeout=0.5)
+    in_flight = len(produced)
+    released.set()
+    consumer.join(timeout=5)
+
+    assert in_flight <= 1 + 2 + 1
+    assert output == list(range(20))
@@ -0,0 +1,131 @@
+"""
+查询计划测试
+
+执行database.py中浏览和搜索使用的查询函数，捕获它们实际发出的SQL，
+对每条语句执行EXPLAIN QUERY PLAN，确认通过预期的索引访问数据，没有全表扫描和临时排序。
+修改模型、索引或查询后运行：
+    python -m pytest tests/test_query_plans.py
+"""
+import re
+import datetime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import event
+
+import database
+
+# 不允许全表扫描的表（CTE和全文索引虚拟表除外）
+TABLES = ("newspaper", "newspaper_page", "article", "keyword", "article_keyword")
+# 计划中的表名可能带有ORM生成的别名后缀，如article_keyword_1
+FULL_SCAN_RE = re.compile(rf"SCAN ({'|'.join(TABLES)})(_\d+)?( |$)")
+
+
+@pytest.fixture(scope="module")
+def newspaper_id():
+    """初始化临时数据库并写入一份带页面、文章和关键词的报纸"""
+    database.init_db()
+    newspaper_id = database.add_newspaper("测试报", "data/raw/test.pdf", content_hash="abc")
+    database.save_newspaper_pages(newspaper_id, [
+        {
+            "page_number": number,
+            "page_image_path": f"data/page_{number}.jpg",
+            "ocr_text": f"上海市政府公告 第{number}页 今日天气晴",
+            "text_direction": "horizontal",
+            "text_type": "simplified",
+            "orientation": "original",
+            "article": {
+                "title": "公告",
+                "content": "今日天气晴",
+                "extracted_date": datetime.date(1937, 1, number),
+                "keywords": ["公告", "天气"]
+            }
+        }
+        for number in (1, 2)
+    ])
+    database.update_newspaper_ocr_status(newspaper_id, 1)
+    return newspaper_id
+
+
+def captured_selects(func, *args, **kwargs):
+    """调用函数，返回它在当前线程发出的SELECT语句[(sql, 参数)]"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(database.engine, "before_cursor_execute", capture)
+    try:
+        func(*args, **kwargs)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", capture)
+    assert statements, f"{func.__name__}没有执行查询"
+    return statements
+
+
+def query_plans(func, *args, **kwargs):
+    """函数发出的各条查询的计划，每条为计划说明行列表"""
+    with database.engine.connect() as connection:
+        return [
+            [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+            for sql, params in captured_selects(func, *args, **kwargs)
+        ]
+
+
+def assert_plans(plans, indexes, sort_allowed=False):
+    """全部计划合起来用到了期望的索引，且没有全表扫描和（不允许时的）临时排序"""
+    lines = [line for plan in plans for line in plan]
+    for index in indexes:
+        assert any(index in line for line in lines), f"未使用索引{index}: {lines}"
+    for line in lines:
+        assert not (FULL_SCAN_RE.match(line) and " USING " not in line), f"全表扫描: {line}"
+        if not sort_allowed:
+            assert "TEMP B-TREE" not in line, f"临时排序: {line}"
+
+
+def test_newspaper_list(newspaper_id):
+    assert_plans(query_plans(database.get_newspapers, limit=20), ["ix_newspaper_created_at"])
+
+
+def test_newspaper_list_cursors(newspaper_id):
+    cursor = database.encode_cursor(database.get_newspaper(newspaper_id))
+    assert_plans(query_plans(database.get_newspapers, limit=20, before=cursor), ["ix_newspaper_created_at"])
+    assert_plans(query_plans(database.get_newspapers, limit=20, after=cursor), ["ix_newspaper_created_at"])
+
+
+def test_unfinished_newspapers(newspaper_id):
+    # IN查询的两段结果需要合并排序，未完成的报纸很少
+    assert_plans(query_plans(database.get_unfinished_newspapers), ["ix_newspaper_ocr_status"], sort_allowed=True)
+
+
+def test_find_newspaper_by_hash(newspaper_id):
+    assert_plans(query_plans(database.find_newspaper_by_hash, "abc"), ["ix_newspaper_content_hash_ocr_status"])
+
+
+def test_find_unfinished_newspaper_by_hash(newspaper_id):
+    # IN查询的两段结果需要合并排序，内容相同的未完成报纸很少
+    assert_plans(
+        query_plans(database.find_unfinished_newspaper_by_hash, "abc"),
+        ["ix_newspaper_content_hash_ocr_status"], sort_allowed=True
+    )
+
+
+def test_newspaper_text_settings(newspaper_id):
+    assert_plans(
+        query_plans(database.get_newspaper_text_settings, newspaper_id),
+        ["ux_newspaper_page_newspaper_id_page_number"]
+    )
+
+
+def test_search_by_keyword(newspaper_id):
+    assert_plans(query_plans(database.search_articles_by_keyword, "天气"), ["ix_article_keyword_keyword_id"])
+
+
+def test_search_by_content(newspaper_id):
+    # 按BM25分数排序需要对命中的文章排序，LIMIT限制了排序的行数
+    assert_plans(query_plans(database.search_articles_by_content, "天气"), [], sort_allowed=True)
+    assert [article.snippet for article in database.search_articles_by_content("天气")] == \
+        ["今日<mark>天气</mark>晴"] * 2
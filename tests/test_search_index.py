@@ -0,0 +1,85 @@
+"""全文索引分词与查询表达式测试"""
+import sqlite3
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import column, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from search_index import format_snippet, index_text, match_query, snippet_columns
+
+
+def test_index_text_splits_cjk_into_overlapping_bigrams():
+    assert index_text("上海市政府") == "上海 海市 市政 政府 府"
+
+
+def test_index_text_keeps_latin_words_and_drops_punctuation():
+    assert index_text("申报，Shanghai 1932年") == "申报 报 Shanghai 1932 年"
+    assert index_text("") == ""
+
+
+def test_match_query_builds_bigram_phrase_per_term():
+    assert match_query("上海市") == '"上海 海市"'
+    # 空白分隔的词之间为AND
+    assert match_query("上海 政府") == '"上海" "政府"'
+
+
+def test_match_query_single_character_is_prefix():
+    assert match_query("报") == '"报"*'
+    assert match_query("Shanghai报") == '"Shanghai 报"*'
+
+
+def test_match_query_without_searchable_text():
+    assert match_query("，。 ！") is None
+    assert match_query("") is None
+
+
+@pytest.fixture
+def fts():
+    connection = sqlite3.connect(":memory:")
+    try:
+        connection.execute("CREATE VIRTUAL TABLE doc USING fts5(content, content='', tokenize='unicode61')")
+    except sqlite3.OperationalError:
+        pytest.skip("SQLite未编译FTS5")
+    for rowid, body in enumerate(["上海市政府发布公告", "北京大学开学", "上海商会", "海市蜃楼"], start=1):
+        connection.execute("INSERT INTO doc (rowid, content) VALUES (?, ?)", (rowid, index_text(body)))
+    yield connection
+    connection.close()
+
+
+def _search(connection, query):
+    rows = connection.execute("SELECT rowid FROM doc WHERE doc MATCH ? ORDER BY rowid", (match_query(query),))
+    return [row[0] for row in rows]
+
+
+def test_queries_match_substrings(fts):
+    assert _search(fts, "上海") == [1, 3]
+    assert _search(fts, "市政府") == [1]
+    # 二元组要求相邻："上海市"不匹配只含"海市"的文章
+    assert _search(fts, "上海市") == [1]
+    assert _search(fts, "海市") == [1, 4]
+    assert _search(fts, "上海 公告") == [1]
+
+
+def test_single_character_query_matches_any_position(fts):
+    assert _search(fts, "学") == [2]
+    assert _search(fts, "楼") == [4]
+
+
+def test_snippet_columns_compile_per_dialect():
+    start, window = snippet_columns(column("content"), "上海")
+    statement = select(start, window)
+
+    sqlite_sql = str(statement.compile(dialect=sqlite.dialect()))
+    postgresql_sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert "instr(content" in sqlite_sql and "max(" in sqlite_sql
+    assert "strpos(content" in postgresql_sql and "greatest(" in postgresql_sql
+
+
+def test_format_snippet_escapes_and_marks_terms():
+    snippet = format_snippet(5, "<b>上海</b>市政府", "上海", length=120)
+
+    assert snippet == "...&lt;b&gt;<mark>上海</mark>&lt;/b&gt;市政府"
@@ -0,0 +1,86 @@
+"""OCR文本压缩存储测试：压缩往返、文章区间和CompressedText列"""
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, func, insert, select
+from sqlalchemy.dialects import postgresql
+
+from database import register_sqlite_functions
+from text_storage import CompressedText, compress_text, inflate, inflated, text_span
+
+PAGE_TEXT = "申报\n上海市政府昨日发布公告，\n定于下月起整顿市容。\n" * 20
+
+
+def test_compress_round_trip():
+    stored = compress_text(PAGE_TEXT)
+
+    assert isinstance(stored, bytes)
+    assert len(stored) < len(PAGE_TEXT.encode("utf-8"))
+    assert inflate(stored) == PAGE_TEXT
+    assert inflate(compress_text("")) == ""
+
+
+def test_inflate_passes_through_legacy_text_and_none():
+    assert inflate("未压缩的旧数据") == "未压缩的旧数据"
+    assert inflate(None) is None
+    assert compress_text(None) is None
+
+
+def test_text_span_locates_article_in_page():
+    content = "上海市政府昨日发布公告，"
+    start, end = text_span(PAGE_TEXT, content)
+
+    assert PAGE_TEXT[start:end] == content
+    assert start == PAGE_TEXT.find(content)
+    assert text_span(PAGE_TEXT, PAGE_TEXT) == (0, len(PAGE_TEXT))
+
+
+def test_text_span_rejects_content_outside_page():
+    assert text_span(PAGE_TEXT, "北京") is None
+    assert text_span(PAGE_TEXT, "") is None
+    assert text_span(None, "申报") is None
+    assert text_span(PAGE_TEXT, None) is None
+
+
+@pytest.fixture
+def page_table(tmp_path):
+    engine = register_sqlite_functions(create_engine(f"sqlite:///{tmp_path / 'storage.db'}"))
+    metadata = MetaData()
+    table = Table("page", metadata, Column("id", Integer, primary_key=True), Column("ocr_text", CompressedText))
+    metadata.create_all(engine)
+    yield engine, table
+    engine.dispose()
+
+
+def test_compressed_column_round_trip(page_table):
+    engine, table = page_table
+    with engine.begin() as connection:
+        connection.execute(insert(table), [{"id": 1, "ocr_text": PAGE_TEXT}, {"id": 2, "ocr_text": None}])
+
+    with engine.connect() as connection:
+        assert connection.execute(
+            select(func.typeof(table.c.ocr_text)).where(table.c.id == 1)
+        ).scalar() == "blob"
+        assert connection.execute(select(table.c.ocr_text).where(table.c.id == 1)).scalar() == PAGE_TEXT
+        assert connection.execute(select(table.c.ocr_text).where(table.c.id == 2)).scalar() is None
+        # SQL中解压后截取，与Python中截取一致
+        assert connection.execute(
+            select(func.substr(inflated(table.c.ocr_text), 4, 5)).where(table.c.id == 1)
+        ).scalar() == PAGE_TEXT[3:8]
+
+
+def test_legacy_text_rows_read_back_unchanged(page_table):
+    engine, table = page_table
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO page (id, ocr_text) VALUES (1, '旧版本未压缩文本')")
+
+    with engine.connect() as connection:
+        assert connection.execute(select(table.c.ocr_text)).scalar() == "旧版本未压缩文本"
+        assert connection.execute(select(inflated(table.c.ocr_text))).scalar() == "旧版本未压缩文本"
+
+
+def test_inflated_uses_plain_column_on_other_databases():
+    sql = str(select(inflated(Column("ocr_text", CompressedText))).compile(dialect=postgresql.dialect()))
+
+    assert "inflate(" not in sql
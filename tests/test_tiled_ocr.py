@@ -0,0 +1,81 @@
+"""分块识别测试：分块覆盖整页，合并重叠区域内重复识别的文本框"""
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from tiled_ocr import iter_tiles, merge_tile_results, ocr_tiled
+
+
+def rect(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def test_tiles_cover_page_with_overlap():
+    tiles = list(iter_tiles(2500, 3000, 1600, 200))
+
+    assert (0, 0, 1600, 1600) in tiles
+    assert max(t[2] for t in tiles) == 3000 and max(t[3] for t in tiles) == 2500
+    assert all(t[2] - t[0] == 1600 and t[3] - t[1] == 1600 for t in tiles)
+    # 相邻分块至少重叠overlap像素
+    xs = sorted({t[0] for t in tiles})
+    assert all(b - a <= 1600 - 200 for a, b in zip(xs, xs[1:]))
+
+
+def test_small_page_is_a_single_tile():
+    assert list(iter_tiles(800, 600, 1600, 200)) == [(0, 0, 600, 800)]
+
+
+def test_merge_keeps_untruncated_copy_of_line_in_overlap():
+    left, right = (0, 0, 1000, 500), (800, 0, 1800, 500)
+    tile_results = [
+        # 左块中这一行延伸到分块右边缘，被截断；文字更长、置信度更高也不保留
+        (left, [[rect(850, 100, 999, 130), ("民国日报社论社", 0.99)]]),
+        # 右块中同一行完整，坐标相对右块
+        (right, [[rect(50, 100, 300, 130), ("民国日报社论", 0.90)]]),
+    ]
+
+    merged = merge_tile_results(tile_results, 500, 1800)
+
+    assert len(merged) == 1
+    box, (text, confidence) = merged[0]
+    assert text == "民国日报社论"
+    assert box == rect(850.0, 100.0, 1100.0, 130.0)
+
+
+def test_merge_prefers_longer_then_more_confident_duplicate():
+    left, right = (0, 0, 1000, 500), (800, 0, 1800, 500)
+    tile_results = [
+        (left, [[rect(850, 200, 950, 230), ("上海", 0.80)]]),
+        (right, [[rect(50, 200, 150, 230), ("上海", 0.97)]]),
+    ]
+
+    merged = merge_tile_results(tile_results, 500, 1800)
+
+    assert [line[1] for line in merged] == [("上海", 0.97)]
+
+
+def test_merge_keeps_distinct_lines_in_reading_order():
+    top, bottom = (0, 0, 1000, 600), (0, 400, 1000, 1000)
+    tile_results = [
+        (top, [[rect(10, 10, 300, 40), ("第一行", 0.9)], [rect(400, 10, 700, 40), ("第二段", 0.9)]]),
+        (bottom, [[rect(10, 300, 300, 330), ("第三行", 0.9)]]),
+    ]
+
+    merged = merge_tile_results(tile_results, 1000, 1000)
+
+    assert [line[1][0] for line in merged] == ["第一行", "第二段", "第三行"]
+
+
+def test_ocr_tiled_offsets_each_tile_result():
+    image = np.zeros((1000, 1800, 3), dtype=np.uint8)
+    seen = []
+
+    def recognize(tile):
+        seen.append(tile.shape[:2])
+        return [[rect(10, 10, 60, 40), (f"块{len(seen)}", 0.9)]]
+
+    merged = ocr_tiled(image, 1000, 200, recognize)
+
+    assert seen == [(1000, 1000), (1000, 1000)]
+    assert sorted(line[0][0][0] for line in merged) == [10.0, 810.0]